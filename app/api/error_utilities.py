@@ -48,6 +48,12 @@ class FileHandlerError(Exception):
     def __str__(self):
         return f"{self.message}"
 
+class DownloadError(FileHandlerError):
+    """Raised when a file cannot be downloaded, because the request failed or the file is over the size limit."""
+
+class HTMLContentError(FileHandlerError):
+    """Raised when a file URL serves a web page instead of the file, e.g. a sharing page."""
+
 class ImageHandlerError(Exception):
     """Raised when an image cannot be loaded. Used for tools which require image handling."""
     def __init__(self, message, url):
@@ -1,35 +1,107 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import asyncio
+import pstats
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from typing import Union
+from typing import Any, AsyncIterator, List, Optional, Union
 from app.assistants.utils.assistants_utilities import execute_assistant
-from app.services.schemas import GenericAssistantRequest, ToolRequest, ChatRequest, Message, ChatResponse, ToolResponse
+from app.services.schemas import GenericAssistantRequest, ToolRequest, ChatRequest, Message, ChatResponse, ToolResponse, ToolBatchResponse, JobResponse
 from app.utils.auth import key_check
 from app.services.logger import setup_logger
 from app.api.error_utilities import InputValidationError, ErrorResponse
-from app.tools.utils.tool_utilities import load_tool_metadata, execute_tool, finalize_inputs
-from fastapi.responses import FileResponse
+from app.tools.utils.tool_utilities import finalize_tool_inputs
+from app.services.tool_execution import run_tool, stream_tool, tool_pool_stats
+from app.services.jobs import submit_job, get_job, job_events
+from app.services.ingestion import shared_ingestion
+from app.services.result_cache import CACHE_BYPASS, CACHE_CONTROL_HEADER, cache_control
+from app.services.warmup import warmup_state
+from app.services.tracing import span_stats
+from app.services.metrics import render_metrics
+from app.services.loop_monitor import loop_monitor
+from app.services.slow_requests import slow_requests
+from app.services.request_context import set_user
+from app.services.profiling import PROFILE_ID_HEADER, call_profiled, find_profile, format_profile, start_profile
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 logger = setup_logger(__name__)
 router = APIRouter()
 
+MAX_BATCH_SIZE = 10
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+def format_stream_message(event: str, data: Any, media_type: str) -> str:
+    if media_type == SSE_MEDIA_TYPE:
+        return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+    return json.dumps({"event": event, "data": jsonable_encoder(data)}) + "\n"
+
+async def stream_tool_response(items: AsyncIterator[Any], media_type: str):
+    try:
+        async for item in items:
+            yield format_stream_message("item", item, media_type)
+    except HTTPException as e:
+        logger.error(f"HTTPException while streaming: {e}")
+        yield format_stream_message("error", ErrorResponse(status=e.status_code, message=e.detail), media_type)
+        return
+
+    yield format_stream_message("done", None, media_type)
+
+def set_cache_control(request: Request):
+    # "bypass" skips the result cache entirely, "refresh" regenerates and replaces the cached result
+    directive = request.headers.get(CACHE_CONTROL_HEADER)
+    cache_control.set(directive.strip().lower() if directive else None)
+
 @router.get("/")
 def read_root():
     return {"Hello": "World"}
 
+@router.get("/ready")
+def ready():
+    status = warmup_state.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@router.get("/_ah/warmup")
+async def app_engine_warmup():
+    # App Engine sends this before routing traffic to a new instance
+    await run_in_threadpool(warmup_state.done.wait)
+    return warmup_state.status()
+
 @router.post("/submit-tool", response_model=Union[ToolResponse, ErrorResponse])
-async def submit_tool( data: ToolRequest, _ = Depends(key_check)):     
+async def submit_tool( data: ToolRequest, request: Request, response: Response, _ = Depends(key_check)):     
+    set_cache_control(request)
     try: 
+        profile = start_profile(request)
+        if profile:
+            # Profiles measure a real execution, never a cached result
+            cache_control.set(CACHE_BYPASS)
+            response.headers[PROFILE_ID_HEADER] = profile.id
+
         # Unpack GenericRequest for tool data
+        set_user(data.user)
         request_data = data.tool_data
         
-        requested_tool = load_tool_metadata(request_data.tool_id)
-        
-        request_inputs_dict = finalize_inputs(request_data.inputs, requested_tool['inputs'])
+        request_inputs_dict = finalize_tool_inputs(request_data.tool_id, request_data.inputs)
+
+        # Clients asking for NDJSON or SSE receive generated items as soon as they are ready
+        accept = request.headers.get("accept", "")
+        for media_type in (NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE):
+            if media_type in accept:
+                items = stream_tool(request_data.tool_id, request_inputs_dict)
+                return StreamingResponse(
+                    stream_tool_response(items, media_type),
+                    media_type=media_type,
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **({PROFILE_ID_HEADER: profile.id} if profile else {})}
+                )
 
-        result = execute_tool(request_data.tool_id, request_inputs_dict)
+        result = await run_tool(request_data.tool_id, request_inputs_dict)
+
+        if profile and profile.inline:
+            return PlainTextResponse(profile.report(), headers={PROFILE_ID_HEADER: profile.id})
         
         return ToolResponse(data=result)
     
@@ -48,15 +120,136 @@ async def submit_tool( data: ToolRequest, _ = Depends(key_check)):
             content=jsonable_encoder(ErrorResponse(status=e.status_code, message=e.detail))
         )
 
+async def run_batch_item(data: ToolRequest) -> Union[ToolResponse, ErrorResponse]:
+    try:
+        set_user(data.user)
+        request_data = data.tool_data
+
+        request_inputs_dict = finalize_tool_inputs(request_data.tool_id, request_data.inputs)
+
+        result = await run_tool(request_data.tool_id, request_inputs_dict)
+
+        return ToolResponse(data=result)
+
+    except InputValidationError as e:
+        logger.error(f"InputValidationError: {e}")
+        return ErrorResponse(status=400, message=e.message)
+
+    except HTTPException as e:
+        logger.error(f"HTTPException: {e}")
+        return ErrorResponse(status=e.status_code, message=e.detail)
+
+@router.post("/submit-tools-batch", response_model=Union[ToolBatchResponse, ErrorResponse])
+async def submit_tools_batch( data: List[ToolRequest], request: Request, _ = Depends(key_check)):
+    set_cache_control(request)
+    if not data or len(data) > MAX_BATCH_SIZE:
+        message = f"A batch must contain between 1 and {MAX_BATCH_SIZE} tool requests"
+        logger.error(message)
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder(ErrorResponse(status=400, message=message))
+        )
+
+    # Requests run concurrently and share every document they have in common
+    with shared_ingestion():
+        results = await asyncio.gather(*(run_batch_item(item) for item in data))
+
+    return ToolBatchResponse(data=results)
+
+@router.post("/jobs", status_code=202, response_model=Union[JobResponse, ErrorResponse])
+async def submit_tool_job( data: ToolRequest, request: Request, _ = Depends(key_check)):
+    set_cache_control(request)
+    try:
+        set_user(data.user)
+        request_data = data.tool_data
+
+        request_inputs_dict = finalize_tool_inputs(request_data.tool_id, request_data.inputs)
+
+        job = await submit_job(request_data.tool_id, request_inputs_dict)
+
+        return JobResponse(data=job)
+
+    except InputValidationError as e:
+        logger.error(f"InputValidationError: {e}")
+
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder(ErrorResponse(status=400, message=e.message))
+        )
+
+    except HTTPException as e:
+        logger.error(f"HTTPException: {e}")
+        return JSONResponse(
+            status_code=e.status_code,
+            content=jsonable_encoder(ErrorResponse(status=e.status_code, message=e.detail))
+        )
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def read_job( job_id: str, _ = Depends(key_check)):
+    return JobResponse(data=get_job(job_id))
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events( job_id: str, _ = Depends(key_check)):
+    get_job(job_id)
+    return StreamingResponse(
+        job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/tool-pools")
+def tool_pools( _ = Depends(key_check) ):
+    return tool_pool_stats()
+
+@router.get("/event-loop")
+async def event_loop( _ = Depends(key_check) ):
+    # Async so the threadpool sample is taken on the loop
+    loop_monitor.sample_threadpool()
+    return loop_monitor.stats()
+
+@router.get("/slow-requests")
+def list_slow_requests( tool_id: Optional[str] = None, limit: int = 50, _ = Depends(key_check) ):
+    return slow_requests.log.list(tool_id, min(max(limit, 1), 500))
+
+@router.get("/slow-requests/{record_id}")
+def read_slow_request( record_id: str, _ = Depends(key_check) ):
+    record = slow_requests.log.get(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Slow request not found")
+    return record
+
+@router.get("/spans")
+def spans( _ = Depends(key_check) ):
+    return span_stats.snapshot()
+
+@router.get("/profiles/{profile_id}")
+def read_profile( profile_id: str, format: str = "pstats", _ = Depends(key_check) ):
+    # The pstats file opens in snakeviz or `python -m pstats`; format=text is the cumulative-time summary
+    path = find_profile(profile_id)
+    if format == "text":
+        return PlainTextResponse(format_profile(pstats.Stats(path)))
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+@router.get("/metrics")
+def metrics( _ = Depends(key_check) ):
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @router.post("/assistant-chat", response_model=ChatResponse)
-async def assistants( request: GenericAssistantRequest, _ = Depends(key_check) ):
+async def assistants( request: GenericAssistantRequest, http_request: Request, response: Response, _ = Depends(key_check) ):
+    profile = start_profile(http_request)
+    if profile:
+        response.headers[PROFILE_ID_HEADER] = profile.id
     
     assistant_group = request.assistant_inputs.assistant_group
     assistant_name = request.assistant_inputs.assistant_name
     user_info = request.assistant_inputs.user_info
     messages = request.assistant_inputs.messages
 
-    result = execute_assistant(assistant_group, assistant_name, user_info, messages)
+    result = await run_in_threadpool(call_profiled, execute_assistant, assistant_group, assistant_name, user_info, messages)
+
+    if profile and profile.inline:
+        return PlainTextResponse(profile.report(), headers={PROFILE_ID_HEADER: profile.id})
 
     formatted_response = Message(
         role="ai",
@@ -3,6 +3,7 @@ from dotenv import load_dotenv, find_dotenv
 import google.generativeai as genai
 from app.services.assistant_registry import UserInfo
 from app.services.logger import setup_logger
+from app.services.llm_ledger import llm_call
 
 load_dotenv(find_dotenv())
 
@@ -20,7 +21,9 @@ def read_text_file(file_path):
     with open(absolute_file_path, 'r') as file:
         return file.read()
 
-model = genai.GenerativeModel(model_name='gemini-2.0-flash-exp',
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+model = genai.GenerativeModel(model_name=MODEL_NAME,
                               system_instruction=read_text_file('prompt/co_teacher_context.txt'),
                               )
 
@@ -31,10 +34,16 @@ def run_co_teacher_assistant(user_query: str, chat_context: str, user_info: User
   user_age = user_info.user_age
   user_preference = user_info.user_preference
 
-  response = chat.send_message(f"""
+  message = f"""
                                User query: {user_query}\n
                                Personalize the response for {user_name} (Age: {user_age}) with preference: {user_preference}.\n
                                You can use the chat context if further information is needed: {chat_context}\n
-                               """)
+                               """
+
+  with llm_call(MODEL_NAME, message, tool_id="co_teacher") as call:
+    response = chat.send_message(message)
+    # Not every response reports usage; the ledger then estimates the token counts
+    usage = response.usage_metadata
+    call.finish(response.text, getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None))
 
   return response.text
\ No newline at end of file
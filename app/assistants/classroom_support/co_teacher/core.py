@@ -40,6 +40,6 @@ def executor(
         user_info=user_info
     )
 
-    logger.info(f"Response generated successfully for CoTeacher: {response}")
+    logger.debug("Response generated successfully for CoTeacher: %s", response)
 
     return response
\ No newline at end of file
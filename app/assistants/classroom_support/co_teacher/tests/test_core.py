@@ -121,4 +121,19 @@ def test_executor_translate_invalid():
                 }
             ]
         )
-    assert isinstance(exc_info.value, TypeError)
\ No newline at end of file
+    assert isinstance(exc_info.value, TypeError)
+
+def test_response_without_usage_metadata(monkeypatch):
+    from types import SimpleNamespace
+    from app.assistants.classroom_support.co_teacher import assistant
+
+    class Model:
+        def start_chat(self):
+            return self
+
+        def send_message(self, message):
+            return SimpleNamespace(text="An answer", usage_metadata=None)
+
+    monkeypatch.setattr(assistant, "model", Model())
+
+    assert assistant.run_co_teacher_assistant("Hi", "", base_attributes["user_info"]) == "An answer"
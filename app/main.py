@@ -3,23 +3,47 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.api.router import router
+from starlette.concurrency import run_in_threadpool
+from app.api.router import NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE, router
 from app.services.logger import setup_logger
+from app.services.request_context import current_request_id
 from app.api.error_utilities import ErrorResponse
+from app.services.tool_execution import shutdown_tool_pools
+from app.services.job_store import get_job_store
+from app.services.warmup import run_warm_up
+from app.services.loop_monitor import loop_monitor
+from app.services.tracing import start_trace
+from app.services.metrics import HTTP_REQUESTS_IN_FLIGHT, observe_request, register_collectors
 
 import os
+import re
+import time
+import uuid
+import asyncio
 from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
 
 logger = setup_logger(__name__)
 
+register_collectors()
+
+STREAMED_MEDIA_TYPES = (NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(f"Initializing Application Startup")
+    # Warm-up runs in the background; /ready reports when it is done
+    warmup_task = asyncio.create_task(run_warm_up())
+    loop_monitor.start()
+    # Opened now rather than on the first job, so jobs a previous process left unfinished are failed at startup
+    await run_in_threadpool(get_job_store)
     logger.info(f"Successfully Completed Application Startup")
     
     yield
+    warmup_task.cancel()
+    await loop_monitor.stop()
+    shutdown_tool_pools()
     logger.info("Application shutdown")
 
 app = FastAPI(lifespan = lifespan)
@@ -31,6 +55,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    # Stages timed while handling the request are reported back in the Server-Timing header
+    started = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    try:
+        with start_trace() as trace:
+            response = await call_next(request)
+    except BaseException:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        raise
+
+    def finish():
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Labelled by route template rather than path, so /jobs/{job_id} is one series
+        route = request.scope.get("route")
+        observe_request(request.method, getattr(route, "path", "unmatched"), response.status_code, time.perf_counter() - started, trace)
+
+    if response.headers.get("content-type", "").split(";")[0] not in STREAMED_MEDIA_TYPES:
+        response.headers["Server-Timing"] = trace.server_timing()
+        finish()
+        return response
+
+    # The stages of a streamed response run while its body is sent, after the headers are gone:
+    # it gets no Server-Timing header and is observed once the body is complete
+    body = response.body_iterator
+
+    async def observed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            finish()
+
+    response.body_iterator = observed_body()
+    return response
+
+REQUEST_ID_HEADER = "X-Request-ID"
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+@app.middleware("http")
+async def request_id(request: Request, call_next):
+    # Registered last so it wraps the other middleware; everything logged for the request carries the id
+    incoming = request.headers.get(REQUEST_ID_HEADER, "")
+    token = current_request_id.set(incoming if VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex)
+    try:
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = current_request_id.get()
+        return response
+    finally:
+        current_request_id.reset(token)
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = []
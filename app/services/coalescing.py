@@ -0,0 +1,63 @@
+import hashlib
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+from app.services.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def request_key(tool_id, request_inputs_dict: Dict[str, Any]) -> str:
+    """Canonical key for a tool request: the same tool and inputs in any key order give the same key."""
+    canonical = json.dumps(
+        {"tool_id": str(tool_id), "inputs": request_inputs_dict},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class RequestCoalescer:
+    """
+    Single-flight layer for tool executions.
+
+    While an execution for a key is in flight, identical requests attach to its future
+    instead of starting their own, so they all receive the same result or error.
+    The key is released as soon as the execution finishes; nothing is cached afterwards.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Tuple[str, Future]] = {}
+        self._executions = defaultdict(int)
+        self._coalesced = defaultdict(int)
+
+    def submit(self, tool_id, key: str, start: Callable[[], Future]) -> Future:
+        tool_id = str(tool_id)
+        with self._lock:
+            if key in self._in_flight:
+                self._coalesced[tool_id] += 1
+                logger.info(f"Attaching duplicate {tool_id} request to the execution already in flight")
+                return self._in_flight[key][1]
+
+            future = start()
+            self._in_flight[key] = (tool_id, future)
+            self._executions[tool_id] += 1
+
+        future.add_done_callback(lambda done: self._release(key, done))
+        return future
+
+    def _release(self, key: str, future: Future):
+        with self._lock:
+            if key in self._in_flight and self._in_flight[key][1] is future:
+                del self._in_flight[key]
+
+    def stats(self, tool_id) -> Dict[str, int]:
+        tool_id = str(tool_id)
+        with self._lock:
+            return {
+                "executions": self._executions[tool_id],
+                "coalesced": self._coalesced[tool_id],
+                "in_flight": sum(1 for owner, _ in self._in_flight.values() if owner == tool_id),
+            }
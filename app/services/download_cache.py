@@ -0,0 +1,196 @@
+"""
+Disk cache of downloaded documents, shared by every loader that goes through `download_to_file`.
+
+Entries are keyed by URL and remember the ETag and Last-Modified the server sent, so a
+cached file is revalidated with a conditional request and only transferred again when it
+changed. Bodies are stored once per SHA-256 of their content, however many URLs serve
+them, and the least recently used bodies are evicted when the cache grows past its size
+bound. The index is a SQLite database next to the bodies.
+
+Google Drive documents are fetched by gdown, which resolves sharing links, export formats
+and confirmation pages itself, and are not cached.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+from app.services.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_DOWNLOAD_CACHE_DIR = os.path.join(tempfile.gettempdir(), "marvel-ai-download-cache")
+# Small by default: on App Engine standard the temp directory lives in the instance's memory
+DEFAULT_DOWNLOAD_CACHE_MB = 32
+
+@dataclass
+class CacheEntry:
+    url: str
+    sha256: str
+    size: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: Optional[str]
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+def is_cacheable(headers: Mapping[str, str]) -> bool:
+    """Only responses carrying a validator can be revalidated; no-store asks not to be kept at all."""
+    if "no-store" in headers.get("Cache-Control", "").lower():
+        return False
+    return bool(headers.get("ETag") or headers.get("Last-Modified"))
+
+class DownloadCache:
+    """Content-addressed store of downloaded files with an LRU size bound. Safe to use from several worker threads."""
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.blob_directory = os.path.join(directory, "blobs")
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, etag TEXT, last_modified TEXT, content_type TEXT)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_directory, sha256)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT urls.sha256, blobs.size, urls.etag, urls.last_modified, urls.content_type "
+                "FROM urls JOIN blobs ON blobs.sha256 = urls.sha256 WHERE urls.url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(url, *row)
+
+    def restore(self, entry: CacheEntry, prefix: str = "") -> Optional[str]:
+        """
+        Copies the cached body of `entry` to a new temporary file and returns its path, or None
+        when the body was evicted in the meantime. Callers own the copy and remove it as usual.
+        """
+        with tempfile.NamedTemporaryFile(delete=False, prefix=prefix) as temp_file:
+            try:
+                with open(self.blob_path(entry.sha256), "rb") as blob:
+                    shutil.copyfileobj(blob, temp_file)
+            except OSError:
+                temp_file.close()
+                os.remove(temp_file.name)
+                return None
+
+        with self._lock:
+            self._connection.execute("UPDATE blobs SET last_used = ? WHERE sha256 = ?", (time.time(), entry.sha256))
+            self._connection.commit()
+        return temp_file.name
+
+    def store(self, url: str, path: str, sha256: str, size: int, headers: Mapping[str, str]):
+        """Records the file at `path` (left in place) as the body served at `url` with these response headers."""
+        if not is_cacheable(headers) or size > self.max_bytes:
+            self.forget(url)
+            return
+
+        blob_path = self.blob_path(sha256)
+        if not os.path.exists(blob_path):
+            tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                # A hard link costs nothing; the file may live on another filesystem, though
+                try:
+                    os.link(path, tmp_path)
+                except OSError:
+                    shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, blob_path)
+            except OSError as e:
+                logger.warning(f"Failed to add {url} to the download cache: {e}")
+                self._remove(tmp_path)
+                return
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO blobs (sha256, size, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET last_used = excluded.last_used",
+                (sha256, size, time.time())
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, etag, last_modified, content_type) VALUES (?, ?, ?, ?, ?)",
+                (url, sha256, headers.get("ETag"), headers.get("Last-Modified"), headers.get("Content-Type"))
+            )
+            self._connection.commit()
+            self._evict()
+
+    def forget(self, url: str):
+        with self._lock:
+            self._connection.execute("DELETE FROM urls WHERE url = ?", (url,))
+            self._connection.commit()
+
+    def _evict(self):
+        # Called with the lock held. Bodies no URL refers to any more go first, then the least recently used
+        self._connection.execute(
+            "UPDATE blobs SET last_used = 0 WHERE sha256 NOT IN (SELECT sha256 FROM urls)"
+        )
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            self._connection.commit()
+            return
+
+        for sha256, size in self._connection.execute("SELECT sha256, size FROM blobs ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+            self._connection.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+            self._remove(self.blob_path(sha256))
+            total -= size
+        self._connection.commit()
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            urls = self._connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            blobs, size = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"urls": urls, "blobs": blobs, "bytes": size}
+
+_cache: Optional[DownloadCache] = None
+_cache_disabled = False
+_cache_lock = threading.Lock()
+
+def get_download_cache() -> Optional[DownloadCache]:
+    """
+    Download cache of the process, opened on first use in DOWNLOAD_CACHE_DIR and bounded to
+    DOWNLOAD_CACHE_MB. An empty DOWNLOAD_CACHE_DIR disables the cache; so does a directory
+    that cannot be opened, which is logged once.
+    """
+    global _cache, _cache_disabled
+    with _cache_lock:
+        if _cache is None and not _cache_disabled:
+            directory = os.environ.get("DOWNLOAD_CACHE_DIR", DEFAULT_DOWNLOAD_CACHE_DIR)
+            max_bytes = int(float(os.environ.get("DOWNLOAD_CACHE_MB", DEFAULT_DOWNLOAD_CACHE_MB)) * 1024 * 1024)
+            try:
+                _cache = DownloadCache(directory, max_bytes) if directory and max_bytes > 0 else None
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Download cache disabled, cannot open {directory}: {e}")
+            _cache_disabled = _cache is None
+        return _cache
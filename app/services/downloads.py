@@ -0,0 +1,150 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.api.error_utilities import DownloadError
+from app.services.download_cache import get_download_cache, is_cacheable
+from app.services.http_client import get_http_session
+from app.services.logger import setup_logger
+from app.services.metrics import DOWNLOAD_CACHE_LOOKUPS
+from app.services.tracing import count_event, span
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_DOWNLOAD_MB = 100
+CHUNK_SIZE = 64 * 1024
+# Bytes kept from the start of the body for content sniffing
+HEAD_BYTES = 512
+# URLs whose size is remembered for the memory guard
+KNOWN_SIZES = 1024
+
+_known_sizes: "OrderedDict[str, int]" = OrderedDict()
+_known_sizes_lock = threading.Lock()
+
+def remember_size(url: str, size: int):
+    with _known_sizes_lock:
+        _known_sizes[url] = size
+        _known_sizes.move_to_end(url)
+        while len(_known_sizes) > KNOWN_SIZES:
+            _known_sizes.popitem(last=False)
+
+def known_size(url: str) -> Optional[int]:
+    """Size of the file at `url` from its last download or HEAD request in this process, without a request."""
+    with _known_sizes_lock:
+        return _known_sizes.get(url)
+
+@dataclass
+class Download:
+    path: str
+    size: int
+    content_type: Optional[str]
+    head: bytes
+    sha256: Optional[str] = None
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def max_download_bytes() -> Optional[int]:
+    """MAX_DOWNLOAD_MB caps the size of a downloaded file; 0 removes the cap."""
+    limit_mb = float(os.environ.get("MAX_DOWNLOAD_MB", DEFAULT_MAX_DOWNLOAD_MB))
+    return int(limit_mb * 1024 * 1024) if limit_mb > 0 else None
+
+def too_large(url: str, limit: int) -> DownloadError:
+    limit_mb = f"{limit / (1024 * 1024):g}"
+    logger.error(f"Download of {url} aborted, the file is over the {limit_mb} MB limit")
+    return DownloadError(f"File is larger than the {limit_mb} MB download limit", url)
+
+def read_head(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read(HEAD_BYTES)
+
+def stream_to_file(url: str, response, prefix: str, limit: Optional[int]) -> Download:
+    response.raise_for_status()
+    declared = response.headers.get("Content-Length", "")
+    if limit and declared.isdigit() and int(declared) > limit:
+        raise too_large(url, limit)
+
+    size = 0
+    head = b""
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(delete=False, prefix=prefix) as temp_file:
+        try:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                size += len(chunk)
+                if limit and size > limit:
+                    raise too_large(url, limit)
+                if len(head) < HEAD_BYTES:
+                    head += chunk[:HEAD_BYTES - len(head)]
+                digest.update(chunk)
+                temp_file.write(chunk)
+        except BaseException:
+            temp_file.close()
+            os.remove(temp_file.name)
+            raise
+
+    count_event("download_bytes", size)
+    remember_size(url, size)
+    return Download(temp_file.name, size, response.headers.get("Content-Type"), head, digest.hexdigest())
+
+def download_to_file(url: str, prefix: str = "", max_bytes: Optional[int] = None) -> Download:
+    """
+    Streams `url` into a temporary file in chunks, so memory use does not grow with the file.
+
+    The size cap is checked against Content-Length before anything is read and again while
+    streaming, for servers that send no length or a wrong one; either way the transfer stops
+    with a DownloadError and the partial file is removed. Request errors, including HTTP
+    error statuses, are raised as the requests exceptions. The caller removes the file.
+
+    A URL in the download cache is revalidated with a conditional request, and the cached copy
+    is used when the server answers 304 Not Modified.
+    """
+    limit = max_bytes if max_bytes is not None else max_download_bytes()
+    cache = get_download_cache()
+    entry = cache.lookup(url) if cache else None
+
+    with span("download"):
+        if entry is not None and not (limit and entry.size > limit):
+            with get_http_session().get(url, stream=True, headers=entry.conditional_headers()) as response:
+                if response.status_code == 304:
+                    path = cache.restore(entry, prefix)
+                    if path is not None:
+                        DOWNLOAD_CACHE_LOOKUPS.labels("hit").inc()
+                        count_event("download_cache_hits")
+                        remember_size(url, entry.size)
+                        return Download(path, entry.size, entry.content_type, read_head(path), entry.sha256)
+                    # Evicted by another worker since the lookup; downloaded again below
+                else:
+                    download = stream_to_file(url, response, prefix, limit)
+                    DOWNLOAD_CACHE_LOOKUPS.labels("changed").inc()
+                    cache.store(url, download.path, download.sha256, download.size, response.headers)
+                    return download
+
+        if cache:
+            DOWNLOAD_CACHE_LOOKUPS.labels("miss").inc()
+        with get_http_session().get(url, stream=True) as response:
+            download = stream_to_file(url, response, prefix, limit)
+            if cache:
+                cache.store(url, download.path, download.sha256, download.size, response.headers)
+            return download
+
+def file_validators(url: str) -> Optional[str]:
+    """
+    ETag and Last-Modified of the file at `url`, from a HEAD request, or None when the server
+    sends neither (or forbids storing the file), so a change of content cannot be detected
+    without transferring the file.
+    """
+    with span("revalidate"):
+        response = get_http_session().head(url, allow_redirects=True)
+    response.raise_for_status()
+    if response.headers.get("Content-Length", "").isdigit():
+        remember_size(url, int(response.headers["Content-Length"]))
+    if not is_cacheable(response.headers):
+        return None
+    return f"{response.headers.get('ETag', '')}|{response.headers.get('Last-Modified', '')}"
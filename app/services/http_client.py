@@ -0,0 +1,100 @@
+import os
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.services.logger import setup_logger
+from app.services.metrics import DOWNLOAD_RETRIES
+from app.services.tracing import count_event
+
+logger = setup_logger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 0.5
+DEFAULT_BACKOFF_MAX_SECONDS = 10
+# Connections kept open per host, and the number of hosts with a pool of their own
+DEFAULT_POOL_PER_HOST = 10
+DEFAULT_POOL_HOSTS = 20
+
+# Statuses worth another try: rate limiting and the gateway errors of storage hosts and CDNs
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+class CountingRetry(Retry):
+    """Retry policy that reports every retry to the request trace and to /metrics."""
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        reason = str(response.status) if response is not None and error is None else type(error).__name__
+        DOWNLOAD_RETRIES.labels(reason).inc()
+        logger.debug("Retrying %s %s after %s", method, url, reason)
+        count_event("download_retries")
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+class PooledSession(requests.Session):
+    """Session with a default timeout; requests.Session itself waits forever unless told otherwise."""
+    def __init__(self, timeout: Tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+def create_http_session(
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    pool_per_host: int = DEFAULT_POOL_PER_HOST,
+    pool_hosts: int = DEFAULT_POOL_HOSTS
+) -> PooledSession:
+    """
+    Session for document downloads: keep-alive connections pooled per host, with at most
+    `pool_per_host` open to one host (further requests wait for a free one), and idempotent
+    requests retried on connection errors and transient statuses with exponential backoff
+    (`backoff_seconds` doubled per attempt) plus up to `backoff_seconds` of random jitter.
+    """
+    retry = CountingRetry(
+        total=retries,
+        backoff_factor=backoff_seconds,
+        backoff_max=DEFAULT_BACKOFF_MAX_SECONDS,
+        backoff_jitter=backoff_seconds,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        # The last response is returned as is, callers raise_for_status like with plain requests
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_per_host, pool_block=True, max_retries=retry)
+
+    session = PooledSession((connect_timeout, read_timeout))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+_session: Optional[PooledSession] = None
+_session_lock = threading.Lock()
+
+def get_http_session() -> PooledSession:
+    """
+    The process-wide download session, configured from HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    HTTP_RETRIES, HTTP_BACKOFF_SECONDS, HTTP_POOL_PER_HOST and HTTP_POOL_HOSTS.
+
+    Sharing it between the tools' worker threads is what lets a download reuse the connection,
+    and TLS session, of an earlier one to the same host.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_http_session(
+                connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+                read_timeout=float(os.environ.get("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+                retries=int(os.environ.get("HTTP_RETRIES", DEFAULT_RETRIES)),
+                backoff_seconds=float(os.environ.get("HTTP_BACKOFF_SECONDS", DEFAULT_BACKOFF_SECONDS)),
+                pool_per_host=int(os.environ.get("HTTP_POOL_PER_HOST", DEFAULT_POOL_PER_HOST)),
+                pool_hosts=int(os.environ.get("HTTP_POOL_HOSTS", DEFAULT_POOL_HOSTS))
+            )
+        return _session
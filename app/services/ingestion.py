@@ -0,0 +1,136 @@
+import threading
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.services.logger import setup_logger
+from app.services.tracing import span
+
+logger = setup_logger(__name__)
+
+class SharedIngestion:
+    """
+    Shares loaded documents and their embeddings between the tool executions of one batch.
+
+    Each document is loaded once per key and each text is embedded once per embedding
+    model, even when several executors ask for it at the same time: later callers wait
+    for the first one instead of repeating the download, parsing and embedding.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents: Dict[Hashable, Future] = {}
+        self._vectors: Dict[Hashable, Future] = {}
+        self.loads = 0
+        self.reused_loads = 0
+        self.embedded_texts = 0
+        self.reused_texts = 0
+
+    def load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._documents.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._documents[key] = future
+                self.loads += 1
+            else:
+                self.reused_loads += 1
+
+        if owner:
+            try:
+                future.set_result(loader())
+            except BaseException as e:
+                future.set_exception(e)
+        else:
+            logger.info(f"Reusing documents already loaded in this batch for {key}")
+
+        result = future.result()
+        # Hand every caller its own list so concatenation in one tool cannot leak into another
+        return list(result) if isinstance(result, list) else result
+
+    def embed(self, model_key: Hashable, texts: List[str], embed_texts: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        futures, owned = [], {}
+        with self._lock:
+            for text in texts:
+                key = (model_key, text)
+                future = self._vectors.get(key)
+                if future is None:
+                    future = Future()
+                    self._vectors[key] = future
+                    owned[text] = future
+                futures.append(future)
+            self.embedded_texts += len(owned)
+            self.reused_texts += len(texts) - len(owned)
+
+        if owned:
+            try:
+                vectors = embed_texts(list(owned))
+                for future, vector in zip(owned.values(), vectors):
+                    future.set_result(vector)
+            except BaseException as e:
+                with self._lock:
+                    for text in owned:
+                        self._vectors.pop((model_key, text), None)
+                for future in owned.values():
+                    future.set_exception(e)
+
+        return [future.result() for future in futures]
+
+class SharedEmbeddings(Embeddings):
+    """Embeddings wrapper that routes document embedding through a `SharedIngestion`."""
+    def __init__(self, embedding_model: Embeddings, ingestion: SharedIngestion):
+        self.embedding_model = embedding_model
+        self.ingestion = ingestion
+        self.model_key = (type(embedding_model).__name__, getattr(embedding_model, "model", None))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.ingestion.embed(self.model_key, texts, self.embedding_model.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedding_model.embed_query(text)
+
+current_ingestion: ContextVar[Optional[SharedIngestion]] = ContextVar("current_ingestion", default=None)
+
+@contextmanager
+def shared_ingestion() -> Iterator[SharedIngestion]:
+    """Activates a `SharedIngestion` for the current context and every task or worker started from it."""
+    ingestion = SharedIngestion()
+    token = current_ingestion.set(ingestion)
+    try:
+        yield ingestion
+    finally:
+        current_ingestion.reset(token)
+        logger.info(
+            f"Shared ingestion finished: {ingestion.loads} loads ({ingestion.reused_loads} reused), "
+            f"{ingestion.embedded_texts} texts embedded ({ingestion.reused_texts} reused)"
+        )
+
+def load_shared(key: Hashable, loader: Callable[[], Any]) -> Any:
+    """Runs `loader` once per key inside a shared ingestion scope, or directly outside of one."""
+    ingestion = current_ingestion.get()
+    if ingestion is None:
+        return loader()
+    return ingestion.load(key, loader)
+
+def build_vectorstore(vectorstore_class, documents: List[Document], embedding_model: Embeddings):
+    """
+    Builds a vectorstore for a single tool execution.
+
+    Chroma stores get a collection of their own, otherwise concurrent requests would write
+    into, and delete, the same default collection.
+    """
+    from langchain_chroma import Chroma
+
+    ingestion = current_ingestion.get()
+    if ingestion is not None:
+        embedding_model = SharedEmbeddings(embedding_model, ingestion)
+
+    with span("vectorstore"):
+        if isinstance(vectorstore_class, type) and issubclass(vectorstore_class, Chroma):
+            return vectorstore_class.from_documents(documents, embedding_model, collection_name=f"tool-{uuid.uuid4().hex}")
+
+        return vectorstore_class.from_documents(documents, embedding_model)
@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.services.logger import setup_logger
+from app.services.schemas import Job, JobStatus
+
+logger = setup_logger(__name__)
+
+DEFAULT_JOB_TTL = 3600
+INTERRUPTED_ERROR = {"status": 500, "message": "The job was interrupted by a server restart, please submit it again"}
+
+class JobStore:
+    """
+    Interface for persisting background tool jobs.
+
+    Implementations must be safe to call from the event loop and from tool worker threads.
+    Finished jobs are kept for `ttl` seconds and then dropped.
+    """
+    def __init__(self, ttl: int = DEFAULT_JOB_TTL):
+        self.ttl = ttl
+
+    def create(self, job: Job) -> Job:
+        raise NotImplementedError("Subclasses should implement this method to store a new job.")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError("Subclasses should implement this method to load a job.")
+
+    def update(self, job_id: str, **fields) -> Optional[Job]:
+        raise NotImplementedError("Subclasses should implement this method to update a job.")
+
+    def append_progress(self, job_id: str, message: str) -> Optional[Job]:
+        raise NotImplementedError("Subclasses should implement this method to record job progress.")
+
+    def is_expired(self, job: Job, now: float) -> bool:
+        return job.status in (JobStatus.succeeded, JobStatus.failed) and now - job.updated_at > self.ttl
+
+class InMemoryJobStore(JobStore):
+    """Keeps jobs in process memory. Jobs are lost on restart and are not shared between instances."""
+    def __init__(self, ttl: int = DEFAULT_JOB_TTL):
+        super().__init__(ttl)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items() if self.is_expired(job, now)]:
+            del self._jobs[job_id]
+
+    def create(self, job: Job) -> Job:
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job.model_copy(deep=True)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy(deep=True) if job else None
+
+    def update(self, job_id: str, **fields) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = job.model_copy(update={**fields, "updated_at": time.time()}, deep=True)
+            self._jobs[job_id] = job
+            return job.model_copy(deep=True)
+
+    def append_progress(self, job_id: str, message: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.progress.append(message)
+            job.updated_at = time.time()
+            return job.model_copy(deep=True)
+
+class SQLiteJobStore(JobStore):
+    """
+    Persists jobs in a SQLite database so job state survives process restarts.
+
+    Jobs still queued or running when the store is opened belonged to a previous process and
+    will never finish; they are marked as failed. The database is therefore meant for one
+    process at a time, as in the deployment (one uvicorn process per instance).
+    """
+    def __init__(self, path: str, ttl: int = DEFAULT_JOB_TTL):
+        super().__init__(ttl)
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, updated_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._connection.commit()
+        self._fail_interrupted()
+
+    def _fail_interrupted(self):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT data FROM jobs WHERE status IN (?, ?)", (JobStatus.queued.value, JobStatus.running.value)
+            ).fetchall()
+            for row in rows:
+                job = Job.model_validate_json(row[0]).model_copy(update={
+                    "status": JobStatus.failed,
+                    "error": INTERRUPTED_ERROR,
+                    "updated_at": time.time()
+                })
+                self._save(job)
+        if rows:
+            logger.warning(f"Marked {len(rows)} jobs interrupted by a restart as failed")
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        row = self._connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def _save(self, job: Job):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO jobs (id, status, updated_at, data) VALUES (?, ?, ?, ?)",
+            (job.id, job.status.value, job.updated_at, job.model_dump_json())
+        )
+        self._connection.commit()
+
+    def _prune(self):
+        self._connection.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (JobStatus.succeeded.value, JobStatus.failed.value, time.time() - self.ttl)
+        )
+
+    def create(self, job: Job) -> Job:
+        with self._lock:
+            self._prune()
+            self._save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._load(job_id)
+
+    def update(self, job_id: str, **fields) -> Optional[Job]:
+        with self._lock:
+            job = self._load(job_id)
+            if job is None:
+                return None
+            job = job.model_copy(update={**fields, "updated_at": time.time()})
+            self._save(job)
+            return job
+
+    def append_progress(self, job_id: str, message: str) -> Optional[Job]:
+        with self._lock:
+            job = self._load(job_id)
+            if job is None:
+                return None
+            job.progress.append(message)
+            job.updated_at = time.time()
+            self._save(job)
+            return job
+
+def create_job_store() -> JobStore:
+    """
+    Builds the job store selected by the environment.
+
+    JOB_STORE selects the backend (`memory` or `sqlite`), JOB_STORE_PATH sets the SQLite
+    database file and JOB_TTL how long finished jobs are kept, in seconds.
+    """
+    store_type = os.environ.get('JOB_STORE', 'memory').lower()
+    ttl = int(os.environ.get('JOB_TTL', DEFAULT_JOB_TTL))
+
+    if store_type == 'sqlite':
+        path = os.environ.get('JOB_STORE_PATH', 'jobs.sqlite3')
+        logger.info(f"Using SQLite job store at {path}")
+        return SQLiteJobStore(path, ttl=ttl)
+
+    if store_type != 'memory':
+        logger.warning(f"Unknown JOB_STORE '{store_type}', falling back to in-memory job store")
+
+    return InMemoryJobStore(ttl=ttl)
+
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+def get_job_store() -> JobStore:
+    """
+    Job store of the process, created on first use rather than at import, so importing a tool
+    never opens the database or fails the jobs of a running server.
+    """
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = create_job_store()
+        return _job_store
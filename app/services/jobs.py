@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from app.services.job_store import get_job_store
+from app.services.logger import setup_logger
+from app.services.request_context import current_job_id
+from app.services.schemas import Job, JobStatus
+from app.services.tool_execution import run_tool
+
+logger = setup_logger(__name__)
+
+TERMINAL_STATUSES = (JobStatus.succeeded, JobStatus.failed)
+# Longest a client is streamed events of one job before being told to poll instead
+DEFAULT_EVENTS_TIMEOUT = 900
+
+# Keep references to running tasks so they are not garbage collected mid-flight
+_running_tasks: Set[asyncio.Task] = set()
+
+async def _run_job(job_id: str, tool_id: str, request_inputs_dict: Dict[str, Any]):
+    # The job stays queued until a worker picks it up, see report_job_started
+    current_job_id.set(job_id)
+    job_store = get_job_store()
+
+    try:
+        result = await run_tool(tool_id, request_inputs_dict)
+        # Stores may write to disk, keep that off the event loop
+        await run_in_threadpool(job_store.update, job_id, status=JobStatus.succeeded, result=jsonable_encoder(result))
+        logger.info(f"Job {job_id} for {tool_id} succeeded")
+
+    except HTTPException as e:
+        logger.error(f"Job {job_id} for {tool_id} failed: {e.detail}")
+        await run_in_threadpool(job_store.update, job_id, status=JobStatus.failed, error={"status": e.status_code, "message": e.detail})
+
+    except Exception as e:
+        logger.error(f"Job {job_id} for {tool_id} failed: {e}")
+        await run_in_threadpool(job_store.update, job_id, status=JobStatus.failed, error={"status": 500, "message": str(e)})
+
+async def submit_job(tool_id: str, request_inputs_dict: Dict[str, Any]) -> Job:
+    """Stores a new job and starts executing the tool in the background."""
+    now = time.time()
+    job = await run_in_threadpool(get_job_store().create, Job(
+        id=uuid.uuid4().hex,
+        tool_id=str(tool_id),
+        status=JobStatus.queued,
+        created_at=now,
+        updated_at=now
+    ))
+
+    task = asyncio.create_task(_run_job(job.id, str(tool_id), request_inputs_dict))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+
+    logger.info(f"Submitted job {job.id} for {tool_id}")
+    return job
+
+def get_job(job_id: str) -> Job:
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _format_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def job_events(job_id: str, poll_interval: float = 0.5, timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Yields server-sent events for a job until it finishes.
+
+    Emits a `status` event whenever the status changes, a `progress` event for each new
+    progress message and a final `result` event carrying the finished job. After `timeout`
+    seconds (JOB_EVENTS_TIMEOUT, default 900) the stream ends with an `error` event instead.
+    """
+    if timeout is None:
+        timeout = float(os.environ.get("JOB_EVENTS_TIMEOUT", DEFAULT_EVENTS_TIMEOUT))
+    deadline = time.monotonic() + timeout
+    last_status = None
+    sent_progress = 0
+
+    while True:
+        # The store may read from disk, keep that off the event loop
+        job = await run_in_threadpool(get_job_store().get, job_id)
+        if job is None:
+            yield _format_event("error", {"status": 404, "message": "Job not found"})
+            return
+
+        for message in job.progress[sent_progress:]:
+            yield _format_event("progress", {"message": message})
+        sent_progress = len(job.progress)
+
+        if job.status != last_status:
+            last_status = job.status
+            yield _format_event("status", {"status": job.status})
+
+        if job.status in TERMINAL_STATUSES:
+            yield _format_event("result", job)
+            return
+
+        if time.monotonic() >= deadline:
+            yield _format_event("error", {"status": 504, "message": f"Job is still {job.status.value}, poll /jobs/{job_id} for its result"})
+            return
+
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,428 @@
+"""
+Ledger of every Gemini call the service makes, kept in a local SQLite database.
+
+LangChain calls (tool chains, `build_chain`, the image model) are recorded by a callback
+handler registered as a configure hook; calls made with the Gemini SDK directly go through
+`llm_call`. Summaries per tool or model are printed with:
+
+    python -m app.services.llm_ledger report --hours 24
+    python -m app.services.llm_ledger report --by model --db /tmp/marvel-ai-llm-ledger.sqlite3
+"""
+import argparse
+import atexit
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from app.services.logger import setup_logger
+from app.services.request_context import current_request_id, current_tool_id
+from app.services.tracing import count_event
+
+logger = setup_logger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join(tempfile.gettempdir(), "marvel-ai-llm-ledger.sqlite3")
+DEFAULT_RETENTION_HOURS = 72
+DEFAULT_MAX_ROWS = 100_000
+DEFAULT_FLUSH_INTERVAL = 1.0
+PRUNE_INTERVAL = 300
+
+# List prices in USD per million (prompt, output) tokens, used for the cost estimates of the report
+MODEL_PRICES = {
+    "gemini-1.0-pro": (0.50, 1.50),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+}
+
+def estimate_tokens(text: str) -> int:
+    # Gemini averages about four characters per token for English text
+    return math.ceil(len(text) / 4)
+
+class LLMLedger:
+    """
+    Appends one row per LLM call. Safe to use from several worker threads.
+
+    Rows are buffered and written in batches by a background thread every `flush_interval`
+    seconds, so an LLM call never waits for a commit. Rows older than `retention_hours` and
+    all but the newest `max_rows` are pruned as batches are written.
+    """
+    def __init__(self, path: str, retention_hours: float = DEFAULT_RETENTION_HOURS, max_rows: int = DEFAULT_MAX_ROWS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.retention_hours = retention_hours
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._last_prune = 0.0
+        self._flusher: Optional[threading.Thread] = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_calls ("
+            "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, tool_id TEXT NOT NULL, request_id TEXT, model TEXT NOT NULL, "
+            "prompt_tokens INTEGER NOT NULL, output_tokens INTEGER NOT NULL, tokens_estimated INTEGER NOT NULL, "
+            "latency REAL NOT NULL, attempt INTEGER NOT NULL, outcome TEXT NOT NULL, error TEXT)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS llm_calls_created_at ON llm_calls (created_at)")
+        self._connection.commit()
+
+    def record(self, tool_id: str, model: str, prompt_tokens: int, output_tokens: int, latency: float,
+               attempt: int = 1, outcome: str = "success", error: Optional[str] = None,
+               tokens_estimated: bool = True, request_id: Optional[str] = None, created_at: Optional[float] = None):
+        row = (created_at or time.time(), tool_id, request_id, model, prompt_tokens, output_tokens, int(tokens_estimated), latency, attempt, outcome, error)
+        with self._lock:
+            self._pending.append(row)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="llm-ledger-writer", daemon=True)
+                self._flusher.start()
+                atexit.register(self._flush_logging_errors)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush_logging_errors()
+
+    def _flush_logging_errors(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write LLM calls to the ledger: {e}")
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                self._connection.executemany(
+                    "INSERT INTO llm_calls (created_at, tool_id, request_id, model, prompt_tokens, output_tokens, tokens_estimated, latency, attempt, outcome, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    pending
+                )
+            if time.time() - self._last_prune > PRUNE_INTERVAL:
+                self._prune()
+            self._connection.commit()
+
+    def _prune(self):
+        # Called with the lock held
+        self._last_prune = time.time()
+        if self.retention_hours > 0:
+            self._connection.execute("DELETE FROM llm_calls WHERE created_at < ?", (time.time() - self.retention_hours * 3600,))
+        if self.max_rows > 0:
+            self._connection.execute(
+                "DELETE FROM llm_calls WHERE id <= (SELECT MAX(id) FROM llm_calls) - ?", (self.max_rows,)
+            )
+
+    def rows(self, since: float = 0) -> List[sqlite3.Row]:
+        self.flush()
+        with self._lock:
+            self._connection.row_factory = sqlite3.Row
+            try:
+                return self._connection.execute("SELECT * FROM llm_calls WHERE created_at >= ? ORDER BY id", (since,)).fetchall()
+            finally:
+                self._connection.row_factory = None
+
+_ledger: Optional[LLMLedger] = None
+_ledger_disabled = False
+_ledger_lock = threading.Lock()
+
+def get_llm_ledger() -> Optional[LLMLedger]:
+    """
+    Ledger of the process, opened on first use at LLM_LEDGER_PATH and keeping the calls of the
+    last LLM_LEDGER_RETENTION_HOURS, at most LLM_LEDGER_MAX_ROWS of them. An empty
+    LLM_LEDGER_PATH disables the ledger; so does a path that cannot be opened, which is logged once.
+    """
+    global _ledger, _ledger_disabled
+    with _ledger_lock:
+        if _ledger is None and not _ledger_disabled:
+            path = os.environ.get("LLM_LEDGER_PATH", DEFAULT_LEDGER_PATH)
+            try:
+                _ledger = LLMLedger(
+                    path,
+                    retention_hours=float(os.environ.get("LLM_LEDGER_RETENTION_HOURS", DEFAULT_RETENTION_HOURS)),
+                    max_rows=int(os.environ.get("LLM_LEDGER_MAX_ROWS", DEFAULT_MAX_ROWS))
+                ) if path else None
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"LLM ledger disabled, cannot open {path}: {e}")
+            _ledger_disabled = _ledger is None
+        return _ledger
+
+# Failed calls per prompt during one tool execution, used to number retries
+current_attempts: ContextVar[Optional[Dict[str, int]]] = ContextVar("current_llm_attempts", default=None)
+
+def start_attempt_counting():
+    """Starts numbering LLM attempts afresh; called at the start of every tool execution."""
+    current_attempts.set({})
+
+def prompt_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+def next_attempt(model: str, prompt: str) -> int:
+    """
+    Attempt number of a call: one more than the failed calls with the same prompt since it
+    last succeeded. Tools that send one prompt several times on purpose (a quiz asks for
+    each question with the same prompt) are not counted as retrying; their own retry loops
+    number their attempts with `tool_attempt`.
+    """
+    failures = current_attempts.get()
+    if failures is None:
+        return 1
+    attempt = failures.get(prompt_key(model, prompt), 0) + 1
+    if attempt > 1:
+        count_event("llm_reattempts")
+    return attempt
+
+def record_outcome(failures: Optional[Dict[str, int]], model: str, prompt: str, failed: bool):
+    if failures is None:
+        return
+    key = prompt_key(model, prompt)
+    if failed:
+        failures[key] = failures.get(key, 0) + 1
+    else:
+        failures.pop(key, None)
+
+class ToolAttempt:
+    """LLM calls made during one pass of a tool's retry loop; see `tool_attempt`."""
+    def __init__(self, number: int):
+        self.number = number
+        self.rejection: Optional[str] = None
+        self._lock = threading.Lock()
+        self._rows: List[Dict[str, Any]] = []
+
+    def reject(self, reason: str):
+        """Marks the output of this attempt as unusable, e.g. it failed the tool's validation."""
+        self.rejection = reason
+
+    def add(self, row: Dict[str, Any]):
+        with self._lock:
+            self._rows.append(row)
+
+    def write(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        for row in rows:
+            if self.rejection is not None and row["outcome"] == "success":
+                row.update(outcome="rejected", error=self.rejection)
+            _write(**row)
+
+current_tool_attempt: ContextVar[Optional[ToolAttempt]] = ContextVar("current_tool_attempt", default=None)
+
+@contextmanager
+def tool_attempt(number: int) -> Iterator[ToolAttempt]:
+    """
+    Numbers the LLM calls made in the block as attempt `number` of a tool's own retry loop.
+    Their rows are written when the block ends: a call whose output the tool rejected, with
+    `reject` or by raising (a parser error), is recorded with the outcome "rejected".
+    """
+    attempt = ToolAttempt(number)
+    token = current_tool_attempt.set(attempt)
+    try:
+        yield attempt
+    except Exception as e:
+        attempt.reject(type(e).__name__)
+        raise
+    finally:
+        current_tool_attempt.reset(token)
+        attempt.write()
+
+def start_call(model: str, prompt: str) -> Tuple[int, Optional[Dict[str, int]], Optional[ToolAttempt]]:
+    """Attempt number of a call starting now, the failures to update when it ends and the tool attempt it belongs to."""
+    scope = current_tool_attempt.get()
+    if scope is not None:
+        # The tool's loop numbers the attempts; counting failed prompts too would count each retry twice
+        if scope.number > 1:
+            count_event("llm_reattempts")
+        return scope.number, None, scope
+    return next_attempt(model, prompt), current_attempts.get(), None
+
+def _record(tool_id: str, model: str, prompt: str, output: Optional[str], started: float, attempt: int,
+            error: Optional[BaseException] = None, usage: Optional[Tuple[int, int]] = None, request_id: Optional[str] = None,
+            scope: Optional[ToolAttempt] = None):
+    prompt_tokens, output_tokens = usage or (estimate_tokens(prompt), estimate_tokens(output or ""))
+    row = dict(
+        tool_id=tool_id, model=model, prompt_tokens=prompt_tokens, output_tokens=output_tokens,
+        latency=time.perf_counter() - started, attempt=attempt, outcome="error" if error else "success",
+        error=type(error).__name__ if error else None, tokens_estimated=usage is None, request_id=request_id,
+        created_at=time.time()
+    )
+    if scope is not None:
+        scope.add(row)
+    else:
+        _write(**row)
+
+def _write(**row):
+    ledger = get_llm_ledger()
+    if ledger is None:
+        return
+    try:
+        ledger.record(**row)
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to record LLM call in the ledger: {e}")
+
+class LedgerCallbackHandler(BaseCallbackHandler):
+    """Records the LangChain LLM and chat model calls made anywhere in the process."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, List[Any]] = {}
+
+    def _start(self, run_id: UUID, prompt: str, serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]):
+        metadata = kwargs.get("metadata") or {}
+        params = kwargs.get("invocation_params") or {}
+        model = metadata.get("ls_model_name") or params.get("model") or params.get("_type") or (serialized or {}).get("name") or "unknown"
+        model = str(model).removeprefix("models/")
+        tool_id = current_tool_id.get() or "-"
+        attempt, failures, scope = start_call(model, prompt)
+        with self._lock:
+            self._started[run_id] = [time.perf_counter(), tool_id, model, prompt, current_request_id.get(), attempt, failures, scope]
+
+    def _end(self, run_id: UUID, output: Optional[str] = None, usage: Optional[Tuple[int, int]] = None, error: Optional[BaseException] = None):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, tool_id, model, prompt, request_id, attempt, failures, scope = started
+        record_outcome(failures, model, prompt, error is not None)
+        _record(tool_id, model, prompt, output, start, attempt, error=error, usage=usage, request_id=request_id, scope=scope)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs: Any):
+        # A model client retrying inside one run: the row recorded at the end is its last attempt
+        with self._lock:
+            started = self._started.get(run_id)
+            if started is not None:
+                started[5] += 1
+        if started is not None:
+            count_event("llm_reattempts")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any):
+        self._start(run_id, "\n".join(prompts), serialized, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any):
+        prompt = "\n".join(str(message.content) for batch in messages for message in batch)
+        self._start(run_id, prompt, serialized, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any):
+        generations = [generation for batch in response.generations for generation in batch]
+        output = "".join(generation.text for generation in generations)
+
+        usage = None
+        usage_metadata = [getattr(getattr(generation, "message", None), "usage_metadata", None) for generation in generations]
+        if usage_metadata and all(usage_metadata):
+            usage = (sum(u["input_tokens"] for u in usage_metadata), sum(u["output_tokens"] for u in usage_metadata))
+        self._end(run_id, output, usage)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any):
+        self._end(run_id, error=error)
+
+ledger_callback_handler = LedgerCallbackHandler()
+
+# Set by default, so every chain reports to the ledger without being passed the handler
+ledger_handler_var: ContextVar[Optional[LedgerCallbackHandler]] = ContextVar("llm_ledger_handler", default=ledger_callback_handler)
+register_configure_hook(ledger_handler_var, inheritable=True)
+
+class LLMCall:
+    def __init__(self):
+        self.output: Optional[str] = None
+        self.usage: Optional[Tuple[int, int]] = None
+
+    def finish(self, output: str, prompt_tokens: Optional[int] = None, output_tokens: Optional[int] = None):
+        self.output = output
+        if prompt_tokens is not None and output_tokens is not None:
+            self.usage = (prompt_tokens, output_tokens)
+
+@contextmanager
+def llm_call(model: str, prompt: str, tool_id: Optional[str] = None) -> Iterator[LLMCall]:
+    """Records a call made without LangChain; the block reports the output with `finish`."""
+    call = LLMCall()
+    start = time.perf_counter()
+    attempt, failures, scope = start_call(model, prompt)
+    try:
+        yield call
+    except Exception as e:
+        record_outcome(failures, model, prompt, True)
+        _record(tool_id or current_tool_id.get() or "-", model, prompt, None, start, attempt, error=e, request_id=current_request_id.get(), scope=scope)
+        raise
+    else:
+        record_outcome(failures, model, prompt, False)
+        _record(tool_id or current_tool_id.get() or "-", model, prompt, call.output, start, attempt, usage=call.usage, request_id=current_request_id.get(), scope=scope)
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(rows: List[sqlite3.Row], by: str = "tool_id") -> List[Dict[str, Any]]:
+    """Calls, calls per request, retries, errors, rejections, tokens, estimated cost and latency percentiles per `by` column."""
+    groups: Dict[str, List[sqlite3.Row]] = {}
+    for row in rows:
+        groups.setdefault(row[by], []).append(row)
+
+    summary = []
+    for name, group in sorted(groups.items()):
+        latencies = [row["latency"] for row in group]
+        cost = 0.0
+        for row in group:
+            prompt_price, output_price = MODEL_PRICES.get(row["model"], (0.0, 0.0))
+            cost += (row["prompt_tokens"] * prompt_price + row["output_tokens"] * output_price) / 1_000_000
+        # Calls made outside a request (warmup, scripts) count as one request each
+        requests = len({row["request_id"] or f"row-{row['id']}" for row in group})
+        summary.append({
+            by: name,
+            "calls": len(group),
+            "calls_per_request": len(group) / requests,
+            "retries": sum(1 for row in group if row["attempt"] > 1),
+            "errors": sum(1 for row in group if row["outcome"] == "error"),
+            "rejected": sum(1 for row in group if row["outcome"] == "rejected"),
+            "prompt_tokens": sum(row["prompt_tokens"] for row in group),
+            "output_tokens": sum(row["output_tokens"] for row in group),
+            "cost_usd": cost,
+            "p50_seconds": percentile(latencies, 0.5),
+            "p95_seconds": percentile(latencies, 0.95),
+            "max_seconds": max(latencies),
+        })
+    return summary
+
+def format_report(summary: List[Dict[str, Any]], by: str) -> str:
+    header = f"{by:<40} {'calls':>7} {'calls/req':>9} {'retries':>8} {'errors':>7} {'rejected':>8} {'prompt tok':>11} {'output tok':>11} {'cost $':>9} {'p50 s':>7} {'p95 s':>7} {'max s':>7}"
+    lines = [header, "-" * len(header)]
+    for entry in summary:
+        lines.append(
+            f"{str(entry[by]):<40} {entry['calls']:>7} {entry['calls_per_request']:>9.1f} {entry['retries']:>8} {entry['errors']:>7} "
+            f"{entry['rejected']:>8} {entry['prompt_tokens']:>11} "
+            f"{entry['output_tokens']:>11} {entry['cost_usd']:>9.4f} {entry['p50_seconds']:>7.2f} {entry['p95_seconds']:>7.2f} {entry['max_seconds']:>7.2f}"
+        )
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Report LLM calls recorded in the ledger")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report = subparsers.add_parser("report", help="cost and latency per tool or model")
+    report.add_argument("--db", default=os.environ.get("LLM_LEDGER_PATH") or DEFAULT_LEDGER_PATH)
+    report.add_argument("--by", choices=["tool_id", "model"], default="tool_id")
+    report.add_argument("--hours", type=float, default=None, help="only calls from the last N hours")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"no ledger at {args.db}")
+
+    since = time.time() - args.hours * 3600 if args.hours else 0
+    rows = LLMLedger(args.db).rows(since)
+    if not rows:
+        print("No LLM calls recorded")
+        return
+    print(format_report(summarize(rows, args.by), args.by))
+    print("\nToken counts are estimated from text length where the model did not report usage; costs use list prices.")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,180 @@
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from app.services.request_context import request_context
 
 # Global variable to track logger configuration state
 logger_configured = False
 
+# Default level per ENV_TYPE; LOG_LEVEL overrides it
+ENV_LOG_LEVELS = {"dev": "DEBUG", "sandbox": "INFO", "production": "INFO"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the field names Cloud Logging picks up from stdout/stderr."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("request_id", "user_id", "tool_id"):
+            value = getattr(record, field, None)
+            if value:
+                entry[field] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(request_tag)s%(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        tags = [value for value in (getattr(record, "request_id", None), getattr(record, "tool_id", None)) if value]
+        record.request_tag = f"[{' '.join(tags)}] " if tags else ""
+        return super().format(record)
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request id, user and tool of the context they are logged in."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field, value in request_context().as_dict().items():
+            if not hasattr(record, field):
+                setattr(record, field, value)
+        return True
+
+class DebugSampler:
+    """
+    Lets `per_second` debug records through in each one second window and one in
+    `sample_every` of the rest, so chatty debug logging cannot flood the pipeline under load.
+    """
+    def __init__(self, per_second: int, sample_every: int):
+        self.per_second = per_second
+        self.sample_every = max(sample_every, 1)
+        self._lock = threading.Lock()
+        self._window = 0
+        self._seen = 0
+        self._dropped = 0
+
+    def allow(self, now: float):
+        """Returns whether the record passes and how many were dropped in the previous window."""
+        window = int(now)
+        with self._lock:
+            dropped = 0
+            if window != self._window:
+                dropped, self._dropped = self._dropped, 0
+                self._window, self._seen = window, 0
+            self._seen += 1
+            over = self._seen - self.per_second
+            allowed = over <= 0 or over % self.sample_every == 0
+            if not allowed:
+                self._dropped += 1
+            return allowed, dropped
+
+class AsyncLogHandler(QueueHandler):
+    """
+    Hands records to a background listener through a bounded queue.
+
+    The calling thread only formats and truncates the message and captures the request context;
+    writing happens on the listener thread. When the queue is full records are dropped and
+    counted instead of blocking the request.
+    """
+    def __init__(self, log_queue: queue.Queue, max_chars: int = 4000, sampler: Optional[DebugSampler] = None):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+        self.sampler = sampler
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"dropped_queue_full": 0, "sampled_out": 0}
+        # Runs in the calling thread, where the request context is still available
+        self.addFilter(RequestContextFilter())
+
+    def emit(self, record: logging.LogRecord):
+        if self.sampler is not None and record.levelno <= logging.DEBUG:
+            allowed, dropped = self.sampler.allow(record.created)
+            if dropped:
+                self.enqueue(self._sampling_notice(dropped))
+            if not allowed:
+                with self._lock:
+                    self.stats["sampled_out"] += 1
+                return
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def _sampling_notice(self, dropped: int) -> logging.LogRecord:
+        notice = logging.LogRecord(__name__, logging.WARNING, __file__, 0, f"Sampled out {dropped} debug log records in the last second", None, None)
+        notice.request_id = None
+        return notice
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        if len(message) > self.max_chars:
+            message = f"{message[:self.max_chars]}... [truncated {len(message) - self.max_chars} chars]"
+
+        record = copy.copy(record)
+        record.msg = message
+        record.args = None
+        if record.exc_info:
+            # Tracebacks are rendered here, the frames are gone once the listener sees the record
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped_queue_full"] += 1
+
+_handler: Optional[AsyncLogHandler] = None
+_listener: Optional[QueueListener] = None
+_handler_lock = threading.Lock()
+
+def log_level() -> int:
+    env_type = os.environ.get('ENV_TYPE', 'undefined')
+    level = logging.getLevelName((os.environ.get("LOG_LEVEL") or ENV_LOG_LEVELS.get(env_type, "DEBUG")).upper())
+    # getLevelName returns a string for unknown names
+    return level if isinstance(level, int) else logging.INFO
+
+def create_formatter() -> logging.Formatter:
+    env_type = os.environ.get('ENV_TYPE', 'undefined')
+    log_format = os.environ.get("LOG_FORMAT") or ("json" if env_type in ("sandbox", "production") else "text")
+    return JsonFormatter() if log_format == "json" else TextFormatter()
+
+def get_log_handler() -> AsyncLogHandler:
+    """Shared queue handler of the process; starts the listener thread on first use."""
+    global _handler, _listener
+    with _handler_lock:
+        if _handler is None:
+            log_queue = queue.Queue(maxsize=int(os.environ.get("LOG_QUEUE_SIZE", 10000)))
+            sampler = DebugSampler(int(os.environ.get("LOG_DEBUG_PER_SECOND", 200)), int(os.environ.get("LOG_DEBUG_SAMPLE_EVERY", 10)))
+            _handler = AsyncLogHandler(log_queue, int(os.environ.get("LOG_MAX_CHARS", 4000)), sampler)
+
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(create_formatter())
+            _listener = QueueListener(log_queue, stream_handler)
+            _listener.start()
+            # Flushes the records still queued when the process exits
+            atexit.register(_listener.stop)
+        return _handler
+
 def setup_logger(name=__name__):
     """
     Sets up a logger based on the environment.
 
-    If the environment variable ENV_TYPE is set to 'sandbox' or 'production', it configures
-    Google Cloud Logging. Otherwise, it uses the standard logging.
+    Records go through a bounded queue to a single background writer. The level comes from
+    LOG_LEVEL or, failing that, ENV_TYPE (DEBUG in dev, INFO in sandbox and production);
+    sandbox and production write JSON lines that Cloud Logging parses.
 
     Parameters:
     name (str): The name of the logger.
@@ -18,19 +183,15 @@ def setup_logger(name=__name__):
     logging.Logger: Configured logger.
     """
     global logger_configured
-    env_type = os.environ.get('ENV_TYPE', 'undefined')
-    project = os.environ.get('PROJECT_ID', 'undefined')
 
     # Obtain a reference to the logger
     logger = logging.getLogger(name)
-    
+
     # Check if the logger is already configured
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.DEBUG)
+        logger.addHandler(get_log_handler())
+        logger.setLevel(log_level())
         logger.propagate = True
+        logger_configured = True
 
     return logger
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from anyio import to_thread
+from app.services.logger import setup_logger
+from app.services.metrics import EVENT_LOOP_LAG_SECONDS, PROCESS_THREADS, THREADPOOL_ACTIVE, THREADPOOL_LIMIT, THREADPOOL_WAITING
+
+logger = setup_logger(__name__)
+
+DEFAULT_INTERVAL = 0.5
+DEFAULT_WARN_SECONDS = 0.2
+# At most one lag warning per this many seconds, a blocked loop would otherwise log on every tick
+WARN_EVERY_SECONDS = 10
+
+class LoopMonitor:
+    """
+    Measures how late the event loop runs a callback scheduled `interval` seconds ahead.
+
+    Lag means something is running on the loop thread instead of a worker: a blocking call
+    in an async handler holds up every other request. Each tick also samples the thread
+    pool behind `run_in_threadpool` and sync endpoints, which is where that work should go.
+    """
+    def __init__(self, interval: float = DEFAULT_INTERVAL, warn_seconds: float = DEFAULT_WARN_SECONDS):
+        self.interval = interval
+        self.warn_seconds = warn_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._last_warning = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.threadpool: Dict[str, int] = {"active": 0, "limit": 0, "waiting": 0}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.observe(max(loop.time() - expected, 0.0))
+
+    def sample_threadpool(self):
+        # Must run on the loop, the limiter belongs to it
+        limiter = to_thread.current_default_thread_limiter()
+        statistics = limiter.statistics()
+        self.threadpool = {
+            "active": statistics.borrowed_tokens,
+            "limit": int(statistics.total_tokens),
+            "waiting": statistics.tasks_waiting,
+        }
+        THREADPOOL_ACTIVE.set(self.threadpool["active"])
+        THREADPOOL_LIMIT.set(self.threadpool["limit"])
+        THREADPOOL_WAITING.set(self.threadpool["waiting"])
+        PROCESS_THREADS.set(threading.active_count())
+
+    def observe(self, lag: float):
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        self.sample_threadpool()
+
+        now = time.monotonic()
+        if lag > self.warn_seconds and now - self._last_warning >= WARN_EVERY_SECONDS:
+            self._last_warning = now
+            logger.warning(
+                f"Event loop lagged {lag * 1000:.0f}ms (threshold {self.warn_seconds * 1000:.0f}ms); "
+                f"threadpool {self.threadpool['active']}/{self.threadpool['limit']} busy, {self.threadpool['waiting']} waiting"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"last_lag_seconds": self.last_lag, "max_lag_seconds": self.max_lag, "threadpool": dict(self.threadpool)}
+
+def create_loop_monitor() -> LoopMonitor:
+    return LoopMonitor(
+        interval=float(os.environ.get("LOOP_LAG_INTERVAL", DEFAULT_INTERVAL)),
+        warn_seconds=float(os.environ.get("LOOP_LAG_WARN_SECONDS", DEFAULT_WARN_SECONDS))
+    )
+
+loop_monitor = create_loop_monitor()
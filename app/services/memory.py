@@ -0,0 +1,218 @@
+import asyncio
+import os
+import resource
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from app.services.downloads import known_size
+from app.services.logger import setup_logger
+from app.services.metrics import MEMORY_ADMISSION, REQUEST_MEMORY_PEAK_BYTES
+from app.utils.allowed_file_extensions import FileType
+
+logger = setup_logger(__name__)
+
+DEFAULT_SAMPLE_INTERVAL = 0.2
+# Peaks kept per tool and file type for the prediction
+HISTORY_SIZE = 50
+MIN_HISTORY = 3
+ADMISSION_POLL_SECONDS = 0.5
+# Assumed peak of a tool without enough history, so a cold instance does not admit everything
+DEFAULT_COLD_PREDICTION_MB = 100
+# ... plus this many times the size of its files: parsing and splitting a document takes several copies of it
+COLD_BYTES_FACTOR = 8
+
+FILE_TYPES = {file_type.value for file_type in FileType}
+
+def current_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+def request_file_type(inputs: Dict[str, Any]) -> str:
+    """File type label of a request: the type of its documents, "mixed" or "none"."""
+    file_types = {
+        str(value).lower() for name, value in inputs.items()
+        if name.endswith("file_type") and str(value).lower() in FILE_TYPES
+    }
+    if not file_types:
+        return "none"
+    return file_types.pop() if len(file_types) == 1 else "mixed"
+
+def request_input_bytes(inputs: Dict[str, Any]) -> Optional[int]:
+    """Total size of the request's files, as far as the download layer already knows them."""
+    sizes = [
+        known_size(str(value)) for name, value in inputs.items()
+        if name.endswith("file_url") and value
+    ]
+    sizes = [size for size in sizes if size is not None]
+    return sum(sizes) if sizes else None
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class MemoryUsage:
+    def __init__(self, tool_id: str, file_type: str, rss: int, inputs: Dict[str, Any]):
+        self.tool_id = tool_id
+        self.file_type = file_type
+        self.inputs = inputs
+        self.start_rss = rss
+        self.peak_rss = rss
+
+    @property
+    def peak_delta(self) -> int:
+        return max(self.peak_rss - self.start_rss, 0)
+
+class MemoryTracker:
+    """
+    Tracks the peak RSS growth of each running tool request by sampling the process RSS.
+
+    Requests share the process, so a peak also includes what concurrent requests allocated
+    at the time; with one request per worker most of the time it is a close estimate and,
+    unlike tracemalloc, costs nothing on the allocation path.
+    """
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, cold_prediction: int = DEFAULT_COLD_PREDICTION_MB * 1024 * 1024):
+        self.interval = interval
+        self.cold_prediction = cold_prediction
+        self._lock = threading.Lock()
+        self._active: Set[MemoryUsage] = set()
+        # (peak growth, size of the request's files or None) of recent requests
+        self._history: Dict[Tuple[str, str], Deque[Tuple[int, Optional[int]]]] = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_sampler(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self.sample()
+            time.sleep(self.interval)
+
+    def sample(self):
+        rss = current_rss()
+        if rss is None:
+            return
+        with self._lock:
+            for usage in self._active:
+                usage.peak_rss = max(usage.peak_rss, rss)
+            if not self._active:
+                self._wake.clear()
+
+    def start(self, tool_id, inputs: Dict[str, Any]) -> Optional[MemoryUsage]:
+        rss = current_rss()
+        if rss is None:
+            return None
+        usage = MemoryUsage(str(tool_id), request_file_type(inputs), rss, inputs)
+        with self._lock:
+            self._active.add(usage)
+            self._ensure_sampler()
+            self._wake.set()
+        return usage
+
+    def finish(self, usage: Optional[MemoryUsage]) -> Optional[int]:
+        if usage is None:
+            return None
+        # A last sample so short requests are measured too
+        self.sample()
+        # Read now, the files were downloaded while the request ran
+        input_bytes = request_input_bytes(usage.inputs)
+        with self._lock:
+            self._active.discard(usage)
+            self._history[(usage.tool_id, usage.file_type)].append((usage.peak_delta, input_bytes))
+        REQUEST_MEMORY_PEAK_BYTES.labels(usage.tool_id, usage.file_type).observe(usage.peak_delta)
+        return usage.peak_delta
+
+    def predict(self, tool_id, file_type: str, input_bytes: Optional[int] = None) -> int:
+        """
+        Predicted peak growth of a request of the tool with this file type and `input_bytes` of files.
+
+        With a few recent peaks it is their 90th percentile or, when the size of the files is
+        known, the 90th percentile of peak per byte times that size, but not less than a typical
+        request. Without enough history it is the conservative `cold_prediction` plus
+        COLD_BYTES_FACTOR times the size of the files.
+        """
+        with self._lock:
+            history = list(self._history.get((str(tool_id), file_type), ()))
+        if len(history) < MIN_HISTORY:
+            return self.cold_prediction + COLD_BYTES_FACTOR * (input_bytes or 0)
+
+        peaks = [peak for peak, _ in history]
+        ratios = [peak / size for peak, size in history if size]
+        if input_bytes and len(ratios) >= MIN_HISTORY:
+            return max(int(percentile(peaks, 0.5)), int(percentile(ratios, 0.9) * input_bytes))
+        return int(percentile(peaks, 0.9))
+
+class MemoryGuard:
+    """
+    Soft memory limit for tool requests.
+
+    A request whose predicted peak on top of the current RSS would cross `soft_limit` waits
+    up to `wait_seconds` for running requests to release memory ("wait", the default) or is
+    refused straight away ("reject"). The prediction scales with the size of the request's
+    files where the download layer knows it, and is a conservative default for tools without
+    history.
+    """
+    def __init__(self, tracker: MemoryTracker, soft_limit: Optional[int] = None, action: str = "wait", wait_seconds: float = 30):
+        self.tracker = tracker
+        self.soft_limit = soft_limit
+        self.action = action
+        self.wait_seconds = wait_seconds
+
+    def fits(self, tool_id, inputs: Dict[str, Any]) -> bool:
+        if not self.soft_limit:
+            return True
+        rss = current_rss()
+        if rss is None:
+            return True
+        predicted = self.tracker.predict(tool_id, request_file_type(inputs), request_input_bytes(inputs))
+        return rss + predicted <= self.soft_limit
+
+    def _reject(self, tool_id):
+        MEMORY_ADMISSION.labels(str(tool_id), "rejected").inc()
+        logger.warning(f"Rejected {tool_id} request: predicted memory use exceeds the soft limit")
+        raise HTTPException(status_code=503, detail="Server is low on memory, please retry later")
+
+    def check(self, tool_id, inputs: Dict[str, Any]):
+        """Non-waiting admission, for callers that cannot wait (streams)."""
+        if not self.fits(tool_id, inputs):
+            self._reject(tool_id)
+
+    async def admit(self, tool_id, inputs: Dict[str, Any]):
+        if self.fits(tool_id, inputs):
+            return
+        if self.action == "reject":
+            self._reject(tool_id)
+
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(ADMISSION_POLL_SECONDS)
+            if self.fits(tool_id, inputs):
+                MEMORY_ADMISSION.labels(str(tool_id), "delayed").inc()
+                return
+        self._reject(tool_id)
+
+memory_tracker = MemoryTracker(
+    float(os.environ.get("MEMORY_SAMPLE_INTERVAL", DEFAULT_SAMPLE_INTERVAL)),
+    cold_prediction=int(float(os.environ.get("MEMORY_COLD_PREDICTION_MB", DEFAULT_COLD_PREDICTION_MB)) * 1024 * 1024)
+)
+
+def create_memory_guard() -> MemoryGuard:
+    """MEMORY_SOFT_LIMIT_MB enables the limit; MEMORY_LIMIT_ACTION is "wait" or "reject"."""
+    soft_limit_mb = os.environ.get("MEMORY_SOFT_LIMIT_MB")
+    return MemoryGuard(
+        memory_tracker,
+        soft_limit=int(float(soft_limit_mb) * 1024 * 1024) if soft_limit_mb else None,
+        action=os.environ.get("MEMORY_LIMIT_ACTION", "wait").lower(),
+        wait_seconds=float(os.environ.get("MEMORY_LIMIT_WAIT_SECONDS", 30))
+    )
+
+memory_guard = create_memory_guard()
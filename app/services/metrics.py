@@ -0,0 +1,149 @@
+import time
+from typing import Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.services.logger import setup_logger
+from app.services.tracing import Trace
+
+logger = setup_logger(__name__)
+
+# Tool pipelines take seconds to minutes, the default buckets stop at 10s
+TOOL_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+LOADER_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, float("inf"))
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2000)) + (float("inf"),)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float("inf"))
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to produce the response headers", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+TOOL_EXECUTION_SECONDS = Histogram(
+    "tool_execution_duration_seconds", "Tool execution time including the wait for a worker", ["tool_id", "outcome"], buckets=TOOL_BUCKETS
+)
+TOOL_ERRORS = Counter(
+    "tool_errors_total", "Failed tool executions by exception class and original cause", ["tool_id", "exception", "cause"]
+)
+LOADER_SECONDS = Histogram(
+    "document_loader_duration_seconds", "Time to load and split a document", ["file_type", "outcome"], buckets=LOADER_BUCKETS
+)
+LLM_CALLS_PER_REQUEST = Histogram(
+    "llm_calls_per_request", "LLM calls made while handling one request", ["route"], buckets=COUNT_BUCKETS
+)
+LLM_RETRIES_PER_REQUEST = Histogram(
+    "llm_retries_per_request", "LLM call retries while handling one request", ["route"], buckets=COUNT_BUCKETS
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "Delay of the event loop in running a scheduled callback", buckets=LAG_BUCKETS
+)
+THREADPOOL_ACTIVE = Gauge(
+    "threadpool_active", "Threads busy in the pool that runs sync endpoints and run_in_threadpool"
+)
+THREADPOOL_LIMIT = Gauge(
+    "threadpool_limit", "Size of the pool that runs sync endpoints and run_in_threadpool"
+)
+THREADPOOL_WAITING = Gauge(
+    "threadpool_waiting", "Calls waiting for a thread of the pool that runs sync endpoints"
+)
+PROCESS_THREADS = Gauge(
+    "process_threads", "Threads alive in the process, including per-call executors of the tools"
+)
+
+REQUEST_MEMORY_PEAK_BYTES = Histogram(
+    "tool_request_memory_peak_bytes", "Peak RSS growth while a tool request ran", ["tool_id", "file_type"], buckets=MEMORY_BUCKETS
+)
+MEMORY_ADMISSION = Counter(
+    "tool_memory_admission_total", "Tool requests delayed or rejected by the memory soft limit", ["tool_id", "decision"]
+)
+
+DOWNLOAD_RETRIES = Counter(
+    "download_retries_total", "Document download attempts retried, by status code or connection error", ["reason"]
+)
+DOWNLOAD_CACHE_LOOKUPS = Counter(
+    "download_cache_lookups_total", "Document downloads by download cache result (hit, changed or miss)", ["result"]
+)
+NEGATIVE_CACHE_HITS = Counter(
+    "document_negative_cache_hits_total", "Document loads failed fast because the URL failed recently, by error class", ["error"]
+)
+
+def root_cause(error: BaseException) -> BaseException:
+    """Innermost exception of a chain; tools often re-raise a loader error as a generic one."""
+    seen = set()
+    while id(error) not in seen:
+        seen.add(id(error))
+        cause = error.__cause__ or error.__context__
+        if cause is None:
+            break
+        error = cause
+    return error
+
+def count_tool_error(tool_id, error: BaseException):
+    TOOL_ERRORS.labels(str(tool_id), type(error).__name__, type(root_cause(error)).__name__).inc()
+
+class LoaderTimer:
+    """Times a document load for `document_loader_duration_seconds`."""
+    def __init__(self, file_type: str):
+        self.file_type = file_type
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        outcome = "error" if exc_type else "success"
+        LOADER_SECONDS.labels(self.file_type, outcome).observe(time.perf_counter() - self.start)
+        return False
+
+def time_loader(file_type: str) -> LoaderTimer:
+    return LoaderTimer(str(file_type).lower())
+
+def observe_request(method: str, route: str, status: int, seconds: float, trace: Optional[Trace]):
+    HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+    if trace is not None:
+        summary = trace.summary()
+        LLM_CALLS_PER_REQUEST.labels(route).observe(summary.get("llm", (0, 0.0))[0])
+        LLM_RETRIES_PER_REQUEST.labels(route).observe(trace.events.get("llm_retry", 0))
+
+class ServiceStatsCollector:
+    """Exposes the counters the services already keep (worker pools, coalescing, result cache)."""
+    def collect(self) -> Iterator:
+        # Imported lazily, tool_execution pulls in the tool registry
+        from app.services.tool_execution import result_cache, tool_pool_stats
+
+        active = GaugeMetricFamily("tool_pool_active", "Tool executions running", labels=["tool_id"])
+        queued = GaugeMetricFamily("tool_pool_queued", "Tool executions waiting for a worker", labels=["tool_id"])
+        rejected = CounterMetricFamily("tool_pool_rejected", "Tool executions rejected because the pool was full", labels=["tool_id"])
+        coalesced = CounterMetricFamily("tool_requests_coalesced", "Requests that joined an identical execution in flight", labels=["tool_id"])
+
+        for tool_id, stats in tool_pool_stats().items():
+            active.add_metric([tool_id], stats["active"])
+            queued.add_metric([tool_id], stats["queued"])
+            rejected.add_metric([tool_id], stats["rejected"])
+            coalesced.add_metric([tool_id], stats["coalescing"]["coalesced"])
+
+        cache = CounterMetricFamily("tool_result_cache_lookups", "Result cache lookups by result", labels=["result"])
+        cache_stats = result_cache.stats()
+        for result in ("memory_hits", "disk_hits", "misses", "uncacheable", "bypassed"):
+            cache.add_metric([result], cache_stats[result])
+
+        hits = cache_stats["memory_hits"] + cache_stats["disk_hits"]
+        lookups = hits + cache_stats["misses"]
+        ratio = GaugeMetricFamily("tool_result_cache_hit_ratio", "Share of cacheable lookups served from the cache since startup")
+        ratio.add_metric([], hits / lookups if lookups else 0.0)
+
+        yield from (active, queued, rejected, coalesced, cache, ratio)
+
+_collector_registered = False
+
+def register_collectors():
+    global _collector_registered
+    if not _collector_registered:
+        REGISTRY.register(ServiceStatsCollector())
+        _collector_registered = True
+
+def render_metrics():
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
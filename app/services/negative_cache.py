@@ -0,0 +1,137 @@
+"""
+Short-lived memory of documents that failed to load.
+
+Clients retry a request whose document cannot be loaded (a private Google Drive link, a
+404, a YouTube video without transcripts) as if the failure were temporary, and every
+retry repeats the downloads and loader attempts before failing the same way. The negative
+cache remembers the error per URL and file type for a few minutes and raises it again
+straight away. Errors caused by a connection failure or a retryable status are not
+remembered, the next attempt may well succeed.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+import requests
+
+from app.api.error_utilities import FileHandlerError, VideoTranscriptError
+from app.services.http_client import RETRY_STATUSES
+from app.services.logger import setup_logger
+from app.services.metrics import NEGATIVE_CACHE_HITS
+from app.services.tracing import count_event
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+# Seconds a failure is remembered, by error class; subclasses without an entry use their base class's
+DEFAULT_NEGATIVE_CACHE_TTLS = {
+    "VideoTranscriptError": 300,
+    "FileHandlerError": 60,
+    # Raised as is by the summarization loaders
+    "HTTPError": 60,
+}
+DEFAULT_NEGATIVE_CACHE_ENTRIES = 1024
+
+CACHEABLE_ERRORS = (FileHandlerError, VideoTranscriptError, requests.HTTPError)
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """Reads `VideoTranscriptError=600,DownloadError=30` into {"VideoTranscriptError": 600, "DownloadError": 30}."""
+    ttls = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip():
+            ttls[name.strip()] = float(seconds)
+    return ttls
+
+def is_transient(error: BaseException) -> bool:
+    """Whether the error, or one it was raised from, is a connection failure or a retryable HTTP status."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        response = getattr(error, "response", None)
+        if isinstance(error, requests.HTTPError) and response is not None and response.status_code in RETRY_STATUSES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def replayable(error: BaseException) -> Callable[[], BaseException]:
+    """A factory of fresh copies of `error`; the original, with its traceback and locals, is not kept."""
+    cls = type(error)
+    if isinstance(error, requests.HTTPError):
+        args, response = error.args, error.response
+        return lambda: cls(*args, response=response)
+    message, url = error.message, error.url
+    return lambda: cls(message, url)
+
+class NegativeCache:
+    """Thread-safe LRU of load failures keyed by URL and file type, each with the TTL of its error class."""
+    def __init__(self, ttls: Dict[str, float], max_entries: int = DEFAULT_NEGATIVE_CACHE_ENTRIES):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Callable[[], BaseException]]]" = OrderedDict()
+
+    def ttl(self, error: BaseException) -> float:
+        for cls in type(error).__mro__:
+            if cls.__name__ in self.ttls:
+                return self.ttls[cls.__name__]
+        return 0
+
+    def call(self, url: str, file_type: str, load: Callable[[], T]) -> T:
+        """Runs `load`, unless loading `url` as `file_type` failed recently: then that error is raised again."""
+        key = (url, file_type.lower())
+        failure = self.get(key)
+        if failure is not None:
+            error = failure()
+            logger.info(f"Failing fast on {url}, it failed to load less than {self.ttl(error):g}s ago: {error}")
+            NEGATIVE_CACHE_HITS.labels(type(error).__name__).inc()
+            count_event("negative_cache_hits")
+            raise error
+
+        try:
+            return load()
+        except CACHEABLE_ERRORS as e:
+            ttl = self.ttl(e)
+            if ttl > 0 and not is_transient(e):
+                self.set(key, time.time() + ttl, replayable(e))
+            raise
+
+    def get(self, key: Tuple[str, str]) -> Optional[Callable[[], BaseException]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, failure = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            return failure
+
+    def set(self, key: Tuple[str, str], expires_at: float, failure: Callable[[], BaseException]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (expires_at, failure)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+def create_negative_cache() -> NegativeCache:
+    """Configured from NEGATIVE_CACHE_TTLS, overriding the default TTL of some error classes, and NEGATIVE_CACHE_ENTRIES."""
+    ttls = {**DEFAULT_NEGATIVE_CACHE_TTLS, **parse_ttls(os.getenv("NEGATIVE_CACHE_TTLS", ""))}
+    return NegativeCache(ttls, int(os.getenv("NEGATIVE_CACHE_ENTRIES", DEFAULT_NEGATIVE_CACHE_ENTRIES)))
+
+negative_cache = create_negative_cache()
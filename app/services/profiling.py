@@ -0,0 +1,165 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from fastapi import HTTPException, Request
+from app.services.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Value must match PROFILE_TOKEN; profiling is off while PROFILE_TOKEN is unset
+PROFILE_HEADER = "X-Profile"
+# "inline" returns the report instead of the result, anything else saves the profile
+PROFILE_OUTPUT_HEADER = "X-Profile-Output"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+DEFAULT_PROFILE_DIR = os.path.join(tempfile.gettempdir(), "marvel-ai-profiles")
+DEFAULT_MAX_PROFILES = 50
+VALID_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+def profile_dir() -> str:
+    return os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+
+class RequestProfile:
+    """cProfile run of one request, written to `<PROFILE_DIR>/<id>.prof` when it finishes."""
+    def __init__(self, inline: bool = False, directory: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.inline = inline
+        self.directory = directory or profile_dir()
+        self.stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+        self._thread_stats: List[pstats.Stats] = []
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.id}.prof")
+
+    def add_thread(self, profiler: cProfile.Profile):
+        """Adds the profile of a thread the request fanned work out to."""
+        with self._lock:
+            self._thread_stats.append(pstats.Stats(profiler))
+
+    def save(self, profiler: cProfile.Profile):
+        self.stats = pstats.Stats(profiler)
+        with self._lock:
+            for thread_stats in self._thread_stats:
+                self.stats.add(thread_stats)
+        os.makedirs(self.directory, exist_ok=True)
+        self.stats.dump_stats(self.path)
+        prune_profiles(self.directory, int(os.environ.get("PROFILE_MAX_FILES", DEFAULT_MAX_PROFILES)))
+        logger.info(f"Saved request profile {self.id} to {self.path}")
+
+    def report(self, limit: int = 60) -> str:
+        return format_profile(self.stats, limit) if self.stats else ""
+
+# Profile requested by the current request; copied into the worker thread that does the work
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+def format_profile(stats: pstats.Stats, limit: int = 60) -> str:
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+def prune_profiles(directory: str, keep: int):
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in profiles[:max(len(profiles) - keep, 0)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def start_profile(request: Request) -> Optional[RequestProfile]:
+    """
+    Starts profiling the current request when it carries a valid profile token.
+
+    A token that does not match, or a request while profiling is disabled, is refused
+    with 403 rather than silently served without the profile.
+    """
+    token = request.headers.get(PROFILE_HEADER)
+    if token is None:
+        return None
+
+    expected = os.environ.get("PROFILE_TOKEN")
+    if not expected or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+    inline = request.headers.get(PROFILE_OUTPUT_HEADER, "").strip().lower() == "inline"
+    profile = RequestProfile(inline=inline)
+    current_profile.set(profile)
+    return profile
+
+@contextmanager
+def profiled() -> Iterator[None]:
+    """
+    Runs the block under cProfile when the current request asked for a profile.
+
+    cProfile only sees the calling thread, so the block must be the worker thread doing the
+    request's work. Threads the tool fans out to are included when they come from a
+    ContextThreadPoolExecutor; others, such as LangChain's parallel branches, are not.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+ allows a single active profiler per process
+        logger.warning(f"Request profile {profile.id} skipped: {e}")
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            profile.save(profiler)
+        except OSError as e:
+            logger.error(f"Failed to save request profile {profile.id}: {e}")
+
+@contextmanager
+def profiled_thread() -> Iterator[None]:
+    """Profiles a task of a ContextThreadPoolExecutor into the request profile of its context."""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profile.add_thread(profiler)
+
+def call_profiled(fn: Callable, *args, **kwargs):
+    with profiled():
+        return fn(*args, **kwargs)
+
+def find_profile(profile_id: str) -> str:
+    path = os.path.join(profile_dir(), f"{profile_id}.prof")
+    if not VALID_PROFILE_ID.match(profile_id) or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return path
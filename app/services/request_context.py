@@ -0,0 +1,66 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+# Kept in separate variables so each can be set where it becomes known: the request id by
+# the middleware, the user by the endpoint and the tool by the worker that runs it.
+current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+current_user_id: ContextVar[Optional[str]] = ContextVar("current_user_id", default=None)
+current_tool_id: ContextVar[Optional[str]] = ContextVar("current_tool_id", default=None)
+# Id of the background job the current tool execution belongs to; copied into the tool's worker thread
+current_job_id: ContextVar[Optional[str]] = ContextVar("current_job_id", default=None)
+
+@dataclass(frozen=True)
+class RequestContext:
+    request_id: Optional[str] = None
+    user_id: Optional[str] = None
+    tool_id: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Optional[str]]:
+        return {"request_id": self.request_id, "user_id": self.user_id, "tool_id": self.tool_id}
+
+def request_context() -> RequestContext:
+    return RequestContext(current_request_id.get(), current_user_id.get(), current_tool_id.get())
+
+def set_user(user: Any):
+    """Records the user of the current request from a request body's `user`, if it has one."""
+    user_id = getattr(user, "id", None)
+    if user_id is not None:
+        current_user_id.set(str(user_id))
+
+def report_progress(message: str):
+    """Records a progress message on the job running in the current context. Does nothing outside a job."""
+    update_job(lambda store, job_id: store.append_progress(job_id, message), "record progress")
+
+def report_job_started():
+    """Marks the job of the current context as running, once a worker has picked its execution up."""
+    from app.services.schemas import JobStatus
+    update_job(lambda store, job_id: store.update(job_id, status=JobStatus.running), "mark it running")
+
+def update_job(update: Callable, action: str):
+    """Applies `update(store, job_id)` to the job of the current context; a failure is logged, never raised."""
+    job_id = current_job_id.get()
+    if job_id is None:
+        return
+    # Imported here, the job store depends on the logger which depends on this module
+    from app.services.job_store import get_job_store
+    from app.services.logger import setup_logger
+    try:
+        update(get_job_store(), job_id)
+    except Exception as e:
+        setup_logger(__name__).warning(f"Job {job_id}: failed to {action}: {e}")
+
+def _run_task(fn: Callable, args, kwargs):
+    # Imported here, the profiler depends on the logger which depends on this module
+    from app.services.profiling import profiled_thread
+    with profiled_thread():
+        return fn(*args, **kwargs)
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose tasks run in a copy of the submitting context, so request id,
+    user, tool, trace and shared ingestion follow the work into the pool's threads.
+    """
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        return super().submit(copy_context().run, _run_task, fn, args, kwargs)
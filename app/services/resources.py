@@ -0,0 +1,29 @@
+from functools import lru_cache
+
+# Models the tools use; created during warm-up so the first request does not pay for them
+LLM_MODELS = ("gemini-1.0-pro", "gemini-1.5-flash", "gemini-1.5-pro")
+CHAT_MODELS = ("gemini-1.5-flash",)
+EMBEDDING_MODELS = ("models/embedding-001",)
+
+@lru_cache(maxsize=None)
+def read_text_resource(absolute_file_path: str) -> str:
+    """Reads a prompt or other bundled text file once per process."""
+    with open(absolute_file_path, 'r') as file:
+        return file.read()
+
+@lru_cache(maxsize=None)
+def get_llm(model: str):
+    """Shared completion client for `model`; the clients are stateless and safe to share between requests."""
+    # Imported on first use, the Gemini SDK is one of the slowest imports in the app
+    from langchain_google_genai import GoogleGenerativeAI
+    return GoogleGenerativeAI(model=model)
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model)
+
+@lru_cache(maxsize=None)
+def get_embeddings(model: str):
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(model=model)
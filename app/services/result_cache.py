@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from app.services.downloads import file_validators
+from app.services.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_RESULT_CACHE_TTL = 86400
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "marvel-ai-result-cache")
+
+CACHE_CONTROL_HEADER = "X-Cache-Control"
+CACHE_BYPASS = "bypass"    # neither read nor write the cache
+CACHE_REFRESH = "refresh"  # skip the cached result but store the new one
+
+# Cache directive of the current request; copied into the tool's worker thread
+cache_control: ContextVar[Optional[str]] = ContextVar("cache_control", default=None)
+
+# Inputs whose values are URLs of source material; their validators are part of the key
+FILE_URL_SUFFIX = "file_url"
+# Types whose URL is their identity: web pages differ on every fetch and Drive links serve a
+# sharing page, their validators would only make every request miss
+URL_IDENTITY_FILE_TYPES = {"youtube_url", "url", "gdoc", "gsheet", "gslide", "gpdf", "gmp3"}
+
+class MemoryTier:
+    """Thread-safe LRU of cached results with a TTL per entry."""
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+class DiskTier:
+    """
+    Size-bounded directory of cached results, one JSON file per key.
+
+    A file's modification time is its last use; expired files are ignored and the least
+    recently used ones are removed once the directory grows past `max_bytes`.
+    """
+    def __init__(self, directory: str, max_bytes: int, ttl: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r") as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable result cache file {path}: {e}")
+            self._remove(path)
+            return None
+
+        if entry["expires_at"] < time.time():
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["value"]
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        data = json.dumps({"expires_at": time.time() + self.ttl, "value": value})
+        if len(data) > self.max_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write result cache file {path}: {e}")
+            self._remove(tmp_path)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def normalize_input(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+class ToolResultCache:
+    """
+    Two-tier cache of tool results, checked before a tool is executed.
+
+    The key is the tool id, the normalized inputs and the ETag / Last-Modified the server
+    reports for every file the inputs reference, so a URL whose content changed misses.
+    Files are never transferred for the key; requests referencing a file whose server sends
+    no validators are executed without the cache.
+    """
+    def __init__(self, ttl: int = DEFAULT_RESULT_CACHE_TTL, memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 disk_dir: Optional[str] = DEFAULT_CACHE_DIR, disk_bytes: int = DEFAULT_DISK_BYTES,
+                 validators: Callable[[str], Optional[str]] = file_validators):
+        self.enabled = ttl > 0 and (memory_entries > 0 or bool(disk_dir))
+        self.memory = MemoryTier(memory_entries, ttl)
+        self.disk = DiskTier(disk_dir, disk_bytes, ttl) if self.enabled and disk_dir else None
+        self.validators = validators
+
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "uncacheable": 0, "bypassed": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def key(self, tool_id, request_inputs_dict: Dict[str, Any]) -> Optional[str]:
+        inputs = {name: normalize_input(value) for name, value in request_inputs_dict.items() if name != "verbose"}
+        for name in ("lang",) + tuple(name for name in inputs if name.endswith("file_type")):
+            if isinstance(inputs.get(name), str):
+                inputs[name] = inputs[name].lower()
+
+        contents = {}
+        for name, url in inputs.items():
+            if not name.endswith(FILE_URL_SUFFIX) or not url:
+                continue
+            file_type = inputs.get(name[:-len(FILE_URL_SUFFIX)] + "file_type")
+            if file_type in URL_IDENTITY_FILE_TYPES:
+                contents[name] = url
+                continue
+            try:
+                contents[name] = self.validators(url)
+            except Exception as e:
+                logger.info(f"Not caching {tool_id} result, could not revalidate {url}: {e}")
+                return None
+            if contents[name] is None:
+                logger.info(f"Not caching {tool_id} result, {url} has no ETag or Last-Modified")
+                return None
+
+        canonical = json.dumps(
+            {"tool_id": str(tool_id), "inputs": inputs, "contents": contents},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def lookup(self, tool_id, request_inputs_dict: Dict[str, Any]) -> Tuple[Optional[str], Optional[Any]]:
+        """
+        Key of the request and its cached result, if any. The key is None when the result must
+        not be stored: the cache is off or bypassed, or a file could not be revalidated.
+        """
+        mode = cache_control.get()
+        if not self.enabled or mode == CACHE_BYPASS:
+            self._count("bypassed")
+            return None, None
+
+        key = self.key(tool_id, request_inputs_dict)
+        if key is None:
+            self._count("uncacheable")
+            return None, None
+
+        if mode != CACHE_REFRESH:
+            value = self.memory.get(key)
+            if value is not None:
+                self._count("memory_hits")
+                logger.info(f"Serving {tool_id} result from the memory cache")
+                return key, value
+
+            value = self.disk.get(key) if self.disk else None
+            if value is not None:
+                self._count("disk_hits")
+                self.memory.set(key, value)
+                logger.info(f"Serving {tool_id} result from the disk cache")
+                return key, value
+
+        self._count("misses")
+        return key, None
+
+    def store(self, key: str, value: Any) -> Any:
+        value = jsonable_encoder(value)
+        self.memory.set(key, value)
+        if self.disk:
+            self.disk.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {**counts, "enabled": self.enabled, "memory_entries": len(self.memory)}
+
+def create_result_cache() -> ToolResultCache:
+    return ToolResultCache(
+        ttl=int(os.getenv("RESULT_CACHE_TTL", DEFAULT_RESULT_CACHE_TTL)),
+        memory_entries=int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+        disk_dir=os.getenv("RESULT_CACHE_DIR", DEFAULT_CACHE_DIR) or None,
+        disk_bytes=int(os.getenv("RESULT_CACHE_DISK_BYTES", DEFAULT_DISK_BYTES))
+    )
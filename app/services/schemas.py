@@ -51,6 +51,10 @@ class ChatResponse(BaseModel):
 
 class ToolResponse(BaseModel):
     data: Any
+
+class ToolBatchResponse(BaseModel):
+    # One ToolResponse or ErrorResponse per request, in request order
+    data: List[Any]
     
 class ChatMessage(BaseModel):
     role: str
@@ -153,4 +157,23 @@ class WritingFeedbackGeneratorArgs(BaseModel):
     criteria_file_type: str
     writing_to_review_file_url: str
     writing_to_review_file_type: str
-    lang: Optional[str] = "en"
\ No newline at end of file
+    lang: Optional[str] = "en"
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+class Job(BaseModel):
+    id: str
+    tool_id: str
+    status: JobStatus
+    created_at: float
+    updated_at: float
+    progress: List[str] = []
+    result: Optional[Any] = None
+    error: Optional[Any] = None
+
+class JobResponse(BaseModel):
+    data: Job
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import resource
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.services.logger import setup_logger
+from app.services.request_context import current_request_id
+from app.services.tracing import current_trace
+from app.services.memory import MemoryUsage, current_rss
+
+logger = setup_logger(__name__)
+
+DEFAULT_SLOW_REQUEST_SECONDS = 60
+DEFAULT_MAX_RECORDS = 1000
+DEFAULT_SLOW_REQUEST_PATH = os.path.join(tempfile.gettempdir(), "marvel-ai-slow-requests.sqlite3")
+
+# Short values of these inputs are kept as is, they describe the request without user content
+DESCRIPTIVE_INPUTS = {"file_type", "lang", "grade_level"}
+
+def hash_value(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+def fingerprint_value(name: str, value: Any) -> Any:
+    if isinstance(value, (bool, int, float)) or value is None:
+        return value
+    if isinstance(value, str):
+        if value.startswith(("http://", "https://")):
+            return {"url_sha256": hash_value(value)}
+        if name in DESCRIPTIVE_INPUTS and len(value) <= 32:
+            return value
+        return {"chars": len(value)}
+    if isinstance(value, dict):
+        return {key: fingerprint_value(key, item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return {"items": len(value), "values": [fingerprint_value(name, item) for item in value[:20]]}
+    return {"type": type(value).__name__}
+
+def input_fingerprint(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape of the tool inputs: URLs are hashed and free text reduced to its length."""
+    return {name: fingerprint_value(name, value) for name, value in inputs.items()}
+
+def peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class RequestSample:
+    """Start time and memory of a tool request, compared against when it finishes."""
+    def __init__(self, tool_id, inputs: Dict[str, Any]):
+        self.tool_id = str(tool_id)
+        self.inputs = inputs
+        self.started = time.perf_counter()
+        self.rss = current_rss()
+        self.peak_rss = peak_rss()
+        self.memory_usage: Optional[MemoryUsage] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def memory(self) -> Dict[str, Optional[int]]:
+        rss = current_rss()
+        return {
+            "rss_delta_bytes": rss - self.rss if rss is not None and self.rss is not None else None,
+            # Process-wide: only grows when this request (or a concurrent one) set a new peak
+            "peak_rss_delta_bytes": peak_rss() - self.peak_rss,
+            "sampled_peak_delta_bytes": self.memory_usage.peak_delta if self.memory_usage else None,
+        }
+
+class SlowRequestLog:
+    """Keeps the most recent `max_records` slow tool requests in SQLite."""
+    def __init__(self, path: str, max_records: int = DEFAULT_MAX_RECORDS):
+        self.path = path
+        self.max_records = max_records
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS slow_requests (id TEXT PRIMARY KEY, created_at REAL NOT NULL, tool_id TEXT NOT NULL, "
+            "duration REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        self._connection.commit()
+
+    def add(self, record: Dict[str, Any]):
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO slow_requests (id, created_at, tool_id, duration, data) VALUES (?, ?, ?, ?, ?)",
+                (record["id"], record["created_at"], record["tool_id"], record["duration_seconds"], json.dumps(record))
+            )
+            self._connection.execute(
+                "DELETE FROM slow_requests WHERE id NOT IN (SELECT id FROM slow_requests ORDER BY created_at DESC LIMIT ?)",
+                (self.max_records,)
+            )
+            self._connection.commit()
+
+    def list(self, tool_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = "SELECT data FROM slow_requests"
+        params: tuple = ()
+        if tool_id:
+            query += " WHERE tool_id = ?"
+            params = (tool_id,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._connection.execute(query, params + (limit,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM slow_requests WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+class SlowRequestCapture:
+    """Persists a compact record of every tool request slower than `threshold` seconds."""
+    def __init__(self, threshold: Optional[float], path: str, max_records: int = DEFAULT_MAX_RECORDS):
+        self.threshold = threshold
+        self.path = path
+        self.max_records = max_records
+        self._log: Optional[SlowRequestLog] = None
+        self._lock = threading.Lock()
+
+    @property
+    def log(self) -> SlowRequestLog:
+        with self._lock:
+            if self._log is None:
+                self._log = SlowRequestLog(self.path, self.max_records)
+            return self._log
+
+    def finish(self, sample: RequestSample, outcome: str):
+        duration = sample.elapsed()
+        if self.threshold is None or duration < self.threshold:
+            return
+
+        trace = current_trace.get()
+        stages, counters = {}, {}
+        if trace is not None:
+            stages = {name: {"count": count, "seconds": round(total, 3)} for name, (count, total) in trace.summary().items()}
+            counters = dict(trace.events)
+
+        record = {
+            "id": uuid.uuid4().hex,
+            "created_at": time.time(),
+            "request_id": current_request_id.get(),
+            "tool_id": sample.tool_id,
+            "outcome": outcome,
+            "duration_seconds": round(duration, 3),
+            "inputs": input_fingerprint(sample.inputs),
+            "stages": stages,
+            "counters": counters,
+            "memory": sample.memory(),
+        }
+        try:
+            self.log.add(record)
+            logger.warning(f"Slow request {record['id']} for {sample.tool_id} took {duration:.1f}s")
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Failed to record slow request for {sample.tool_id}: {e}")
+
+def create_slow_request_capture() -> SlowRequestCapture:
+    """SLOW_REQUEST_SECONDS sets the threshold (empty disables the capture), SLOW_REQUEST_PATH the database."""
+    threshold = os.environ.get("SLOW_REQUEST_SECONDS", str(DEFAULT_SLOW_REQUEST_SECONDS))
+    return SlowRequestCapture(
+        threshold=float(threshold) if threshold else None,
+        path=os.environ.get("SLOW_REQUEST_PATH", DEFAULT_SLOW_REQUEST_PATH),
+        max_records=int(os.environ.get("SLOW_REQUEST_MAX_RECORDS", DEFAULT_MAX_RECORDS))
+    )
+
+slow_requests = create_slow_request_capture()
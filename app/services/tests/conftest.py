@@ -0,0 +1,23 @@
+import pytest
+from app.services import tool_execution
+from app.services.result_cache import ToolResultCache
+
+@pytest.fixture(autouse=True)
+def disable_result_cache(monkeypatch):
+    # Tests fake execute_tool with different results for the same inputs
+    monkeypatch.setattr(tool_execution, "result_cache", ToolResultCache(ttl=0))
+
+@pytest.fixture(autouse=True)
+def isolated_llm_ledger(monkeypatch, tmp_path):
+    from app.services import llm_ledger
+    monkeypatch.setattr(llm_ledger, "_ledger", llm_ledger.LLMLedger(str(tmp_path / "ledger.sqlite3")))
+
+@pytest.fixture(autouse=True)
+def isolated_slow_requests(monkeypatch, tmp_path):
+    from app.services.slow_requests import SlowRequestCapture
+    monkeypatch.setattr(tool_execution, "slow_requests", SlowRequestCapture(None, str(tmp_path / "slow.sqlite3")))
+
+@pytest.fixture(autouse=True)
+def isolated_download_cache(monkeypatch, tmp_path):
+    from app.services import download_cache
+    monkeypatch.setattr(download_cache, "_cache", download_cache.DownloadCache(str(tmp_path / "downloads"), 10 * 1024 * 1024))
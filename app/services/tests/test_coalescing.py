@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.services import tool_execution
+from app.services.coalescing import request_key
+
+def test_request_key_ignores_input_order():
+    first = request_key("multiple-choice-quiz-generator", {"topic": "Algebra", "n_questions": 2})
+    second = request_key("multiple-choice-quiz-generator", {"n_questions": 2, "topic": "Algebra"})
+    other = request_key("multiple-choice-quiz-generator", {"n_questions": 3, "topic": "Algebra"})
+
+    assert first == second
+    assert first != other
+
+def run_duplicates(inputs, count):
+    async def scenario():
+        return await asyncio.gather(
+            *(tool_execution.run_tool("multiple-choice-quiz-generator", dict(inputs)) for _ in range(count)),
+            return_exceptions=True
+        )
+    return asyncio.run(scenario())
+
+def test_duplicate_requests_share_one_execution(monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    def fake_execute_tool(tool_id, inputs):
+        calls.append(inputs)
+        release.wait(1)
+        return {"topic": inputs["topic"]}
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+    before = tool_execution.coalescer.stats("multiple-choice-quiz-generator")["coalesced"]
+
+    threading.Timer(0.1, release.set).start()
+    results = run_duplicates({"topic": "Coalesced algebra"}, 3)
+
+    assert len(calls) == 1
+    assert results == [{"topic": "Coalesced algebra"}] * 3
+    stats = tool_execution.coalescer.stats("multiple-choice-quiz-generator")
+    assert stats["coalesced"] - before == 2
+    assert stats["in_flight"] == 0
+
+def test_duplicate_requests_share_errors(monkeypatch):
+    calls = []
+
+    def fake_execute_tool(tool_id, inputs):
+        calls.append(inputs)
+        threading.Event().wait(0.1)
+        raise HTTPException(status_code=400, detail="broken")
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    results = run_duplicates({"topic": "Coalesced failure"}, 2)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, HTTPException) and result.status_code == 400 for result in results)
+
+    # Once finished the key is released and the next request runs again
+    with pytest.raises(HTTPException):
+        asyncio.run(tool_execution.run_tool("multiple-choice-quiz-generator", {"topic": "Coalesced failure"}))
+    assert len(calls) == 2
@@ -0,0 +1,97 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.services import download_cache
+from app.services.download_cache import DownloadCache
+from app.services.downloads import download_to_file, file_validators
+
+@pytest.fixture
+def server():
+    """Serves `state["files"]` by path with an ETag, answering 304 to a matching If-None-Match and HEAD with the ETag alone."""
+    state = {"files": {}, "statuses": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = state["files"][self.path]
+            etag = f'"{len(body)}-{hash(body)}"'
+            status = 304 if self.headers.get("If-None-Match") == etag else 200
+            state["statuses"].append(status)
+            self.send_response(status)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", "0" if status == 304 else str(len(body)))
+            self.end_headers()
+            if status == 200:
+                self.wfile.write(body)
+
+        def do_HEAD(self):
+            state["statuses"].append("HEAD")
+            self.send_response(200)
+            if self.path != "/unversioned.pdf":
+                self.send_header("ETag", f'"{len(state["files"][self.path])}"')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+def read(download):
+    try:
+        with open(download.path, "rb") as file:
+            return file.read()
+    finally:
+        download.remove()
+
+def test_unchanged_file_is_served_from_the_cache(server):
+    server["files"]["/handout.pdf"] = b"%PDF-1.4 handout"
+    first = download_to_file(f"{server['url']}/handout.pdf")
+    second = download_to_file(f"{server['url']}/handout.pdf")
+
+    assert read(first) == read(second) == b"%PDF-1.4 handout"
+    assert second.head.startswith(b"%PDF-")
+    assert second.content_type == "application/pdf"
+    assert server["statuses"] == [200, 304]
+
+def test_changed_file_is_downloaded_again(server):
+    server["files"]["/handout.pdf"] = b"%PDF-1.4 first edition"
+    read(download_to_file(f"{server['url']}/handout.pdf"))
+    server["files"]["/handout.pdf"] = b"%PDF-1.4 second edition"
+
+    assert read(download_to_file(f"{server['url']}/handout.pdf")) == b"%PDF-1.4 second edition"
+    assert server["statuses"] == [200, 200]
+
+def test_identical_bodies_are_stored_once(server):
+    server["files"]["/a.pdf"] = server["files"]["/b.pdf"] = b"%PDF-1.4 same handout"
+    read(download_to_file(f"{server['url']}/a.pdf"))
+    read(download_to_file(f"{server['url']}/b.pdf"))
+
+    assert download_cache.get_download_cache().stats() == {"urls": 2, "blobs": 1, "bytes": 21}
+
+def test_least_recently_used_files_are_evicted(server, monkeypatch, tmp_path):
+    cache = DownloadCache(str(tmp_path / "small"), max_bytes=250)
+    monkeypatch.setattr(download_cache, "_cache", cache)
+    for name in ("a", "b", "c"):
+        server["files"][f"/{name}.pdf"] = name.encode() * 100
+
+    read(download_to_file(f"{server['url']}/a.pdf"))
+    read(download_to_file(f"{server['url']}/b.pdf"))
+    read(download_to_file(f"{server['url']}/a.pdf"))
+    read(download_to_file(f"{server['url']}/c.pdf"))
+
+    assert cache.lookup(f"{server['url']}/a.pdf") is not None
+    assert cache.lookup(f"{server['url']}/b.pdf") is None
+    assert cache.stats()["bytes"] <= 250
+
+def test_validators_come_from_a_head_request(server):
+    server["files"]["/handout.pdf"] = b"%PDF-1.4 handout"
+
+    assert file_validators(f"{server['url']}/handout.pdf") == '"16"|'
+    assert file_validators(f"{server['url']}/unversioned.pdf") is None
+    assert server["statuses"] == ["HEAD", "HEAD"]
@@ -0,0 +1,53 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.api.error_utilities import DownloadError
+from app.services.downloads import download_to_file
+
+BODY = b"%PDF-1.4 " + b"x" * 100_000
+
+@pytest.fixture
+def server():
+    """Serves BODY at /sized.pdf with a Content-Length and at /unsized.pdf without one."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            if self.path == "/sized.pdf":
+                self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def temp_files(prefix):
+    import tempfile
+    return [name for name in os.listdir(tempfile.gettempdir()) if name.startswith(prefix)]
+
+def test_download_is_streamed_to_a_file(server):
+    download = download_to_file(f"{server}/sized.pdf", prefix="test-download-")
+    try:
+        with open(download.path, "rb") as file:
+            assert file.read() == BODY
+        assert download.size == len(BODY)
+        assert download.head.startswith(b"%PDF-")
+        assert download.content_type == "application/pdf"
+    finally:
+        download.remove()
+
+@pytest.mark.parametrize("path", ["/sized.pdf", "/unsized.pdf"])
+def test_download_over_the_limit_is_aborted(server, path):
+    with pytest.raises(DownloadError) as exc_info:
+        download_to_file(f"{server}{path}", prefix="test-too-large-", max_bytes=10_000)
+
+    assert "download limit" in str(exc_info.value)
+    assert temp_files("test-too-large-") == []
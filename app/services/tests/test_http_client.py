@@ -0,0 +1,63 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.services.http_client import create_http_session
+from app.services.tracing import Trace, current_trace
+
+@pytest.fixture
+def server():
+    """Local server answering 503 to the first `failures` requests, recording each client port."""
+    state = {"failures": 0, "ports": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            state["ports"].append(self.client_address[1])
+            status = 503 if state["failures"] > 0 else 200
+            state["failures"] -= 1
+            body = b"document"
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_address[1]}/file.pdf"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_transient_errors_are_retried_and_counted(server):
+    server["failures"] = 2
+    session = create_http_session(retries=3, backoff_seconds=0)
+    trace = Trace()
+    token = current_trace.set(trace)
+    try:
+        response = session.get(server["url"])
+    finally:
+        current_trace.reset(token)
+
+    assert response.status_code == 200
+    assert len(server["ports"]) == 3
+    assert trace.events["download_retries"] == 2
+
+def test_exhausted_retries_return_the_last_response(server):
+    server["failures"] = 5
+    response = create_http_session(retries=1, backoff_seconds=0).get(server["url"])
+
+    assert response.status_code == 503
+    assert len(server["ports"]) == 2
+
+def test_downloads_reuse_the_connection(server):
+    session = create_http_session()
+    for _ in range(3):
+        assert session.get(server["url"]).content == b"document"
+
+    assert len(set(server["ports"])) == 1
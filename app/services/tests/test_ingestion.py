@@ -0,0 +1,118 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.services.ingestion import SharedEmbeddings, SharedIngestion, load_shared, shared_ingestion
+
+def test_load_runs_once_for_concurrent_callers():
+    ingestion = SharedIngestion()
+    calls = []
+    lock = threading.Lock()
+
+    def loader():
+        with lock:
+            calls.append(1)
+        time.sleep(0.05)
+        return ["page 1", "page 2"]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: ingestion.load(("docs", "a.pdf"), loader), range(4)))
+
+    assert len(calls) == 1
+    assert all(result == ["page 1", "page 2"] for result in results)
+    assert results[0] is not results[1]
+    assert ingestion.loads == 1
+    assert ingestion.reused_loads == 3
+
+def test_load_shared_outside_scope_calls_loader():
+    calls = []
+    load_shared("key", lambda: calls.append(1))
+    load_shared("key", lambda: calls.append(1))
+
+    assert len(calls) == 2
+
+def test_load_shared_follows_copied_context():
+    calls = []
+
+    with shared_ingestion() as ingestion:
+        context = copy_context()
+        for _ in range(3):
+            context.run(load_shared, "key", lambda: calls.append(1) or ["doc"])
+
+    assert len(calls) == 1
+    assert ingestion.reused_loads == 2
+
+def test_shared_embeddings_embed_each_text_once():
+    ingestion = SharedIngestion()
+    model = DeterministicFakeEmbedding(size=8)
+    embedded = []
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        def embed_documents(self, texts):
+            embedded.extend(texts)
+            return super().embed_documents(texts)
+
+    shared = SharedEmbeddings(CountingEmbedding(size=8), ingestion)
+    first = shared.embed_documents(["a", "b"])
+    second = shared.embed_documents(["b", "c"])
+
+    assert embedded == ["a", "b", "c"]
+    assert first == model.embed_documents(["a", "b"])
+    assert second == model.embed_documents(["b", "c"])
+    assert ingestion.embedded_texts == 3
+    assert ingestion.reused_texts == 1
+
+def tool_request(tool_id, inputs):
+    return {
+        "user": {"id": "string", "fullName": "string", "email": "string"},
+        "type": "tool",
+        "tool_data": {"tool_id": tool_id, "inputs": inputs}
+    }
+
+def test_submit_tools_batch_returns_results_in_order(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import tool_execution
+
+    loads = []
+
+    def fake_execute_tool(tool_id, inputs):
+        load_shared(("docs", inputs["file_url"]), lambda: loads.append(inputs["file_url"]) or ["doc"])
+        return {"tool_id": tool_id, "topic": inputs["topic"]}
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    quiz_inputs = lambda topic: [
+        {"name": "topic", "value": topic},
+        {"name": "n_questions", "value": 2},
+        {"name": "file_url", "value": "https://example.com/sample.pdf"},
+        {"name": "file_type", "value": "pdf"},
+        {"name": "lang", "value": "en"}
+    ]
+    batch = [
+        tool_request("multiple-choice-quiz-generator", quiz_inputs("Algebra")),
+        tool_request("multiple-choice-quiz-generator", [{"name": "topic", "value": "Missing inputs"}]),
+        tool_request("multiple-choice-quiz-generator", quiz_inputs("Geometry")),
+    ]
+
+    with TestClient(app) as client:
+        response = client.post("/submit-tools-batch", json=batch, headers={"api-key": "dev"})
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data[0] == {"data": {"tool_id": "multiple-choice-quiz-generator", "topic": "Algebra"}}
+    assert data[1]["status"] == 400
+    assert data[2] == {"data": {"tool_id": "multiple-choice-quiz-generator", "topic": "Geometry"}}
+    assert loads == ["https://example.com/sample.pdf"]
+
+def test_submit_tools_batch_rejects_oversized_batch():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    batch = [tool_request("multiple-choice-quiz-generator", [])] * 11
+
+    with TestClient(app) as client:
+        response = client.post("/submit-tools-batch", json=batch, headers={"api-key": "dev"})
+
+    assert response.status_code == 400
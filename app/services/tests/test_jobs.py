@@ -0,0 +1,190 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import tool_execution
+from app.services.request_context import report_progress
+from app.services.job_store import InMemoryJobStore, SQLiteJobStore
+from app.services.schemas import Job, JobStatus
+
+headers = {"api-key": "dev"}
+
+quiz_request = {
+    "user": {"id": "string", "fullName": "string", "email": "string"},
+    "type": "tool",
+    "tool_data": {
+        "tool_id": "multiple-choice-quiz-generator",
+        "inputs": [
+            {"name": "topic", "value": "Linear Algebra"},
+            {"name": "n_questions", "value": 1},
+            {"name": "file_url", "value": "https://example.com/sample.pdf"},
+            {"name": "file_type", "value": "pdf"},
+            {"name": "lang", "value": "en"}
+        ]
+    }
+}
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+
+def new_job(job_id="job-1"):
+    now = time.time()
+    return Job(id=job_id, tool_id="tool", status=JobStatus.queued, created_at=now, updated_at=now)
+
+def test_job_store_round_trip(store):
+    store.create(new_job())
+    store.append_progress("job-1", "halfway")
+    store.update("job-1", status=JobStatus.succeeded, result={"questions": [1, 2]})
+
+    job = store.get("job-1")
+
+    assert job.status == JobStatus.succeeded
+    assert job.progress == ["halfway"]
+    assert job.result == {"questions": [1, 2]}
+    assert store.get("missing") is None
+
+def test_job_store_prunes_finished_jobs(store):
+    store.ttl = 0
+    store.create(new_job("old"))
+    store.update("old", status=JobStatus.failed)
+    time.sleep(0.01)
+
+    store.create(new_job("new"))
+
+    assert store.get("old") is None
+    assert store.get("new") is not None
+
+def wait_for_job(client, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()["data"]
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("Job did not finish in time")
+
+def test_job_lifecycle(monkeypatch):
+    def fake_execute_tool(tool_id, inputs):
+        report_progress("Generated question 1 of 1")
+        return [{"question": inputs["topic"]}]
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    with TestClient(app) as client:
+        response = client.post("/jobs", json=quiz_request, headers=headers)
+        assert response.status_code == 202
+
+        job = wait_for_job(client, response.json()["data"]["id"])
+
+        assert job["status"] == "succeeded"
+        assert job["result"] == [{"question": "Linear Algebra"}]
+        assert job["progress"] == ["Generated question 1 of 1"]
+
+        events = client.get(f"/jobs/{job['id']}/events", headers=headers).text
+        assert "event: progress" in events
+        assert "event: result" in events
+
+def test_job_failure_is_recorded(monkeypatch):
+    def fake_execute_tool(tool_id, inputs):
+        raise HTTPException(status_code=400, detail="No video transcripts available")
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    with TestClient(app) as client:
+        response = client.post("/jobs", json=quiz_request, headers=headers)
+        job = wait_for_job(client, response.json()["data"]["id"])
+
+    assert job["status"] == "failed"
+    assert job["error"] == {"status": 400, "message": "No video transcripts available"}
+
+def test_job_rejects_invalid_inputs():
+    invalid_request = {**quiz_request, "tool_data": {"tool_id": "multiple-choice-quiz-generator", "inputs": []}}
+
+    with TestClient(app) as client:
+        response = client.post("/jobs", json=invalid_request, headers=headers)
+
+    assert response.status_code == 400
+
+def test_unknown_job():
+    with TestClient(app) as client:
+        response = client.get("/jobs/unknown", headers=headers)
+
+    assert response.status_code == 404
+
+def test_sqlite_store_fails_jobs_interrupted_by_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    store.create(new_job("running"))
+    store.update("running", status=JobStatus.running)
+    store.create(new_job("done"))
+    store.update("done", status=JobStatus.succeeded, result=[1])
+
+    restarted = SQLiteJobStore(path)
+
+    assert restarted.get("running").status == JobStatus.failed
+    assert restarted.get("running").error["status"] == 500
+    assert restarted.get("done").status == JobStatus.succeeded
+
+def test_job_events_give_up_after_the_timeout(monkeypatch):
+    from app.services import job_store, jobs
+    store = InMemoryJobStore()
+    store.create(new_job("stuck"))
+    monkeypatch.setattr(job_store, "_job_store", store)
+
+    async def collect():
+        return [event async for event in jobs.job_events("stuck", poll_interval=0.01, timeout=0.05)]
+
+    events = asyncio.run(collect())
+
+    assert events[0].startswith("event: status")
+    assert events[-1].startswith("event: error")
+    assert '"status": 504' in events[-1]
+
+def test_job_is_queued_until_a_worker_picks_it_up(monkeypatch):
+    from app.services import job_store, jobs
+    monkeypatch.setattr(job_store, "_job_store", InMemoryJobStore())
+    monkeypatch.setattr(tool_execution, "execute_tool", lambda tool_id, inputs: {"topic": inputs["topic"]})
+    pool = tool_execution.ToolWorkerPool("quiz-jobs", max_concurrency=1, max_queue=1)
+    monkeypatch.setattr(tool_execution, "_pools", {"quiz-jobs": pool})
+    release = threading.Event()
+    pool.submit(release.wait)
+
+    async def run():
+        job = await jobs.submit_job("quiz-jobs", {"topic": "Algebra"})
+        await asyncio.sleep(0.1)
+        waiting = jobs.get_job(job.id).status
+        release.set()
+        while jobs.get_job(job.id).status not in jobs.TERMINAL_STATUSES:
+            await asyncio.sleep(0.01)
+        return waiting, jobs.get_job(job.id)
+
+    try:
+        waiting, job = asyncio.run(run())
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
+
+    assert waiting == JobStatus.queued
+    assert job.status == JobStatus.succeeded
+
+def test_importing_a_tool_does_not_open_the_job_store(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    code = (
+        "import sys, app.tools.multiple_choice_quiz_generator.tools\n"
+        "from app.services import job_store\n"
+        "assert job_store._job_store is None\n"
+        "assert 'app.services.jobs' not in sys.modules"
+    )
+    env = {**os.environ, "JOB_STORE": "sqlite", "JOB_STORE_PATH": str(path)}
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+    assert not path.exists()
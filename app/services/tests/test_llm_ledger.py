@@ -0,0 +1,112 @@
+import time
+from contextvars import copy_context
+import pytest
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.language_models import FakeListLLM
+from langchain_core.prompts import PromptTemplate
+from app.services import llm_ledger
+from app.services.llm_ledger import LLMLedger, format_report, llm_call, main, start_attempt_counting, summarize, tool_attempt
+from app.services.tracing import current_tool_id
+
+def test_chain_calls_are_recorded_with_attempt_numbers():
+    chain = PromptTemplate.from_template("Topic: {topic}") | FakeListLLM(responses=["first", "second"])
+
+    def run():
+        current_tool_id.set("quiz")
+        start_attempt_counting()
+        # The same prompt sent again after a success is not a retry, a quiz asks every question that way
+        chain.invoke({"topic": "Algebra"})
+        chain.invoke({"topic": "Algebra"})
+
+    copy_context().run(run)
+
+    rows = llm_ledger.get_llm_ledger().rows()
+    assert [(row["tool_id"], row["attempt"], row["outcome"]) for row in rows] == [("quiz", 1, "success"), ("quiz", 1, "success")]
+    assert rows[0]["prompt_tokens"] == 4
+    assert rows[0]["tokens_estimated"] == 1
+
+def test_prompt_sent_again_after_a_failure_is_a_retry():
+    def run():
+        start_attempt_counting()
+        for _ in range(2):
+            try:
+                with llm_call("gemini-1.5-pro", "hello", tool_id="quiz"):
+                    raise TimeoutError("deadline exceeded")
+            except TimeoutError:
+                pass
+        with llm_call("gemini-1.5-pro", "hello", tool_id="quiz") as call:
+            call.finish("hi")
+        with llm_call("gemini-1.5-pro", "hello", tool_id="quiz") as call:
+            call.finish("hi")
+
+    copy_context().run(run)
+
+    assert [row["attempt"] for row in llm_ledger.get_llm_ledger().rows()] == [1, 2, 3, 1]
+
+def test_tool_retry_loops_number_attempts_and_record_rejections():
+    chain = PromptTemplate.from_template("Topic: {topic}") | FakeListLLM(responses=["not json", '{"criterias": []}', '{"criterias": [1]}']) | JsonOutputParser()
+
+    def run():
+        current_tool_id.set("rubric")
+        start_attempt_counting()
+        # The rubric's loop: a parser error, then an output failing validation, then success
+        with pytest.raises(Exception):
+            with tool_attempt(1):
+                chain.invoke({"topic": "Essay"})
+        with tool_attempt(2) as attempt:
+            if not chain.invoke({"topic": "Essay"})["criterias"]:
+                attempt.reject("invalid rubric")
+        with tool_attempt(3):
+            chain.invoke({"topic": "Essay"})
+
+    copy_context().run(run)
+
+    rows = llm_ledger.get_llm_ledger().rows()
+    assert [(row["attempt"], row["outcome"], row["error"]) for row in rows] == [
+        (1, "rejected", "OutputParserException"),
+        (2, "rejected", "invalid rubric"),
+        (3, "success", None),
+    ]
+
+def test_direct_sdk_calls():
+    with llm_call("gemini-2.0-flash-exp", "hello", tool_id="co_teacher") as call:
+        call.finish("hi there", prompt_tokens=3, output_tokens=2)
+
+    try:
+        with llm_call("gemini-2.0-flash-exp", "hello", tool_id="co_teacher"):
+            raise TimeoutError("deadline exceeded")
+    except TimeoutError:
+        pass
+
+    rows = llm_ledger.get_llm_ledger().rows()
+    assert (rows[0]["prompt_tokens"], rows[0]["output_tokens"], rows[0]["tokens_estimated"]) == (3, 2, 0)
+    assert (rows[1]["outcome"], rows[1]["error"]) == ("error", "TimeoutError")
+
+def test_report(tmp_path, capsys):
+    path = str(tmp_path / "report.sqlite3")
+    ledger = LLMLedger(path)
+    ledger.record("quiz", "gemini-1.5-pro", 1_000_000, 0, 2.0, outcome="rejected", error="invalid question", request_id="a")
+    ledger.record("quiz", "gemini-1.5-pro", 0, 1_000_000, 4.0, attempt=2, outcome="error", error="ValueError", request_id="a")
+    ledger.record("quiz", "gemini-1.5-pro", 0, 0, 1.0, request_id="b")
+    ledger.record("rubric", "gemini-1.5-flash", 100, 100, 1.0)
+
+    summary = summarize(ledger.rows())
+    quiz = summary[0]
+    assert (quiz["tool_id"], quiz["calls"], quiz["retries"], quiz["errors"], quiz["rejected"]) == ("quiz", 3, 1, 1, 1)
+    assert quiz["calls_per_request"] == 1.5
+    assert quiz["cost_usd"] == 6.25
+    assert quiz["max_seconds"] == 4.0
+
+    main(["report", "--db", path, "--by", "model"])
+    output = capsys.readouterr().out
+    assert "gemini-1.5-pro" in output and "gemini-1.5-flash" in output
+    assert format_report(summary, "tool_id").splitlines()[0].startswith("tool_id")
+
+def test_old_and_excess_rows_are_pruned(tmp_path):
+    ledger = LLMLedger(str(tmp_path / "pruned.sqlite3"), retention_hours=1, max_rows=3)
+    ledger.record("quiz", "gemini-1.5-pro", 1, 1, 1.0, created_at=time.time() - 7200)
+    for index in range(5):
+        ledger.record("quiz", "gemini-1.5-pro", index, 1, 1.0)
+
+    rows = ledger.rows()
+    assert [row["prompt_tokens"] for row in rows] == [2, 3, 4]
@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+from app.services.logger import AsyncLogHandler, DebugSampler, JsonFormatter
+from app.services.request_context import current_request_id
+
+def make_record(message, *args, level=logging.INFO, created=None):
+    record = logging.LogRecord("app.test", level, __file__, 1, message, args, None)
+    if created is not None:
+        record.created = created
+    return record
+
+def test_records_are_truncated_and_carry_the_request_id():
+    log_queue = queue.Queue()
+    handler = AsyncLogHandler(log_queue, max_chars=10)
+
+    token = current_request_id.set("req-1")
+    try:
+        handler.handle(make_record("payload: %s", "x" * 100))
+    finally:
+        current_request_id.reset(token)
+
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "payload: x... [truncated 99 chars]"
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["request_id"] == "req-1"
+    assert entry["severity"] == "INFO"
+    assert entry["message"].startswith("payload: x")
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = AsyncLogHandler(queue.Queue(maxsize=1))
+
+    handler.handle(make_record("first"))
+    handler.handle(make_record("second"))
+
+    assert handler.stats["dropped_queue_full"] == 1
+
+def test_debug_records_are_sampled_over_the_budget():
+    log_queue = queue.Queue()
+    handler = AsyncLogHandler(log_queue, sampler=DebugSampler(per_second=5, sample_every=10))
+
+    for _ in range(25):
+        handler.handle(make_record("debug line", level=logging.DEBUG, created=100.5))
+    # Warnings are never sampled
+    handler.handle(make_record("warning", level=logging.WARNING, created=100.5))
+
+    # 5 within the budget, then one in ten of the remaining 20
+    assert log_queue.qsize() == 5 + 2 + 1
+    assert handler.stats["sampled_out"] == 18
+
+    # The next window reports what was dropped
+    handler.handle(make_record("debug line", level=logging.DEBUG, created=101.5))
+    messages = [log_queue.get_nowait().getMessage() for _ in range(log_queue.qsize())]
+    assert "Sampled out 18 debug log records in the last second" in messages
+
+def test_request_id_header():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        assert client.get("/ready", headers={"X-Request-ID": "abc-123"}).headers["X-Request-ID"] == "abc-123"
+        # Ids that are not safe to log are replaced
+        assert client.get("/ready", headers={"X-Request-ID": "bad id\n"}).headers["X-Request-ID"] != "bad id\n"
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import time
+from prometheus_client import REGISTRY
+from app.services.loop_monitor import LoopMonitor
+
+def test_blocking_call_on_the_loop_is_measured(caplog):
+    monitor = LoopMonitor(interval=0.01, warn_seconds=0.05)
+    before = REGISTRY.get_sample_value("event_loop_lag_seconds_count") or 0
+
+    async def run():
+        monitor.start()
+        await asyncio.sleep(0.03)
+        # Blocks the loop the way a synchronous tool call in an async handler would
+        time.sleep(0.2)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.loop_monitor"):
+        asyncio.run(run())
+
+    assert monitor.max_lag >= 0.1
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds_count") > before
+    assert monitor.stats()["threadpool"]["limit"] > 0
+    assert any("Event loop lagged" in record.getMessage() for record in caplog.records)
+
+def test_threadpool_saturation_is_sampled():
+    from starlette.concurrency import run_in_threadpool
+
+    monitor = LoopMonitor()
+
+    async def run():
+        release = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        calls = [asyncio.create_task(run_in_threadpool(lambda: asyncio.run_coroutine_threadsafe(release.wait(), loop).result())) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        monitor.sample_threadpool()
+        release.set()
+        await asyncio.gather(*calls)
+
+    asyncio.run(run())
+    assert monitor.threadpool["active"] == 3
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+from app.services import downloads, memory
+from app.services.memory import COLD_BYTES_FACTOR, MemoryGuard, MemoryTracker, request_file_type
+
+def test_file_type_label():
+    assert request_file_type({"file_type": "PDF"}) == "pdf"
+    assert request_file_type({"objectives_file_type": "pdf", "additional_comments_file_type": "csv"}) == "mixed"
+    assert request_file_type({"file_type": "exe", "topic": "x"}) == "none"
+
+def test_peak_growth_is_attributed_to_the_request():
+    tracker = MemoryTracker(interval=0.01)
+    usage = tracker.start("quiz", {"file_type": "csv"})
+
+    allocation = bytearray(64 * 1024 * 1024)
+    tracker.sample()
+    del allocation
+
+    peak = tracker.finish(usage)
+    assert peak >= 32 * 1024 * 1024
+    assert REGISTRY.get_sample_value("tool_request_memory_peak_bytes_count", {"tool_id": "quiz", "file_type": "csv"}) >= 1
+
+def record_history(tracker, peak, times=3, input_bytes=None):
+    for _ in range(times):
+        usage = tracker.start("quiz", {"file_type": "pdf"})
+        tracker.finish(usage)
+        tracker._history[("quiz", "pdf")][-1] = (peak, input_bytes)
+
+def test_requests_predicted_over_the_soft_limit_are_rejected(monkeypatch):
+    tracker = MemoryTracker(cold_prediction=50)
+    monkeypatch.setattr(memory, "current_rss", lambda: 900)
+    guard = MemoryGuard(tracker, soft_limit=1000, action="reject")
+
+    # Nothing known about the tool yet, the cold prediction fits
+    asyncio.run(guard.admit("quiz", {"file_type": "pdf"}))
+
+    record_history(tracker, 500)
+    assert tracker.predict("quiz", "pdf") == 500
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(guard.admit("quiz", {"file_type": "pdf"}))
+    assert exc_info.value.status_code == 503
+
+    # Other file types have their own history
+    guard.check("quiz", {"file_type": "csv"})
+
+def test_cold_prediction_is_conservative_and_scales_with_file_size(monkeypatch):
+    tracker = MemoryTracker(cold_prediction=100)
+    monkeypatch.setattr(memory, "current_rss", lambda: 900)
+    guard = MemoryGuard(tracker, soft_limit=1000, action="reject")
+    url = "https://example.com/large.pdf"
+    inputs = {"file_url": url, "file_type": "pdf"}
+
+    # No history: the default alone fits, a known large file does not
+    assert tracker.predict("quiz", "pdf") == 100
+    guard.check("quiz", inputs)
+    downloads.remember_size(url, 10)
+    assert tracker.predict("quiz", "pdf", 10) == 100 + COLD_BYTES_FACTOR * 10
+    with pytest.raises(HTTPException):
+        guard.check("quiz", inputs)
+
+def test_prediction_scales_with_file_size():
+    tracker = MemoryTracker()
+    record_history(tracker, 500, input_bytes=100)
+    record_history(tracker, 1000, input_bytes=200)
+
+    assert tracker.predict("quiz", "pdf") == 1000
+    # Five bytes of peak per byte of file, but never less than a typical request
+    assert tracker.predict("quiz", "pdf", 1000) == 5000
+    assert tracker.predict("quiz", "pdf", 10) == 1000
+
+def test_waiting_request_is_admitted_once_memory_is_released(monkeypatch):
+    tracker = MemoryTracker()
+    rss = [900]
+    monkeypatch.setattr(memory, "current_rss", lambda: rss[0])
+    monkeypatch.setattr(memory, "ADMISSION_POLL_SECONDS", 0.01)
+    record_history(tracker, 500)
+    guard = MemoryGuard(tracker, soft_limit=1000, action="wait", wait_seconds=5)
+
+    async def run():
+        admission = asyncio.create_task(guard.admit("quiz", {"file_type": "pdf"}))
+        await asyncio.sleep(0.05)
+        assert not admission.done()
+        rss[0] = 400
+        await asyncio.wait_for(admission, 1)
+
+    asyncio.run(run())
+
+def test_rejected_and_coalesced_requests_are_not_tracked(monkeypatch):
+    from app.services import tool_execution
+
+    def fake_execute_tool(tool_id, inputs):
+        threading.Event().wait(0.2)
+        return {"topic": inputs["topic"]}
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+    pool = tool_execution.ToolWorkerPool("quiz-full", max_concurrency=1, max_queue=0)
+    monkeypatch.setattr(tool_execution, "_pools", {"quiz-full": pool})
+    release = threading.Event()
+    blocker = pool.submit(release.wait)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(tool_execution.run_tool("quiz-full", {"topic": "Rejected"}))
+    assert exc_info.value.status_code == 503
+    assert len(memory.memory_tracker._active) == 0
+    release.set()
+    blocker.result()
+
+    async def duplicates():
+        return await asyncio.gather(*(tool_execution.run_tool("quiz-full", {"topic": "Joined"}) for _ in range(3)))
+
+    assert asyncio.run(duplicates()) == [{"topic": "Joined"}] * 3
+    # One peak for the execution the three requests shared
+    assert len(memory.memory_tracker._history[("quiz-full", "none")]) == 1
+    assert len(memory.memory_tracker._active) == 0
+    pool.shutdown(wait=True)
@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.main import app
+from app.services import tool_execution
+from app.services.metrics import count_tool_error, root_cause, time_loader
+
+headers = {"api-key": "dev"}
+
+quiz_request = {
+    "user": {"id": "string", "fullName": "string", "email": "string"},
+    "type": "tool",
+    "tool_data": {
+        "tool_id": "multiple-choice-quiz-generator",
+        "inputs": [
+            {"name": "topic", "value": "Linear Algebra"},
+            {"name": "n_questions", "value": 1},
+            {"name": "file_url", "value": "https://example.com/sample.pdf"},
+            {"name": "file_type", "value": "pdf"},
+            {"name": "lang", "value": "en"}
+        ]
+    }
+}
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_root_cause_follows_reraised_errors():
+    try:
+        try:
+            raise ConnectionError("unreachable")
+        except ConnectionError:
+            raise ValueError("Document loading failed")
+    except ValueError as e:
+        error = e
+
+    assert isinstance(root_cause(error), ConnectionError)
+
+    before = sample("tool_errors_total", tool_id="quiz", exception="ValueError", cause="ConnectionError")
+    count_tool_error("quiz", error)
+    assert sample("tool_errors_total", tool_id="quiz", exception="ValueError", cause="ConnectionError") == before + 1
+
+def test_loader_timer_records_outcome():
+    before = sample("document_loader_duration_seconds_count", file_type="csv", outcome="error")
+
+    with time_loader("CSV"):
+        pass
+    with pytest.raises(ValueError):
+        with time_loader("csv"):
+            raise ValueError("bad file")
+
+    assert sample("document_loader_duration_seconds_count", file_type="csv", outcome="success") >= 1
+    assert sample("document_loader_duration_seconds_count", file_type="csv", outcome="error") == before + 1
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(tool_execution, "execute_tool", lambda tool_id, inputs: [{"question": inputs["topic"]}])
+
+    with TestClient(app) as client:
+        assert client.post("/submit-tool", json=quiz_request, headers=headers).status_code == 200
+        response = client.get("/metrics", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/submit-tool",status="200"}' in body
+    assert 'tool_execution_duration_seconds_count{outcome="success",tool_id="multiple-choice-quiz-generator"}' in body
+    assert 'llm_calls_per_request_count{route="/submit-tool"}' in body
+    assert 'tool_pool_active{tool_id="multiple-choice-quiz-generator"}' in body
+    assert "tool_result_cache_hit_ratio" in body
+
+def test_metrics_requires_api_key():
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 401
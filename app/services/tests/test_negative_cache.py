@@ -0,0 +1,72 @@
+import time
+
+import pytest
+import requests
+from app.api.error_utilities import DownloadError, FileHandlerError, VideoTranscriptError
+from app.services.negative_cache import NegativeCache, parse_ttls
+
+def failing(error):
+    calls = []
+
+    def load():
+        calls.append(1)
+        raise error
+    return load, calls
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} Error", response=response)
+
+def test_failure_is_raised_again_without_loading():
+    cache = NegativeCache({"FileHandlerError": 60})
+    load, calls = failing(DownloadError("Failed to download file from URL", "https://example.com/a.pdf"))
+    for _ in range(3):
+        with pytest.raises(DownloadError) as exc_info:
+            cache.call("https://example.com/a.pdf", "pdf", load)
+        assert str(exc_info.value) == "Failed to download file from URL"
+        assert exc_info.value.url == "https://example.com/a.pdf"
+
+    assert len(calls) == 1
+    # Another file type of the same URL is loaded again
+    with pytest.raises(DownloadError):
+        cache.call("https://example.com/a.pdf", "url", load)
+    assert len(calls) == 2
+
+def test_ttl_is_chosen_by_error_class():
+    cache = NegativeCache(parse_ttls("VideoTranscriptError=300,FileHandlerError=60,DownloadError=0"))
+
+    assert cache.ttl(VideoTranscriptError("No video found", "https://youtu.be/x")) == 300
+    assert cache.ttl(FileHandlerError("No file found")) == 60
+    assert cache.ttl(DownloadError("Failed to download file from URL")) == 0
+    assert cache.ttl(ValueError("not a load failure")) == 0
+
+def test_expired_failure_is_loaded_again(monkeypatch):
+    cache = NegativeCache({"VideoTranscriptError": 1})
+    load, calls = failing(VideoTranscriptError("No video transcripts available", "https://youtu.be/x"))
+    with pytest.raises(VideoTranscriptError):
+        cache.call("https://youtu.be/x", "youtube_url", load)
+
+    now = time.time()
+    monkeypatch.setattr("app.services.negative_cache.time.time", lambda: now + 2)
+    with pytest.raises(VideoTranscriptError):
+        cache.call("https://youtu.be/x", "youtube_url", load)
+    assert len(calls) == 2
+
+@pytest.mark.parametrize("error,remembered", [
+    (http_error(404), True),
+    (http_error(503), False),
+    (requests.ConnectionError("connection refused"), False),
+])
+def test_transient_failures_are_not_remembered(error, remembered):
+    cache = NegativeCache({"FileHandlerError": 60, "HTTPError": 60})
+    try:
+        raise DownloadError("Failed to download file from URL") from error
+    except DownloadError as e:
+        wrapped = e
+    load, calls = failing(wrapped)
+    for _ in range(2):
+        with pytest.raises(DownloadError):
+            cache.call("https://example.com/a.pdf", "pdf", load)
+
+    assert len(calls) == (1 if remembered else 2)
@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import tool_execution
+
+quiz_request = {
+    "user": {"id": "string", "fullName": "string", "email": "string"},
+    "type": "tool",
+    "tool_data": {
+        "tool_id": "multiple-choice-quiz-generator",
+        "inputs": [
+            {"name": "topic", "value": "Linear Algebra"},
+            {"name": "n_questions", "value": 1},
+            {"name": "file_url", "value": "https://example.com/sample.pdf"},
+            {"name": "file_type", "value": "pdf"},
+            {"name": "lang", "value": "en"}
+        ]
+    }
+}
+
+def slow_part(topic):
+    return sum(range(10000)) and [{"question": topic}]
+
+def fake_execute_tool(tool_id, inputs):
+    return slow_part(inputs["topic"])
+
+def test_profile_is_saved_and_served(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_TOKEN", "secret")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    with TestClient(app) as client:
+        response = client.post("/submit-tool", json=quiz_request, headers={"api-key": "dev", "X-Profile": "secret"})
+        assert response.status_code == 200
+        assert response.json()["data"] == [{"question": "Linear Algebra"}]
+
+        profile_id = response.headers["X-Profile-Id"]
+        assert (tmp_path / f"{profile_id}.prof").exists()
+
+        report = client.get(f"/profiles/{profile_id}", params={"format": "text"}, headers={"api-key": "dev"})
+        assert "slow_part" in report.text
+        assert client.get(f"/profiles/{profile_id}", headers={"api-key": "dev"}).status_code == 200
+        assert client.get("/profiles/not-a-profile", headers={"api-key": "dev"}).status_code == 404
+
+def test_inline_profile(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILE_TOKEN", "secret")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    with TestClient(app) as client:
+        response = client.post("/submit-tool", json=quiz_request, headers={"api-key": "dev", "X-Profile": "secret", "X-Profile-Output": "inline"})
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "cumulative" in response.text and "slow_part" in response.text
+
+def test_profile_token_is_required(monkeypatch):
+    monkeypatch.delenv("PROFILE_TOKEN", raising=False)
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    with TestClient(app) as client:
+        response = client.post("/submit-tool", json=quiz_request, headers={"api-key": "dev", "X-Profile": "guess"})
+
+    assert response.status_code == 403
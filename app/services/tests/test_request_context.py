@@ -0,0 +1,67 @@
+import logging
+import queue
+from contextvars import copy_context
+from langchain_core.runnables import RunnableLambda, RunnableParallel
+from app.services.logger import AsyncLogHandler
+from app.services.profiling import RequestProfile, current_profile, profiled
+from app.services.request_context import (
+    ContextThreadPoolExecutor,
+    current_request_id,
+    current_tool_id,
+    current_user_id,
+    request_context
+)
+
+def in_request(fn):
+    def run():
+        current_request_id.set("req-1")
+        current_user_id.set("user-1")
+        current_tool_id.set("worksheet-generator")
+        return fn()
+    return copy_context().run(run)
+
+def test_executor_threads_inherit_the_request_context():
+    def fan_out():
+        with ContextThreadPoolExecutor(max_workers=2) as executor:
+            return [future.result() for future in [executor.submit(request_context) for _ in range(4)]]
+
+    contexts = in_request(fan_out)
+    assert {context.as_dict()["request_id"] for context in contexts} == {"req-1"}
+    assert {context.user_id for context in contexts} == {"user-1"}
+    # The submitting thread is unaffected
+    assert request_context().request_id is None
+
+def test_log_records_from_worker_threads_carry_the_context():
+    log_queue = queue.Queue()
+    handler = AsyncLogHandler(log_queue)
+    logger = logging.getLogger("app.tests.request_context")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    def log(_):
+        logger.info("generating questions")
+        return True
+
+    try:
+        in_request(lambda: RunnableParallel(a=RunnableLambda(log), b=RunnableLambda(log)).invoke(None))
+        in_request(lambda: ContextThreadPoolExecutor().submit(log, None).result())
+    finally:
+        logger.removeHandler(handler)
+
+    records = [log_queue.get_nowait() for _ in range(3)]
+    assert {(record.request_id, record.user_id, record.tool_id) for record in records} == {("req-1", "user-1", "worksheet-generator")}
+
+def fanned_out_work():
+    return sum(range(20000))
+
+def test_profile_includes_executor_threads(tmp_path):
+    profile = RequestProfile(directory=str(tmp_path))
+
+    def run():
+        current_profile.set(profile)
+        with profiled():
+            with ContextThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(lambda _: fanned_out_work(), range(2)))
+
+    copy_context().run(run)
+    assert "fanned_out_work" in profile.report()
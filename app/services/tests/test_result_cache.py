@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.services.result_cache import CACHE_BYPASS, CACHE_REFRESH, DiskTier, MemoryTier, ToolResultCache, cache_control
+
+QUIZ_INPUTS = {
+    "topic": "Algebra",
+    "n_questions": 2,
+    "file_url": "https://example.com/sample.pdf",
+    "file_type": "pdf",
+    "lang": "en"
+}
+
+def make_cache(tmp_path, contents, **kwargs):
+    return ToolResultCache(ttl=60, memory_entries=4, disk_dir=str(tmp_path), validators=lambda url: contents[url], **kwargs)
+
+@pytest.fixture
+def tool(monkeypatch):
+    """Fake tool behind run_tool, with its own worker pool; `calls` records every execution."""
+    from app.services import tool_execution
+    calls = []
+
+    def fake_execute_tool(tool_id, inputs):
+        calls.append(inputs)
+        return {"topic": inputs["topic"], "run": len(calls)}
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+    pool = tool_execution.ToolWorkerPool("quiz-cached", max_concurrency=1, max_queue=0)
+    monkeypatch.setattr(tool_execution, "_pools", {"quiz-cached": pool})
+
+    def use(cache):
+        monkeypatch.setattr(tool_execution, "result_cache", cache)
+
+    def run(inputs=QUIZ_INPUTS):
+        return asyncio.run(tool_execution.run_tool("quiz-cached", dict(inputs)))
+
+    yield SimpleNamespace(calls=calls, pool=pool, use=use, run=run)
+    pool.shutdown(wait=True)
+
+def test_key_normalizes_inputs_and_follows_file_validators(tmp_path):
+    contents = {"https://example.com/sample.pdf": '"v1"|'}
+    cache = make_cache(tmp_path, contents)
+
+    key = cache.key("multiple-choice-quiz-generator", QUIZ_INPUTS)
+    same = cache.key("multiple-choice-quiz-generator", {**QUIZ_INPUTS, "topic": " Algebra ", "n_questions": 2.0, "lang": "EN", "verbose": True})
+    assert key == same
+
+    contents["https://example.com/sample.pdf"] = '"v2"|'
+    assert cache.key("multiple-choice-quiz-generator", QUIZ_INPUTS) != key
+
+@pytest.mark.parametrize("contents", [{}, {"https://example.com/sample.pdf": None}])
+def test_file_that_cannot_be_revalidated_is_not_cached(tmp_path, tool, contents):
+    cache = make_cache(tmp_path, contents)
+    tool.use(cache)
+
+    tool.run()
+    tool.run()
+
+    assert len(tool.calls) == 2
+    assert cache.stats()["uncacheable"] == 2
+
+def test_memory_then_disk_hits(tmp_path, tool):
+    contents = {"https://example.com/sample.pdf": '"v1"|'}
+    cache = make_cache(tmp_path, contents)
+    tool.use(cache)
+    assert tool.run() == {"topic": "Algebra", "run": 1}
+    assert tool.run() == {"topic": "Algebra", "run": 1}
+
+    # A new instance shares only the disk tier
+    restarted = make_cache(tmp_path, contents)
+    tool.use(restarted)
+    assert tool.run() == {"topic": "Algebra", "run": 1}
+
+    assert len(tool.calls) == 1
+    assert cache.stats()["memory_hits"] == 1
+    assert restarted.stats()["disk_hits"] == 1
+
+@pytest.mark.parametrize("directive, expected_calls", [(CACHE_BYPASS, 2), (CACHE_REFRESH, 2)])
+def test_cache_control_directives(tmp_path, tool, directive, expected_calls):
+    tool.use(make_cache(tmp_path, {"https://example.com/sample.pdf": '"v1"|'}))
+
+    tool.run()
+    token = cache_control.set(directive)
+    try:
+        result = tool.run()
+    finally:
+        cache_control.reset(token)
+
+    assert result["run"] == 2
+    assert len(tool.calls) == expected_calls
+    # Refresh replaces the cached result, bypass leaves it alone
+    assert tool.run()["run"] == (2 if directive == CACHE_REFRESH else 1)
+
+def test_memory_tier_evicts_least_recently_used_and_expired():
+    memory = MemoryTier(max_entries=2, ttl=60)
+    memory.set("a", 1)
+    memory.set("b", 2)
+    memory.get("a")
+    memory.set("c", 3)
+
+    assert memory.get("b") is None
+    assert memory.get("a") == 1
+
+    expired = MemoryTier(max_entries=2, ttl=-1)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+
+def test_disk_tier_stays_under_size_bound(tmp_path):
+    disk = DiskTier(str(tmp_path), max_bytes=250, ttl=60)
+    for index in range(5):
+        disk.set(f"key{index}", "x" * 50)
+        # Distinct modification times so eviction order is deterministic
+        os.utime(tmp_path / f"key{index}.json", (time.time() - 100 + index, time.time() - 100 + index))
+
+    total = sum(path.stat().st_size for path in tmp_path.glob("*.json"))
+    assert total <= 250
+    assert disk.get("key4") == "x" * 50
+    assert disk.get("key0") is None
+
+def test_cache_hit_does_not_take_a_worker(tmp_path, tool):
+    tool.use(make_cache(tmp_path, {"https://example.com/sample.pdf": '"v1"|'}))
+    assert tool.run() == {"topic": "Algebra", "run": 1}
+
+    # With the only worker busy a miss is refused, a hit is still served
+    release = threading.Event()
+    tool.pool.submit(release.wait)
+    try:
+        assert tool.run() == {"topic": "Algebra", "run": 1}
+        with pytest.raises(HTTPException):
+            tool.run({**QUIZ_INPUTS, "topic": "Geometry"})
+    finally:
+        release.set()
+    assert len(tool.calls) == 1
+
+def test_pages_and_drive_documents_are_keyed_on_their_url(tmp_path):
+    cache = make_cache(tmp_path, {})
+    for file_type in ("url", "gdoc", "youtube_url"):
+        assert cache.key("multiple-choice-quiz-generator", {**QUIZ_INPUTS, "file_type": file_type}) is not None
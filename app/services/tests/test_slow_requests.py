@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import router
+from app.services import tool_execution
+from app.services.slow_requests import SlowRequestCapture, input_fingerprint
+from app.services.tracing import count_event, span
+
+quiz_request = {
+    "user": {"id": "string", "fullName": "string", "email": "string"},
+    "type": "tool",
+    "tool_data": {
+        "tool_id": "multiple-choice-quiz-generator",
+        "inputs": [
+            {"name": "topic", "value": "Linear Algebra"},
+            {"name": "n_questions", "value": 1},
+            {"name": "file_url", "value": "https://example.com/sample.pdf"},
+            {"name": "file_type", "value": "pdf"},
+            {"name": "lang", "value": "en"}
+        ]
+    }
+}
+
+def test_fingerprint_hides_content():
+    fingerprint = input_fingerprint({
+        "topic": "Linear Algebra",
+        "n_questions": 3,
+        "file_url": "https://example.com/sample.pdf",
+        "file_type": "pdf",
+        "files": [{"url": "https://example.com/a.pdf", "filename": "a.pdf"}],
+    })
+
+    assert fingerprint["topic"] == {"chars": 14}
+    assert fingerprint["n_questions"] == 3
+    assert fingerprint["file_type"] == "pdf"
+    assert set(fingerprint["file_url"]) == {"url_sha256"}
+    assert fingerprint["files"]["items"] == 1
+    assert "example.com" not in str(fingerprint)
+
+def test_slow_request_is_recorded_and_served(monkeypatch, tmp_path):
+    capture = SlowRequestCapture(0, str(tmp_path / "slow.sqlite3"))
+    monkeypatch.setattr(tool_execution, "slow_requests", capture)
+    monkeypatch.setattr(router, "slow_requests", capture)
+
+    def fake_execute_tool(tool_id, inputs):
+        with span("parse"):
+            count_event("chunks", 12)
+        return [{"question": inputs["topic"]}]
+
+    monkeypatch.setattr(tool_execution, "execute_tool", fake_execute_tool)
+
+    with TestClient(app) as client:
+        assert client.post("/submit-tool", json=quiz_request, headers={"api-key": "dev"}).status_code == 200
+
+        records = client.get("/slow-requests", params={"tool_id": "multiple-choice-quiz-generator"}, headers={"api-key": "dev"}).json()
+        assert len(records) == 1
+        record = client.get(f"/slow-requests/{records[0]['id']}", headers={"api-key": "dev"}).json()
+        assert client.get("/slow-requests/unknown", headers={"api-key": "dev"}).status_code == 404
+
+    assert record["outcome"] == "success"
+    assert record["stages"]["parse"]["count"] == 1
+    assert record["counters"]["chunks"] == 12
+    assert record["inputs"]["topic"] == {"chars": 14}
+    assert "peak_rss_delta_bytes" in record["memory"]
+    assert record["request_id"]
+
+def test_log_keeps_the_most_recent_records(tmp_path):
+    log = SlowRequestCapture(0, str(tmp_path / "slow.sqlite3"), max_records=2).log
+    for index in range(3):
+        log.add({"id": str(index), "created_at": index, "tool_id": "quiz", "duration_seconds": 1.0})
+
+    assert [record["id"] for record in log.list()] == ["2", "1"]
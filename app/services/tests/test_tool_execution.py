@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from app.services.tool_execution import ToolWorkerPool, get_tool_pool
+
+def test_pool_caps_concurrency():
+    pool = ToolWorkerPool("test-tool", max_concurrency=2, max_queue=10)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    futures = [pool.submit(work) for _ in range(6)]
+    for future in futures:
+        future.result()
+
+    assert max(peak) == 2
+    stats = pool.stats()
+    assert stats["completed"] == 6
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+    assert stats["max_wait_seconds"] > 0
+    pool.shutdown(wait=True)
+
+def test_pool_rejects_when_queue_full():
+    pool = ToolWorkerPool("test-tool", max_concurrency=1, max_queue=1)
+    release = threading.Event()
+
+    running = pool.submit(release.wait)
+    waiting = pool.submit(release.wait)
+
+    with pytest.raises(HTTPException) as exc_info:
+        pool.submit(release.wait)
+
+    assert exc_info.value.status_code == 503
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    running.result()
+    waiting.result()
+    pool.shutdown(wait=True)
+
+def test_pool_run_does_not_block_event_loop():
+    pool = ToolWorkerPool("test-tool", max_concurrency=1, max_queue=1)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        result = await pool.run(lambda: time.sleep(0.2) or "done")
+        ticker_task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+
+    assert result == "done"
+    assert ticks > 5
+    pool.shutdown(wait=True)
+
+def test_get_tool_pool_uses_tools_config():
+    pool = get_tool_pool("worksheet-generator")
+
+    assert pool is get_tool_pool("worksheet-generator")
+    assert pool.max_concurrency == 2
+    assert pool.max_queue == 8
+
+def test_get_tool_pool_unknown_tool():
+    with pytest.raises(HTTPException) as exc_info:
+        get_tool_pool("unknown-tool")
+
+    assert exc_info.value.status_code == 404
+
+def test_pool_stream_yields_items_and_errors():
+    pool = ToolWorkerPool("test-tool", max_concurrency=1, max_queue=1)
+
+    def generate():
+        yield 1
+        yield 2
+        raise HTTPException(status_code=400, detail="broken")
+
+    async def scenario():
+        items = []
+        with pytest.raises(HTTPException) as exc_info:
+            async for item in pool.stream(generate):
+                items.append(item)
+        return items, exc_info.value
+
+    items, error = asyncio.run(scenario())
+
+    assert items == [1, 2]
+    assert error.status_code == 400
+    pool.shutdown(wait=True)
+
+def test_submit_tool_streams_ndjson(monkeypatch):
+    import json
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import tool_execution
+
+    def fake_execute_tool_stream(tool_id, inputs):
+        for index in range(inputs["n_questions"]):
+            yield {"question": f"Question {index}"}
+
+    monkeypatch.setattr(tool_execution, "execute_tool_stream", fake_execute_tool_stream)
+
+    request = {
+        "user": {"id": "string", "fullName": "string", "email": "string"},
+        "type": "tool",
+        "tool_data": {
+            "tool_id": "multiple-choice-quiz-generator",
+            "inputs": [
+                {"name": "topic", "value": "Linear Algebra"},
+                {"name": "n_questions", "value": 2},
+                {"name": "file_url", "value": "https://example.com/sample.pdf"},
+                {"name": "file_type", "value": "pdf"},
+                {"name": "lang", "value": "en"}
+            ]
+        }
+    }
+
+    with TestClient(app) as client:
+        response = client.post("/submit-tool", json=request, headers={"api-key": "dev", "Accept": "application/x-ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"event": "item", "data": {"question": "Question 0"}},
+        {"event": "item", "data": {"question": "Question 1"}},
+        {"event": "done", "data": None}
+    ]
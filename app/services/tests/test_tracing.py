@@ -0,0 +1,103 @@
+from contextvars import copy_context
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListLLM
+from langchain_core.prompts import PromptTemplate
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.services.tracing import SpanStats, current_tool_id, span, span_stats, split_documents, start_trace, traced
+
+def test_spans_join_the_current_trace():
+    @traced("parse")
+    def parse():
+        return "parsed"
+
+    with start_trace() as trace:
+        with span("download"):
+            pass
+        assert parse() == "parsed"
+        # Worker threads run in a copy of the request context
+        copy_context().run(parse)
+
+    summary = trace.summary()
+    assert list(summary) == ["download", "parse"]
+    assert summary["parse"][0] == 2
+
+    header = trace.server_timing()
+    assert header.startswith("download;dur=")
+    assert 'parse;dur=' in header and 'desc="2 calls"' in header
+    assert "total;dur=" in header
+
+def test_split_is_timed_and_its_chunks_counted():
+    splitter = RecursiveCharacterTextSplitter(chunk_size=10, chunk_overlap=0)
+    with start_trace() as trace:
+        chunks = split_documents(splitter, [Document(page_content="one two three four five")])
+
+    assert trace.summary()["split"][0] == 1
+    assert trace.events["chunks"] == len(chunks) > 1
+    assert trace.events["document_chars"] == sum(len(chunk.page_content) for chunk in chunks)
+
+def test_spans_outside_a_trace_are_only_aggregated():
+    stats = SpanStats()
+    stats.record("quiz", "llm", 0.5)
+    stats.record("quiz", "llm", 1.5)
+
+    snapshot = stats.snapshot()
+    assert snapshot["quiz"]["llm"]["count"] == 2
+    assert snapshot["quiz"]["llm"]["max_seconds"] == 1.5
+    assert snapshot["quiz"]["llm"]["avg_seconds"] == 1.0
+
+def test_chain_and_llm_calls_are_recorded():
+    chain = PromptTemplate.from_template("Topic: {topic}") | FakeListLLM(responses=["answer"])
+
+    def run():
+        current_tool_id.set("tracing-test-tool")
+        return chain.invoke({"topic": "Algebra"})
+
+    with start_trace() as trace:
+        assert copy_context().run(run) == "answer"
+
+    summary = trace.summary()
+    assert summary["llm"][0] == 1
+    assert summary["chain"][0] == 1
+    assert span_stats.snapshot()["tracing-test-tool"]["llm"]["count"] >= 1
+
+def test_server_timing_header():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        response = client.get("/")
+
+    assert "total;dur=" in response.headers["server-timing"]
+
+def test_streamed_response_is_observed_once_its_body_is_sent(monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.main as main
+    from app.services import tool_execution
+
+    def fake_execute_tool_stream(tool_id, inputs):
+        with span("llm"):
+            yield {"question": "Question 0"}
+
+    observed = []
+    monkeypatch.setattr(tool_execution, "execute_tool_stream", fake_execute_tool_stream)
+    monkeypatch.setattr(main, "observe_request", lambda method, route, status, seconds, trace: observed.append(trace.summary()))
+
+    request = {
+        "user": {"id": "string", "fullName": "string", "email": "string"},
+        "type": "tool",
+        "tool_data": {
+            "tool_id": "multiple-choice-quiz-generator",
+            "inputs": [
+                {"name": "topic", "value": "Linear Algebra"},
+                {"name": "n_questions", "value": 1},
+                {"name": "file_url", "value": "https://example.com/sample.pdf"},
+                {"name": "file_type", "value": "pdf"},
+                {"name": "lang", "value": "en"}
+            ]
+        }
+    }
+    with TestClient(main.app) as client:
+        response = client.post("/submit-tool", json=request, headers={"api-key": "dev", "Accept": "application/x-ndjson"})
+
+    assert "server-timing" not in response.headers
+    assert observed and "llm" in observed[-1]
@@ -0,0 +1,40 @@
+from app.services import warmup
+from app.services.warmup import WarmupState, prompt_files, warm_up
+
+def test_warm_up_runs_every_step_once_and_records_failures(monkeypatch):
+    monkeypatch.setattr(warmup, "warmup_state", WarmupState())
+    calls = []
+
+    def broken():
+        raise RuntimeError("no credentials")
+
+    steps = lambda: [("first", lambda: calls.append("first")), ("broken", broken), ("last", lambda: calls.append("last"))]
+    warm_up(steps)
+    warm_up(steps)
+
+    status = warmup.warmup_state.status()
+    assert calls == ["first", "last"]
+    assert status["ready"]
+    assert status["failures"] == ["broken: no credentials"]
+
+def test_prompt_files_finds_tool_prompts():
+    names = [path.replace("\\", "/") for path in prompt_files()]
+
+    assert any(name.endswith("multiple_choice_quiz_generator/prompt/multiple_choice_quiz_generator_prompt.txt") for name in names)
+
+def test_ready_endpoint_reports_warm_up(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.api import router
+
+    state = WarmupState()
+    monkeypatch.setattr(router, "warmup_state", state)
+    client = TestClient(app)
+
+    assert client.get("/ready").status_code == 503
+
+    state.start()
+    state.finish()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"]
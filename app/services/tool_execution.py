@@ -0,0 +1,274 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.services.logger import setup_logger
+from app.services.coalescing import RequestCoalescer, request_key
+from app.services.result_cache import create_result_cache
+from app.services.request_context import current_tool_id, report_job_started
+from app.services.metrics import TOOL_EXECUTION_SECONDS
+from app.services.llm_ledger import start_attempt_counting
+from app.services.profiling import current_profile, profiled
+from app.services.slow_requests import RequestSample, slow_requests
+from app.services.memory import memory_guard, memory_tracker
+from app.tools.utils.tool_utilities import tools_config, execute_tool, execute_tool_stream
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_MAX_QUEUE = 8
+
+class ToolWorkerPool:
+    """
+    Bounded worker pool used to run a single tool off the event loop.
+
+    At most `max_concurrency` executions run at once; up to `max_queue` more may wait
+    for a free worker. Anything beyond that is rejected with a 503 so a burst of slow
+    requests cannot pile up unbounded work on the instance.
+    """
+    def __init__(self, tool_id: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, max_queue: int = DEFAULT_MAX_QUEUE):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue cannot be negative")
+
+        self.tool_id = tool_id
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"tool-{tool_id}")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        with self._lock:
+            if self._queued + self._active >= self.max_concurrency + self.max_queue:
+                self._rejected += 1
+                logger.warning(f"Worker pool for {self.tool_id} is full ({self._active} active, {self._queued} queued)")
+                raise HTTPException(status_code=503, detail="Tool is at capacity, please retry later")
+            self._queued += 1
+
+        enqueued_at = time.monotonic()
+        # Run in a copy of the caller's context so request-scoped context variables follow the work
+        context = copy_context()
+
+        def run():
+            wait = time.monotonic() - enqueued_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+            if wait > 1:
+                logger.info(f"Request for {self.tool_id} waited {wait:.2f}s for a worker")
+
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        return self._executor.submit(run)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stream(self, fn: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Runs a generator function on the pool and returns an async iterator over its items.
+
+        The work is submitted immediately, so a full pool is reported before any item is sent.
+        If the consumer stops early the generator is closed after its current item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        cancelled = threading.Event()
+
+        def publish(item, error=None):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+            except RuntimeError:
+                # The event loop is gone, nobody is listening anymore
+                cancelled.set()
+
+        def produce():
+            generator = None
+            try:
+                generator = fn(*args, **kwargs)
+                for item in generator:
+                    if cancelled.is_set():
+                        break
+                    publish(item)
+            except BaseException as e:
+                publish(finished, e)
+            else:
+                publish(finished)
+            finally:
+                if generator is not None:
+                    generator.close()
+
+        self.submit(produce)
+
+        async def consume():
+            try:
+                while True:
+                    item, error = await queue.get()
+                    if item is finished:
+                        if error is not None:
+                            raise error
+                        return
+                    yield item
+            finally:
+                cancelled.set()
+
+        return consume()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                "tool_id": self.tool_id,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_seconds": self._total_wait / started if started else 0.0,
+                "max_wait_seconds": self._max_wait,
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+_pools: Dict[str, ToolWorkerPool] = {}
+_pools_lock = threading.Lock()
+
+def get_tool_pool(tool_id) -> ToolWorkerPool:
+    tool_id = str(tool_id)
+    with _pools_lock:
+        pool = _pools.get(tool_id)
+        if pool is None:
+            tool_config = tools_config.get(tool_id)
+
+            if not tool_config:
+                raise HTTPException(status_code=404, detail="Tool executable not found")
+
+            pool = ToolWorkerPool(
+                tool_id,
+                max_concurrency=tool_config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                max_queue=tool_config.get('max_queue', DEFAULT_MAX_QUEUE)
+            )
+            _pools[tool_id] = pool
+            logger.info(f"Created worker pool for {tool_id} (concurrency={pool.max_concurrency}, queue={pool.max_queue})")
+
+        return pool
+
+coalescer = RequestCoalescer()
+result_cache = create_result_cache()
+
+def tool_pool_stats() -> Dict[str, Dict[str, Any]]:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.tool_id: {**pool.stats(), "coalescing": coalescer.stats(pool.tool_id)} for pool in pools}
+
+def shutdown_tool_pools(wait: bool = False):
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+def execute_cached_tool(tool_id, request_inputs_dict: Dict[str, Any], cache_key: Optional[str] = None) -> Any:
+    # Runs in the worker's copy of the request context, spans from here on count towards this tool
+    current_tool_id.set(str(tool_id))
+    report_job_started()
+    start_attempt_counting()
+    with profiled():
+        result = execute_tool(tool_id, request_inputs_dict)
+    return result_cache.store(cache_key, result) if cache_key else result
+
+async def run_tool(tool_id, request_inputs_dict: Dict[str, Any]) -> Any:
+    """
+    Runs `execute_tool` on the tool's worker pool without blocking the event loop.
+
+    Results are served from the result cache when the inputs and files are unchanged; the
+    lookup happens before a worker is taken, so a hit never waits behind running executions.
+    Identical requests that arrive while one is still running share its execution.
+    """
+    pool = get_tool_pool(tool_id)
+    # Off the event loop, the key revalidates the referenced files with their servers
+    cache_key, cached = await run_in_threadpool(result_cache.lookup, tool_id, request_inputs_dict)
+    if cached is not None:
+        return cached
+
+    await memory_guard.admit(tool_id, request_inputs_dict)
+    sample = RequestSample(tool_id, request_inputs_dict)
+    submitted = []
+
+    def submit() -> Future:
+        future = pool.submit(execute_cached_tool, tool_id, request_inputs_dict, cache_key)
+        submitted.append(future)
+        return future
+
+    if current_profile.get() is not None:
+        # A profiled request needs its own execution, not one it joined halfway
+        future = submit()
+    else:
+        key = request_key(tool_id, request_inputs_dict)
+        future = coalescer.submit(tool_id, key, submit)
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        if submitted:
+            # Only the request running the tool is measured; one that joined it would start from the RSS it already raised
+            sample.memory_usage = memory_tracker.start(tool_id, request_inputs_dict)
+        # Shielded so one caller going away does not cancel the execution for the others
+        result = await asyncio.shield(asyncio.wrap_future(future))
+        outcome = "success"
+        return result
+    finally:
+        TOOL_EXECUTION_SECONDS.labels(str(tool_id), outcome).observe(time.perf_counter() - start)
+        memory_tracker.finish(sample.memory_usage)
+        slow_requests.finish(sample, outcome)
+
+def stream_tool(tool_id, request_inputs_dict: Dict[str, Any]) -> AsyncIterator[Any]:
+    """Streams the items of `execute_tool_stream` from the tool's worker pool. Must be called from the event loop."""
+    memory_guard.check(tool_id, request_inputs_dict)
+    items = get_tool_pool(tool_id).stream(execute_tracked_tool_stream, tool_id, request_inputs_dict)
+    sample = RequestSample(tool_id, request_inputs_dict)
+    sample.memory_usage = memory_tracker.start(tool_id, request_inputs_dict)
+    return capture_slow_stream(sample, items)
+
+async def capture_slow_stream(sample: RequestSample, items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    outcome = "error"
+    try:
+        async for item in items:
+            yield item
+        outcome = "success"
+    except GeneratorExit:
+        outcome = "cancelled"
+        raise
+    finally:
+        await items.aclose()
+        memory_tracker.finish(sample.memory_usage)
+        slow_requests.finish(sample, outcome)
+
+def execute_tracked_tool_stream(tool_id, request_inputs_dict: Dict[str, Any]) -> Iterator[Any]:
+    current_tool_id.set(str(tool_id))
+    start_attempt_counting()
+    with profiled():
+        yield from execute_tool_stream(tool_id, request_inputs_dict)
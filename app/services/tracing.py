@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.tracers.context import register_configure_hook
+from app.services.logger import setup_logger
+from app.services.request_context import current_tool_id
+
+logger = setup_logger(__name__)
+
+class Trace:
+    """Timings of the stages of one request. Spans may be recorded from several worker threads."""
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[Tuple[str, float]] = []
+        self.events: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, duration: float):
+        with self._lock:
+            self.spans.append((name, duration))
+
+    def count(self, event: str, amount: int = 1):
+        with self._lock:
+            self.events[event] += amount
+
+    def summary(self) -> Dict[str, Tuple[int, float]]:
+        """Number of spans and total seconds per stage name, in order of first appearance."""
+        totals: Dict[str, Tuple[int, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for name, duration in spans:
+            count, total = totals.get(name, (0, 0.0))
+            totals[name] = (count + 1, total + duration)
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [
+            f'{name};dur={total * 1000:.1f}' + (f';desc="{count} calls"' if count > 1 else '')
+            for name, (count, total) in self.summary().items()
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(entries)
+
+class SpanStats:
+    """Process-wide aggregation of span durations per tool and stage."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+
+    def record(self, tool_id: str, name: str, duration: float):
+        with self._lock:
+            stats = self._stats[(tool_id, name)]
+            stats["count"] += 1
+            stats["total_seconds"] += duration
+            stats["max_seconds"] = max(stats["max_seconds"], duration)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        with self._lock:
+            items = [(key, dict(stats)) for key, stats in self._stats.items()]
+        result: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+        for (tool_id, name), stats in items:
+            stats["avg_seconds"] = stats["total_seconds"] / stats["count"]
+            result[tool_id][name] = stats
+        return dict(result)
+
+span_stats = SpanStats()
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+def record_span(name: str, duration: float, trace: Optional[Trace] = None):
+    trace = trace or current_trace.get()
+    if trace is not None:
+        trace.record(name, duration)
+    span_stats.record(current_tool_id.get() or "-", name, duration)
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Times the enclosed block as stage `name` of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+def traced(name: str) -> Callable:
+    """Decorator version of `span`."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count_event(name: str, amount: int = 1):
+    """Adds to counter `name` of the current request, e.g. downloaded bytes or chunks."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.count(name, amount)
+
+def split_documents(splitter, documents: List[Document]) -> List[Document]:
+    """Splits `documents` with a text splitter, timed as the "split" stage, and counts the chunks and their characters."""
+    with span("split"):
+        chunks = splitter.split_documents(documents)
+    count_event("chunks", len(chunks))
+    count_event("document_chars", sum(len(chunk.page_content) for chunk in chunks))
+    return chunks
+
+class SpanCallbackHandler(BaseCallbackHandler):
+    """
+    Records retriever calls, LLM calls and top-level chain invocations as spans.
+
+    Registered as a LangChain configure hook, so every chain a tool invokes while a trace
+    is active reports to it without changes to the tools themselves.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, Tuple[str, float, Optional[Trace], Optional[str]]] = {}
+
+    def _start(self, name: str, run_id: UUID):
+        with self._lock:
+            self._started[run_id] = (name, time.perf_counter(), current_trace.get(), current_tool_id.get())
+
+    def _end(self, run_id: UUID):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        name, start, trace, tool_id = started
+        duration = time.perf_counter() - start
+        if trace is not None:
+            trace.record(name, duration)
+        span_stats.record(tool_id or "-", name, duration)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs: Any):
+        self._start("retrieve", run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs: Any):
+        self._end(run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs: Any):
+        self._end(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs: Any):
+        self._start("llm", run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs: Any):
+        self._start("llm", run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs: Any):
+        self._end(run_id)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs: Any):
+        trace = current_trace.get()
+        if trace is not None:
+            trace.count("llm_retry")
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs: Any):
+        # Only the outermost chain, nested runnables would count the same time many times
+        if parent_run_id is None:
+            self._start("chain", run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs: Any):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs: Any):
+        self._end(run_id)
+
+span_callback_handler = SpanCallbackHandler()
+
+span_handler_var: ContextVar[Optional[SpanCallbackHandler]] = ContextVar("span_callback_handler", default=None)
+register_configure_hook(span_handler_var, inheritable=True)
+
+@contextmanager
+def start_trace() -> Iterator[Trace]:
+    """Starts a trace for the current request; spans recorded in this context and its copies join it."""
+    trace = Trace()
+    trace_token = current_trace.set(trace)
+    handler_token = span_handler_var.set(span_callback_handler)
+    try:
+        yield trace
+    finally:
+        span_handler_var.reset(handler_token)
+        current_trace.reset(trace_token)
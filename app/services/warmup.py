@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from starlette.concurrency import run_in_threadpool
+from app.services.logger import setup_logger
+from app.services.resources import (
+    CHAT_MODELS,
+    EMBEDDING_MODELS,
+    LLM_MODELS,
+    get_chat_model,
+    get_embeddings,
+    get_llm,
+    read_text_resource
+)
+
+logger = setup_logger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT_DIR_NAMES = {"prompt", "prompts", "prompts_for_summarization"}
+
+class WarmupState:
+    """Progress of the startup warm-up, shared between the warm-up thread and the readiness endpoint."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+        self.failures: List[str] = []
+        self.done = threading.Event()
+
+    def start(self) -> bool:
+        with self._lock:
+            if self.started_at is not None:
+                return False
+            self.started_at = time.monotonic()
+            return True
+
+    def fail(self, step: str, error: Exception):
+        with self._lock:
+            self.failures.append(f"{step}: {error}")
+
+    def finish(self):
+        with self._lock:
+            self.finished_at = time.monotonic()
+        self.done.set()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            duration = None
+            if self.started_at is not None:
+                duration = (self.finished_at or time.monotonic()) - self.started_at
+            return {
+                "ready": self.done.is_set(),
+                "warmup_seconds": duration,
+                "failures": list(self.failures)
+            }
+
+warmup_state = WarmupState()
+
+def prompt_files() -> List[str]:
+    paths = []
+    for root, _, files in os.walk(APP_DIR):
+        if os.path.basename(root) in PROMPT_DIR_NAMES:
+            paths.extend(os.path.join(root, name) for name in files if name.endswith(".txt"))
+    return sorted(paths)
+
+def warmup_steps() -> List[tuple]:
+    # Imported here so importing this module does not load every tool
+    from app.tools.utils.tool_utilities import tools_config, get_executor_by_name, get_stream_executor_by_name, get_input_validator
+    from app.assistants.utils.assistants_utilities import assistants_config, get_executor_by_name as get_assistant_executor
+
+    steps = []
+    for tool_id, tool_config in tools_config.items():
+        steps.append((f"{tool_id} executor", lambda path=tool_config['path']: (get_executor_by_name(path), get_stream_executor_by_name(path))))
+        steps.append((f"{tool_id} input validator", lambda tool_id=tool_id: get_input_validator(tool_id)))
+
+    for group in assistants_config.values():
+        for name, assistant_config in group.items():
+            steps.append((f"{name} assistant", lambda path=assistant_config['path']: get_assistant_executor(path)))
+
+    steps.extend((f"prompt {os.path.relpath(path, APP_DIR)}", lambda path=path: read_text_resource(path)) for path in prompt_files())
+
+    steps.extend((f"{model} client", lambda model=model: get_llm(model)) for model in LLM_MODELS)
+    steps.extend((f"{model} chat client", lambda model=model: get_chat_model(model)) for model in CHAT_MODELS)
+    steps.extend((f"{model} embeddings client", lambda model=model: get_embeddings(model)) for model in EMBEDDING_MODELS)
+    return steps
+
+def warm_up(steps: Callable[[], List[tuple]] = warmup_steps):
+    """
+    Loads tool and assistant modules, metadata, prompts and model clients ahead of the first request.
+
+    A failing step is logged and recorded but does not stop the warm-up; the request that
+    needs it will fail the same way it did before. Runs once per process.
+    """
+    if not warmup_state.start():
+        return
+
+    logger.info("Starting warm-up")
+    try:
+        for step, run in steps():
+            try:
+                run()
+            except Exception as e:
+                logger.error(f"Warm-up step failed for {step}: {e}")
+                warmup_state.fail(step, e)
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        warmup_state.fail("warm-up", e)
+    finally:
+        warmup_state.finish()
+
+    status = warmup_state.status()
+    logger.info(f"Warm-up finished in {status['warmup_seconds']:.2f}s with {len(status['failures'])} failures")
+
+async def run_warm_up():
+    await run_in_threadpool(warm_up)
@@ -6,10 +6,10 @@ from langchain_chroma import Chroma
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 from app.services.logger import setup_logger
+from app.services.resources import get_llm, get_embeddings, read_text_resource
+from app.services.ingestion import build_vectorstore
 
 logger = setup_logger(__name__)
 
@@ -19,15 +19,14 @@ def read_text_file(file_path):
 
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
-    
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+
+    return read_text_resource(absolute_file_path)
 
 class AIConnectWithThemGenerator:
     def __init__(self, args=None, vectorstore_class=Chroma, prompt=None, embedding_model=None, model=None, parser=None, verbose=False):
         default_config = {
-            "model": GoogleGenerativeAI(model="gemini-1.5-flash"),
-            "embedding_model": GoogleGenerativeAIEmbeddings(model='models/embedding-001'),
+            "model": get_llm("gemini-1.5-flash"),
+            "embedding_model": get_embeddings('models/embedding-001'),
             "parser": JsonOutputParser(pydantic_object=RecommendationsOutput),
             "prompt": read_text_file("prompt/connect-with-them-prompt.txt"),
             "prompt_without_context": read_text_file("prompt/connect-with-them-without-context-prompt.txt"),
@@ -62,7 +61,7 @@ class AIConnectWithThemGenerator:
 
         if self.runner is None:
             logger.info(f"Creating vectorstore from {len(documents)} documents") if self.verbose else None
-            self.vectorstore = self.vectorstore_class.from_documents(documents, self.embedding_model)
+            self.vectorstore = build_vectorstore(self.vectorstore_class, documents, self.embedding_model)
             logger.info(f"Vectorstore created") if self.verbose else None
 
             self.retriever = self.vectorstore.as_retriever()
@@ -1,21 +1,8 @@
 from langchain_core.documents import Document
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain_community.document_loaders import (
-    YoutubeLoader,
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredURLLoader,
-    UnstructuredPowerPointLoader,
-    Docx2txtLoader,
-    UnstructuredExcelLoader,
-    UnstructuredXMLLoader
-)
-from langchain_google_genai import ChatGoogleGenerativeAI
 from app.utils.allowed_file_extensions import FileType
 from app.api.error_utilities import FileHandlerError, ImageHandlerError
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import GoogleGenerativeAI
 from langchain_core.output_parsers import JsonOutputParser
 from langchain.chains.summarize import load_summarize_chain
 from pydantic import BaseModel, Field
@@ -23,18 +10,22 @@ from app.api.error_utilities import VideoTranscriptError
 from langchain_core.messages import HumanMessage
 from fastapi import HTTPException
 from app.services.logger import setup_logger
+from app.services.resources import get_llm, get_chat_model, read_text_resource
+from app.services.ingestion import load_shared
+from app.services.negative_cache import negative_cache
+from app.services.tracing import span, split_documents
+from app.services.metrics import time_loader
+from app.services.downloads import download_to_file
 import os
 import tempfile
 import uuid
-import requests
-import gdown
 
 STRUCTURED_TABULAR_FILE_EXTENSIONS = {"csv", "xls", "xlsx", "gsheet", "xml"}
 
 logger = setup_logger(__name__)
 
 # AI Model
-model = GoogleGenerativeAI(model="gemini-1.0-pro")
+model = get_llm("gemini-1.0-pro")
 
 splitter = RecursiveCharacterTextSplitter(
     chunk_size = 1000,
@@ -45,7 +36,7 @@ def build_chain(prompt: str):
     prompt_template = read_text_file(prompt)
     summarize_prompt = PromptTemplate.from_template(prompt_template)
 
-    summarize_model = GoogleGenerativeAI(model="gemini-1.5-flash")
+    summarize_model = get_llm("gemini-1.5-flash")
         
     chain = summarize_prompt | summarize_model 
     return chain
@@ -54,7 +45,10 @@ def get_summary(file_url: str, file_type: str, verbose=False):
     file_type = file_type.lower()
     try:
         file_loader = file_loader_map[FileType(file_type)]
-        full_content = file_loader(file_url, verbose)
+        with span("load_documents"), time_loader(file_type):
+            full_content = negative_cache.call(
+                file_url, file_type, lambda: load_shared(("flashcards", file_url, file_type), lambda: file_loader(file_url, verbose))
+            )
         if file_type in STRUCTURED_TABULAR_FILE_EXTENSIONS:
             prompt = r"prompt/summarize-structured-tabular-data-prompt.txt"
         else:
@@ -99,9 +93,8 @@ def read_text_file(file_path):
 
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
-    
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+
+    return read_text_resource(absolute_file_path)
     
 class FileHandler:
     def __init__(self, file_loader, file_extension):
@@ -112,13 +105,8 @@ class FileHandler:
         # Generate a unique filename with a UUID prefix
         unique_filename = f"{uuid.uuid4()}.{self.file_extension}"
 
-        # Download the file from the URL and save it to a temporary file
-        response = requests.get(url)
-        response.raise_for_status()  # Ensure the request was successful
-
-        with tempfile.NamedTemporaryFile(delete=False, prefix=unique_filename) as temp_file:
-            temp_file.write(response.content)
-            temp_file_path = temp_file.name
+        # Stream the file from the URL into a temporary file
+        temp_file_path = download_to_file(url, prefix=unique_filename).path
 
         # Use the file_loader to load the documents
         try:
@@ -128,7 +116,8 @@ class FileHandler:
             raise FileHandlerError(f"No file found", temp_file_path) from e
         
         try:
-            documents = loader.load()
+            with span("parse"):
+                documents = loader.load()
         except Exception as e:
             logger.error(f"File content might be private or unavailable or the URL is incorrect.")
             raise FileHandlerError(f"No file content available", temp_file_path) from e
@@ -139,11 +128,12 @@ class FileHandler:
         return documents
 
 def load_pdf_documents(pdf_url: str, verbose=False):
+    from langchain_community.document_loaders import PyPDFLoader
     pdf_loader = FileHandler(PyPDFLoader, "pdf")
     docs = pdf_loader.load(pdf_url)
 
     if docs:
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found PDF file")
@@ -156,6 +146,7 @@ def load_pdf_documents(pdf_url: str, verbose=False):
         
 
 def load_csv_documents(csv_url: str, verbose=False):
+    from langchain_community.document_loaders.csv_loader import CSVLoader
     csv_loader = FileHandler(CSVLoader, "csv")
     docs = csv_loader.load(csv_url)
 
@@ -170,12 +161,13 @@ def load_csv_documents(csv_url: str, verbose=False):
         return full_content
 
 def load_txt_documents(notes_url: str, verbose=False):
+    from langchain_community.document_loaders import TextLoader
     notes_loader = FileHandler(TextLoader, "txt")
     docs = notes_loader.load(notes_url)
 
     if docs: 
         
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
         
         if verbose:
             logger.info(f"Found TXT file")
@@ -187,12 +179,13 @@ def load_txt_documents(notes_url: str, verbose=False):
         return full_content
 
 def load_md_documents(notes_url: str, verbose=False):
+    from langchain_community.document_loaders import TextLoader
     notes_loader = FileHandler(TextLoader, "md")
     docs = notes_loader.load(notes_url)
     
     if docs:
         
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found MD file")
@@ -204,11 +197,12 @@ def load_md_documents(notes_url: str, verbose=False):
         return full_content
 
 def load_url_documents(url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredURLLoader
     url_loader = UnstructuredURLLoader(urls=[url])
     docs = url_loader.load()
 
     if docs:
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found URL")
@@ -220,12 +214,13 @@ def load_url_documents(url: str, verbose=False):
         return full_content
 
 def load_pptx_documents(pptx_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredPowerPointLoader
     pptx_handler = FileHandler(UnstructuredPowerPointLoader, 'pptx')
 
     docs = pptx_handler.load(pptx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found PPTX file")
@@ -237,11 +232,12 @@ def load_pptx_documents(pptx_url: str, verbose=False):
         return full_content
         
 def load_docx_documents(docx_url: str, verbose=False):
+    from langchain_community.document_loaders import Docx2txtLoader
     docx_handler = FileHandler(Docx2txtLoader, 'docx')
     docs = docx_handler.load(docx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
         
         if verbose:
             logger.info(f"Found DOCX file")
@@ -253,11 +249,12 @@ def load_docx_documents(docx_url: str, verbose=False):
         return full_content
 
 def load_xls_documents(xls_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     xls_handler = FileHandler(UnstructuredExcelLoader, 'xls')
     docs = xls_handler.load(xls_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
         
         if verbose:
             logger.info(f"Found XLS file")
@@ -269,11 +266,12 @@ def load_xls_documents(xls_url: str, verbose=False):
         return full_content
 
 def load_xlsx_documents(xlsx_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     xlsx_handler = FileHandler(UnstructuredExcelLoader, 'xlsx')
     docs = xlsx_handler.load(xlsx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
         
         if verbose:
             logger.info(f"Found XLSX file")
@@ -285,11 +283,12 @@ def load_xlsx_documents(xlsx_url: str, verbose=False):
         return full_content
 
 def load_xml_documents(xml_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredXMLLoader
     xml_handler = FileHandler(UnstructuredXMLLoader, 'xml')
     docs = xml_handler.load(xml_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
         
         if verbose:
             logger.info(f"Found XML file")
@@ -307,6 +306,7 @@ class FileHandlerForGoogleDrive:
         self.file_extension = file_extension
 
     def load(self, url):
+        import gdown
         try:
             with tempfile.TemporaryDirectory() as temp_dir:
                 unique_filename = os.path.join(temp_dir, f"{uuid.uuid4()}.{self.file_extension}")
@@ -314,7 +314,8 @@ class FileHandlerForGoogleDrive:
                 logger.info(f"Downloading file from URL: {url}")
                 
                 try:
-                    gdown.download(url=url, output=unique_filename, fuzzy=True)
+                    with span("download"):
+                        gdown.download(url=url, output=unique_filename, fuzzy=True)
                     logger.info(f"File downloaded successfully to {unique_filename}")
                 except Exception as e:
                     logger.error(e)
@@ -328,7 +329,8 @@ class FileHandlerForGoogleDrive:
                     raise FileHandlerError("No file found", unique_filename) from e
 
                 try:
-                    documents = loader.load()
+                    with span("parse"):
+                        documents = loader.load()
                     logger.info("File loaded successfully.")
                 except Exception as e:
                     logger.error(e)
@@ -341,6 +343,7 @@ class FileHandlerForGoogleDrive:
             raise e
     
 def load_gdocs_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import Docx2txtLoader
 
     gdocs_loader = FileHandlerForGoogleDrive(Docx2txtLoader)
 
@@ -348,7 +351,7 @@ def load_gdocs_documents(drive_folder_url: str, verbose=False):
     
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
         
         if verbose:
             logger.info(f"Found Google Docs files")
@@ -359,11 +362,12 @@ def load_gdocs_documents(drive_folder_url: str, verbose=False):
         return full_content
     
 def load_gsheets_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     gsheets_loader = FileHandlerForGoogleDrive(UnstructuredExcelLoader, 'xlsx')
     docs = gsheets_loader.load(drive_folder_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Sheets files")
@@ -375,11 +379,12 @@ def load_gsheets_documents(drive_folder_url: str, verbose=False):
         return full_content
 
 def load_gslides_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredPowerPointLoader
     gslides_loader = FileHandlerForGoogleDrive(UnstructuredPowerPointLoader, 'pptx')
     docs = gslides_loader.load(drive_folder_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Slides files")
@@ -391,6 +396,7 @@ def load_gslides_documents(drive_folder_url: str, verbose=False):
         return full_content
     
 def load_gpdf_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import PyPDFLoader
 
     gpdf_loader = FileHandlerForGoogleDrive(PyPDFLoader,'pdf')
 
@@ -408,19 +414,25 @@ def load_gpdf_documents(drive_folder_url: str, verbose=False):
 
 
 def summarize_transcript_youtube_url(youtube_url: str, max_video_length=600, verbose=False) -> str:
-    try:
-        loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=False)
-    except Exception as e:
-        logger.error(f"No such video found at {youtube_url}")
-        raise VideoTranscriptError(f"No video found", youtube_url) from e
+    from langchain_community.document_loaders import YoutubeLoader
+
+    def load_transcript():
+        try:
+            loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=False)
+        except Exception as e:
+            logger.error(f"No such video found at {youtube_url}")
+            raise VideoTranscriptError(f"No video found", youtube_url) from e
     
-    try:
-        docs = loader.load()
-    except Exception as e:
-        logger.error(f"Video transcript might be private or unavailable in 'en' or the URL is incorrect.")
-        raise VideoTranscriptError(f"No video transcripts available", youtube_url) from e
+        try:
+            docs = loader.load()
+        except Exception as e:
+            logger.error(f"Video transcript might be private or unavailable in 'en' or the URL is incorrect.")
+            raise VideoTranscriptError(f"No video transcripts available", youtube_url) from e
+        return docs
+
+    docs = negative_cache.call(youtube_url, "youtube_url", load_transcript)
     
-    split_docs = splitter.split_documents(docs)
+    split_docs = split_documents(splitter, docs)
     
     full_transcript = [doc.page_content for doc in split_docs]
     full_transcript = " ".join(full_transcript)
@@ -434,7 +446,7 @@ def summarize_transcript_youtube_url(youtube_url: str, max_video_length=600, ver
     prompt_template = read_text_file(r"prompt/summarize-youtube-video-prompt.txt")
     summarize_prompt = PromptTemplate.from_template(prompt_template)
 
-    summarize_model = GoogleGenerativeAI(model="gemini-1.5-flash")
+    summarize_model = get_llm("gemini-1.5-flash")
     
     chain = summarize_prompt | summarize_model 
     
@@ -457,7 +469,8 @@ file_loader_map = {
     FileType.GPDF: load_gpdf_documents
 }
 
-llm_for_img = ChatGoogleGenerativeAI(model="gemini-1.5-flash")
+def get_image_model():
+    return get_chat_model("gemini-1.5-flash")
 
 def generate_concepts_from_img(img_url, lang):
     parser = JsonOutputParser(pydantic_object=Flashcard)
@@ -474,8 +487,8 @@ def generate_concepts_from_img(img_url, lang):
     )
 
     try:
-        response = llm_for_img.invoke([message]).content
-        logger.info(f"Generated concepts: {response}")
+        response = get_image_model().invoke([message]).content
+        logger.debug("Generated concepts: %s", response)
     except Exception as e:
         logger.error(f"Error processing the request due to Invalid Content or Invalid Image URL")
         raise ImageHandlerError(f"Error processing the request", img_url) from e
@@ -3,6 +3,7 @@ from app.services.schemas import LessonPlanGeneratorArgs
 from app.utils.document_loaders import get_docs
 from app.services.logger import setup_logger
 from app.api.error_utilities import LoaderError, ToolExecutorError
+from app.services.request_context import report_progress
 
 logger = setup_logger()
 
@@ -36,6 +37,7 @@ def executor(grade_level: str,
             if objectives_docs and additional_customization_docs
             else objectives_docs or additional_customization_docs
         )
+        report_progress("Loaded source documents")
 
         lesson_plan_generator_args = LessonPlanGeneratorArgs(
             grade_level=grade_level,
@@ -5,9 +5,9 @@ from langchain_chroma import Chroma
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableParallel
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from app.services.logger import setup_logger
+from app.services.resources import get_llm, get_embeddings
+from app.services.ingestion import build_vectorstore
 
 logger = setup_logger(__name__)
 
@@ -15,8 +15,8 @@ class LessonPlanGeneratorPipeline:
     def __init__(self, args=None, verbose=False):
         self.verbose = verbose
         self.args = args
-        self.model = GoogleGenerativeAI(model="gemini-1.5-pro")
-        self.embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        self.model = get_llm("gemini-1.5-pro")
+        self.embedding_model = get_embeddings("models/embedding-001")
         self.vectorstore_class = Chroma
         self.parsers = {
             "title": JsonOutputParser(pydantic_object=Title),
@@ -38,7 +38,7 @@ class LessonPlanGeneratorPipeline:
     def compile_vectorstore(self, documents: List[Document]):
         if self.verbose:
             logger.info("Creating vectorstore from documents...")
-        self.vectorstore = self.vectorstore_class.from_documents(documents, self.embedding_model)
+        self.vectorstore = build_vectorstore(self.vectorstore_class, documents, self.embedding_model)
         self.retriever = self.vectorstore.as_retriever()
         if self.verbose:
             logger.info("Vectorstore and retriever created successfully.")
@@ -33,3 +33,32 @@ def executor(topic: str,
     
     return output
 
+def stream_executor(topic: str,
+                    n_questions: int,
+                    file_url: str,
+                    file_type: str,
+                    lang: str,
+                    verbose=True):
+    """Streaming variant of `executor` that yields each question as soon as it is generated."""
+    try:
+        if verbose:
+            logger.info(f"File URL loaded: {file_url}")
+
+        if n_questions > 10:
+            # Reported like `executor` does, as the result rather than an exception
+            yield {"message": "error", "data": "Number of questions cannot exceed 10"}
+            return
+
+        docs = get_docs(file_url, file_type, lang, verbose=True)
+
+        yield from QuizBuilder(topic, lang, verbose=verbose).stream_questions(docs, n_questions)
+
+    except LoaderError as e:
+        error_message = e
+        logger.error(f"Error in RAGPipeline -> {error_message}")
+        raise ToolExecutorError(error_message)
+
+    except Exception as e:
+        error_message = f"Error in executor: {e}"
+        logger.error(error_message)
+        raise ValueError(error_message)
@@ -1,5 +1,10 @@
+import json
 import pytest
-from app.tools.multiple_choice_quiz_generator.core import executor
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListLLM
+from app.tools.multiple_choice_quiz_generator.core import executor, stream_executor
+from app.tools.multiple_choice_quiz_generator.tools import QuizBuilder
 
 def test_executor_pdf_url_valid():
 
@@ -323,4 +328,35 @@ def test_executor_gmp3_url_invalid():
             lang="en"
         )
 
-    assert isinstance(exc_info.value, ValueError)
\ No newline at end of file
+    assert isinstance(exc_info.value, ValueError)
+
+def test_stream_questions_yields_each_valid_question():
+    question = {
+        "question": "What is the capital of France?",
+        "choices": [{"key": "A", "value": "Berlin"}, {"key": "B", "value": "Paris"}],
+        "answer": "B",
+        "explanation": "Paris is the capital of France."
+    }
+    builder = QuizBuilder(
+        "geography",
+        model=FakeListLLM(responses=[json.dumps(question)]),
+        embedding_model=DeterministicFakeEmbedding(size=16)
+    )
+
+    stream = builder.stream_questions([Document(page_content="Paris is the capital of France.")], 2)
+    first = next(stream)
+
+    assert first["question"] == question["question"]
+    assert first["choices"] == question["choices"]
+    assert len(list(stream)) == 1
+
+def test_stream_executor_reports_too_many_questions_like_executor():
+    items = list(stream_executor(
+        topic = "college",
+        n_questions = 11,
+        file_url = "https://example.com/sample.pdf",
+        file_type = "pdf",
+        lang = "en"
+    ))
+
+    assert items == [{"message": "error", "data": "Number of questions cannot exceed 10"}]
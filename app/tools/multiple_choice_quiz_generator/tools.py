@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import Iterator, List, Dict
 import os
 
 from langchain_core.documents import Document
@@ -7,10 +7,12 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 from app.services.logger import setup_logger
+from app.services.resources import get_llm, get_embeddings, read_text_resource
+from app.services.ingestion import build_vectorstore
+from app.services.request_context import report_progress
+from app.services.llm_ledger import tool_attempt
 
 relative_path = "tools/multiple_choice_quiz_generator"
 
@@ -39,15 +41,14 @@ def read_text_file(file_path):
 
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
-    
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+
+    return read_text_resource(absolute_file_path)
 
 class QuizBuilder:
     def __init__(self, topic, lang='en', vectorstore_class=Chroma, prompt=None, embedding_model=None, model=None, parser=None, verbose=False):
         default_config = {
-            "model": GoogleGenerativeAI(model="gemini-1.0-pro"),
-            "embedding_model": GoogleGenerativeAIEmbeddings(model='models/embedding-001'),
+            "model": get_llm("gemini-1.0-pro"),
+            "embedding_model": get_embeddings('models/embedding-001'),
             "parser": JsonOutputParser(pydantic_object=QuizQuestion),
             "prompt": read_text_file("prompt/multiple_choice_quiz_generator_prompt.txt"),
             "vectorstore_class": Chroma
@@ -77,7 +78,7 @@ class QuizBuilder:
 
         if self.runner is None:
             logger.info(f"Creating vectorstore from {len(documents)} documents") if self.verbose else None
-            self.vectorstore = self.vectorstore_class.from_documents(documents, self.embedding_model)
+            self.vectorstore = build_vectorstore(self.vectorstore_class, documents, self.embedding_model)
             logger.info(f"Vectorstore created") if self.verbose else None
 
             self.retriever = self.vectorstore.as_retriever()
@@ -115,47 +116,62 @@ class QuizBuilder:
     def format_choices(self, choices: Dict[str, str]) -> List[Dict[str, str]]:
         return [{"key": k, "value": v} for k, v in choices.items()]
     
-    def create_questions(self, documents: List[Document], num_questions: int = 5) -> List[Dict]:
-        if self.verbose: logger.info(f"Creating {num_questions} questions")
-        
-        if num_questions > 10:
-            return {"message": "error", "data": "Number of questions cannot exceed 10"}
-        
+    def stream_questions(self, documents: List[Document], num_questions: int = 5) -> Iterator[Dict]:
+        """Yields each question as soon as it passes validation instead of waiting for the full quiz."""
         chain = self.compile(documents)
         
-        generated_questions = []
+        generated_questions = 0
         attempts = 0
         max_attempts = num_questions * 5  # Allow for more attempts to generate questions
+        # Attempts at the current question, numbered in the LLM ledger
+        question_attempt = 1
 
-        while len(generated_questions) < num_questions and attempts < max_attempts:
-            response = chain.invoke(f"Topic: {self.topic}, Lang: {self.lang}")
-            if self.verbose:
-                logger.info(f"Generated response attempt {attempts + 1}: {response}")
-
-            response = transform_json_dict(response)
-            # Directly check if the response format is valid
-            if self.validate_response(response):
-                response["choices"] = self.format_choices(response["choices"])
-                generated_questions.append(response)
-                if self.verbose:
-                    logger.info(f"Valid question added: {response}")
-                    logger.info(f"Total generated questions: {len(generated_questions)}")
-            else:
-                if self.verbose:
-                    logger.warning(f"Invalid response format. Attempt {attempts + 1} of {max_attempts}")
-            
-            # Move to the next attempt regardless of success to ensure progress
-            attempts += 1
-
-        # Log if fewer questions are generated
-        if len(generated_questions) < num_questions:
-            logger.warning(f"Only generated {len(generated_questions)} out of {num_questions} requested questions")
+        try:
+            while generated_questions < num_questions and attempts < max_attempts:
+                with tool_attempt(question_attempt) as ledger_attempt:
+                    response = chain.invoke(f"Topic: {self.topic}, Lang: {self.lang}")
+                    if self.verbose:
+                        logger.debug("Generated response attempt %d: %s", attempts + 1, response)
+
+                    response = transform_json_dict(response)
+                    # Directly check if the response format is valid
+                    valid = self.validate_response(response)
+                    if not valid:
+                        ledger_attempt.reject("invalid question")
+
+                if valid:
+                    question_attempt = 1
+                    response["choices"] = self.format_choices(response["choices"])
+                    generated_questions += 1
+                    report_progress(f"Generated question {generated_questions} of {num_questions}")
+                    if self.verbose:
+                        logger.debug("Valid question added: %s", response)
+                        logger.info(f"Total generated questions: {generated_questions}")
+                    yield response
+                else:
+                    question_attempt += 1
+                    if self.verbose:
+                        logger.warning(f"Invalid response format. Attempt {attempts + 1} of {max_attempts}")
+                
+                # Move to the next attempt regardless of success to ensure progress
+                attempts += 1
+
+            # Log if fewer questions are generated
+            if generated_questions < num_questions:
+                logger.warning(f"Only generated {generated_questions} out of {num_questions} requested questions")
+
+        finally:
+            if self.verbose: logger.info(f"Deleting vectorstore")
+            self.vectorstore.delete_collection()
+
+    def create_questions(self, documents: List[Document], num_questions: int = 5) -> List[Dict]:
+        if self.verbose: logger.info(f"Creating {num_questions} questions")
         
-        if self.verbose: logger.info(f"Deleting vectorstore")
-        self.vectorstore.delete_collection()
+        if num_questions > 10:
+            return {"message": "error", "data": "Number of questions cannot exceed 10"}
         
         # Return the list of questions
-        return generated_questions[:num_questions]
+        return list(self.stream_questions(documents, num_questions))
 
 class QuestionChoice(BaseModel):
     key: str = Field(description="A unique identifier for the choice using letters A, B, C, or D.")
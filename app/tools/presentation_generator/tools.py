@@ -2,12 +2,12 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 import os
 from app.services.logger import setup_logger
+from app.services.resources import get_llm, get_embeddings, read_text_resource
+from app.services.ingestion import build_vectorstore
 from langchain_chroma import Chroma
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_core.documents import Document
 
 logger = setup_logger(__name__)
@@ -19,14 +19,13 @@ def read_text_file(file_path):
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
 
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+    return read_text_resource(absolute_file_path)
     
 class PresentationGenerator:
     def __init__(self, args=None, vectorstore_class=Chroma, prompt=None, embedding_model=None, model=None, parser=None, verbose=False):
         default_config = {
-            "model": GoogleGenerativeAI(model="gemini-1.5-flash"),
-            "embedding_model": GoogleGenerativeAIEmbeddings(model='models/embedding-001'),
+            "model": get_llm("gemini-1.5-flash"),
+            "embedding_model": get_embeddings('models/embedding-001'),
             "parser": JsonOutputParser(pydantic_object=FullPresentation),
             "prompt": read_text_file("prompt/presentation-generator-prompt.txt"),
             "prompt_without_context": read_text_file("prompt/presentation-generator-without-context-prompt.txt"),
@@ -63,7 +62,7 @@ class PresentationGenerator:
 
         if self.runner is None:
             logger.info(f"Creating vectorstore from {len(documents)} documents") if self.verbose else None
-            self.vectorstore = self.vectorstore_class.from_documents(documents, self.embedding_model)
+            self.vectorstore = build_vectorstore(self.vectorstore_class, documents, self.embedding_model)
             logger.info(f"Vectorstore created") if self.verbose else None
 
             self.retriever = self.vectorstore.as_retriever()
@@ -115,7 +114,7 @@ class PresentationGenerator:
 
         response = chain.invoke(input_parameters)
 
-        logger.info(f"Generated response: {response}")
+        logger.debug("Generated response: %s", response)
 
         if(documents):
             if self.verbose: print(f"Deleting vectorstore")
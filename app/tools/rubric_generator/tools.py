@@ -6,9 +6,10 @@ from langchain_chroma import Chroma
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from app.services.logger import setup_logger
+from app.services.llm_ledger import tool_attempt
+from app.services.resources import get_llm, get_embeddings, read_text_resource
+from app.services.ingestion import build_vectorstore
 
 logger = setup_logger(__name__)
 
@@ -18,15 +19,14 @@ def read_text_file(file_path):
 
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
-    
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+
+    return read_text_resource(absolute_file_path)
     
 class RubricGenerator:
     def __init__(self, args=None, vectorstore_class=Chroma, prompt=None, embedding_model=None, model=None, parser=None, verbose=False):
         default_config = {
-            "model": GoogleGenerativeAI(model="gemini-1.5-flash"),
-            "embedding_model": GoogleGenerativeAIEmbeddings(model='models/embedding-001'),
+            "model": get_llm("gemini-1.5-flash"),
+            "embedding_model": get_embeddings('models/embedding-001'),
             "parser": JsonOutputParser(pydantic_object=RubricOutput),
             "prompt": read_text_file("prompt/rubric-generator-prompt.txt"),
             "prompt_without_context": read_text_file("prompt/rubric-generator-without-context-prompt.txt"),
@@ -63,7 +63,7 @@ class RubricGenerator:
 
         if self.runner is None:
             logger.info(f"Creating vectorstore from {len(documents)} documents") if self.verbose else None
-            self.vectorstore = self.vectorstore_class.from_documents(documents, self.embedding_model)
+            self.vectorstore = build_vectorstore(self.vectorstore_class, documents, self.embedding_model)
             logger.info(f"Vectorstore created") if self.verbose else None
 
             self.retriever = self.vectorstore.as_retriever()
@@ -117,21 +117,26 @@ class RubricGenerator:
         max_attempt = 6
 
         while attempt < max_attempt:
-            try:
-                response = chain.invoke(input_parameters)
-                logger.info(f"Rubric generated during attempt nb: {attempt}")
-            except Exception as e:
-                logger.error(f"Error during rubric generation: {str(e)}")
-                attempt += 1
-                continue
-            if response == None:
-                logger.error(f"could not generate Rubric, trying again")
-                attempt += 1
-                continue
-
-            if self.validate_rubric(response) == False:
-                attempt += 1
-                continue
+            # Numbers the LLM calls of this attempt in the ledger and records rejected outputs
+            with tool_attempt(attempt) as ledger_attempt:
+                try:
+                    response = chain.invoke(input_parameters)
+                    logger.info(f"Rubric generated during attempt nb: {attempt}")
+                except Exception as e:
+                    logger.error(f"Error during rubric generation: {str(e)}")
+                    ledger_attempt.reject(type(e).__name__)
+                    attempt += 1
+                    continue
+                if response == None:
+                    logger.error(f"could not generate Rubric, trying again")
+                    ledger_attempt.reject("empty response")
+                    attempt += 1
+                    continue
+
+                if self.validate_rubric(response) == False:
+                    ledger_attempt.reject("invalid rubric")
+                    attempt += 1
+                    continue
 
             # If everything is valid, break the outer loop
             break
@@ -7,6 +7,7 @@ from app.utils.document_loaders_summarization import (
     get_summary
 )
 from app.api.error_utilities import SyllabusGeneratorError
+from app.services.request_context import report_progress
 from app.services.schemas import SyllabusGeneratorArgsModel
 
 logger = setup_logger()
@@ -36,6 +37,8 @@ def executor(grade_level: str,
             summary = summarize_transcript_youtube_url(file_url, verbose=verbose)
         else:
             summary = get_summary(file_url, file_type, verbose=verbose)
+
+        report_progress("Summarized source material")
     
         syllabus_args_model = SyllabusGeneratorArgsModel(
             grade_level = grade_level,
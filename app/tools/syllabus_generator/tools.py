@@ -1,8 +1,8 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict
 from app.services.logger import setup_logger
+from app.services.resources import get_llm
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import GoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableParallel
 from app.services.schemas import SyllabusGeneratorArgsModel
@@ -42,7 +42,7 @@ class SyllabusRequestArgs:
 class SyllabusGeneratorPipeline:
     def __init__(self, verbose=False):
         self.verbose = verbose
-        self.model = GoogleGenerativeAI(model="gemini-1.5-pro")
+        self.model = get_llm("gemini-1.5-pro")
         self.parsers = {
             "course_information": JsonOutputParser(pydantic_object=CourseInformation),
             "course_description_objectives": JsonOutputParser(pydantic_object=CourseDescriptionObjectives),
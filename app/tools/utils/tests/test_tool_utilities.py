@@ -0,0 +1,52 @@
+import pytest
+from app.api.error_utilities import InputValidationError
+from app.services.tool_registry import ToolFile, ToolInput
+from app.tools.utils.tool_utilities import InputValidator, finalize_tool_inputs, get_input_validator
+
+VALIDATE_DATA = [
+    {"name": "topic", "type": "text"},
+    {"name": "n_questions", "type": "number"},
+    {"name": "files", "type": "file"},
+]
+
+def test_validator_coerces_numbers_and_files():
+    validator = InputValidator(VALIDATE_DATA)
+
+    inputs = validator.validate({
+        "topic": "Algebra",
+        "n_questions": "5",
+        "files": [{"url": "https://example.com/a.pdf"}],
+        "extra": "kept"
+    })
+
+    assert inputs["n_questions"] == 5
+    assert inputs["files"] == [ToolFile(url="https://example.com/a.pdf")]
+    assert inputs["extra"] == "kept"
+    assert validator.validate({"topic": "a", "n_questions": "2.5", "files": []})["n_questions"] == 2.5
+
+@pytest.mark.parametrize("inputs, message", [
+    ({"topic": "a", "files": []}, "Missing input: `n_questions`"),
+    ({"topic": 1, "n_questions": 1, "files": []}, "Input `topic` must be a string"),
+    ({"topic": "a", "n_questions": "many", "files": []}, "Input `n_questions` must be a number"),
+    ({"topic": "a", "n_questions": "nan", "files": []}, "Input `n_questions` must be a number"),
+    ({"topic": "a", "n_questions": 1, "files": "a.pdf"}, "must be a list of file dictionaries"),
+    ({"topic": "a", "n_questions": 1, "files": ["a.pdf"]}, "must be a dictionary representing a file"),
+    ({"topic": "a", "n_questions": 1, "files": [{"filename": "a.pdf"}]}, "must be a valid ToolFile"),
+])
+def test_validator_errors(inputs, message):
+    with pytest.raises(InputValidationError) as exc_info:
+        InputValidator(VALIDATE_DATA).validate(inputs)
+
+    assert message in exc_info.value.message
+
+def test_finalize_tool_inputs_uses_cached_validator():
+    inputs = [
+        ToolInput(name="topic", value="Algebra"),
+        ToolInput(name="n_questions", value="3"),
+        ToolInput(name="file_url", value="https://example.com/a.pdf"),
+        ToolInput(name="file_type", value="pdf"),
+        ToolInput(name="lang", value="en"),
+    ]
+
+    assert finalize_tool_inputs("multiple-choice-quiz-generator", inputs)["n_questions"] == 3
+    assert get_input_validator("multiple-choice-quiz-generator") is get_input_validator("multiple-choice-quiz-generator")
@@ -1,11 +1,14 @@
 import json
+import math
 import os
+from functools import lru_cache
 from app.services.logger import setup_logger
 from app.services.tool_registry import ToolFile
+from app.services.metrics import count_tool_error
 from app.api.error_utilities import VideoTranscriptError, InputValidationError, ToolExecutorError
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 from fastapi import HTTPException
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
 logger = setup_logger(__name__)
 
@@ -24,7 +27,18 @@ def get_executor_by_name(module_path):
         logger.error(f"Failed to import executor from {module_path}: {str(e)}")
         raise ImportError(f"Failed to import module from {module_path}: {str(e)}")
 
+def get_stream_executor_by_name(module_path):
+    # Tools without a streaming executor return None and are streamed as a single item
+    try:
+        module = __import__('app.'+module_path, fromlist=['stream_executor'])
+        return getattr(module, 'stream_executor', None)
+    except Exception as e:
+        logger.error(f"Failed to import stream executor from {module_path}: {str(e)}")
+        raise ImportError(f"Failed to import module from {module_path}: {str(e)}")
+
+@lru_cache(maxsize=None)
 def load_tool_metadata(tool_id):
+    # Cached for the life of the process; callers must treat the returned metadata as read-only
     logger.debug(f"Loading tool metadata for tool_id: {tool_id}")
     tool_config = tools_config.get(str(tool_id))
     
@@ -51,75 +65,115 @@ def load_tool_metadata(tool_id):
     with open(file_path, 'r') as f:
         metadata = json.load(f)
         
-    logger.debug(f"Loaded metadata: {metadata}")
+    logger.debug("Loaded metadata: %s", metadata)
     return metadata
 
 def prepare_input_data(input_data) -> Dict[str, Any]:
     inputs = {input.name: input.value for input in input_data}
     return inputs
 
-def check_missing_inputs(request_data: Dict[str, Any], validate_inputs: Dict[str, str]):
-    for validate_input_name in validate_inputs:
-        if validate_input_name not in request_data:
-            error_message = f"Missing input: `{validate_input_name}`"
-            logger.error(error_message)
-            raise InputValidationError(error_message)
-
 def raise_type_error(input_name: str, input_value: Any, expected_type: str):
     error_message = f"Input `{input_name}` must be a {expected_type} but got {type(input_value)}"
     logger.error(error_message)
     raise InputValidationError(error_message)
 
-def validate_file_input(input_name: str, input_value: Any):
+def check_text(input_name: str, input_value: Any) -> Any:
+    if not isinstance(input_value, str):
+        raise_type_error(input_name, input_value, "string")
+    return input_value
+
+def check_number(input_name: str, input_value: Any) -> Any:
+    if isinstance(input_value, (int, float)):
+        return input_value
+    # Form fields often arrive as strings, accept "5" or "2.5" for number inputs
+    if isinstance(input_value, str):
+        try:
+            return int(input_value)
+        except ValueError:
+            pass
+        try:
+            number = float(input_value)
+            if math.isfinite(number):
+                return number
+        except ValueError:
+            pass
+    raise_type_error(input_name, input_value, "number")
+
+tool_files_adapter = TypeAdapter(List[ToolFile])
+
+def check_files(input_name: str, input_value: Any) -> Any:
     if not isinstance(input_value, list):
         error_message = f"Input `{input_name}` must be a list of file dictionaries but got {type(input_value)}"
         logger.error(error_message)
         raise InputValidationError(error_message)
-    
-    for file_obj in input_value:
-        if not isinstance(file_obj, dict):
+
+    # The whole list is validated in one call instead of one model per file
+    try:
+        return tool_files_adapter.validate_python(input_value)
+    except ValidationError as e:
+        error = e.errors()[0]
+        if error['type'] == 'model_type':
+            file_obj = input_value[error['loc'][0]]
             error_message = f"Each item in the input `{input_name}` must be a dictionary representing a file but got {type(file_obj)}"
-            logger.error(error_message)
-            raise InputValidationError(error_message)
-        try:
-            ToolFile.model_validate(file_obj, from_attributes=True)  # This will raise a validation error if the structure is incorrect
-        except ValidationError:
+        else:
             error_message = f"Each item in the input `{input_name}` must be a valid ToolFile where a URL is provided"
-            logger.error(error_message)
-            raise InputValidationError(error_message)
+        logger.error(error_message)
+        raise InputValidationError(error_message)
 
-def validate_input_type(input_name: str, input_value: Any, expected_type: str):
-    if expected_type == 'text' and not isinstance(input_value, str):
-        raise_type_error(input_name, input_value, "string")
-    elif expected_type == 'number' and not isinstance(input_value, (int, float)):
-        raise_type_error(input_name, input_value, "number")
-    elif expected_type == 'file':
-        validate_file_input(input_name, input_value)
+INPUT_TYPE_CHECKS = {
+    'text': check_text,
+    'number': check_number,
+    'file': check_files,
+}
+
+class InputValidator:
+    """
+    Validation plan for a tool's inputs, compiled from the `inputs` section of its metadata.
+
+    Validating checks that every declared input is present, then checks and coerces each
+    declared input in a single pass. Inputs that are not declared are passed through.
+    """
+    def __init__(self, validate_data: List[Dict[str, str]]):
+        self.required = tuple(input_item['name'] for input_item in validate_data)
+        self.checks = {
+            input_item['name']: INPUT_TYPE_CHECKS[input_item['type']]
+            for input_item in validate_data
+            if input_item['type'] in INPUT_TYPE_CHECKS
+        }
+
+    def validate(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        for input_name in self.required:
+            if input_name not in request_data:
+                error_message = f"Missing input: `{input_name}`"
+                logger.error(error_message)
+                raise InputValidationError(error_message)
+
+        return {
+            input_name: self.checks[input_name](input_name, input_value) if input_name in self.checks else input_value
+            for input_name, input_value in request_data.items()
+        }
+
+@lru_cache(maxsize=None)
+def get_input_validator(tool_id) -> InputValidator:
+    return InputValidator(load_tool_metadata(tool_id)['inputs'])
 
 def validate_inputs(request_data: Dict[str, Any], validate_data: List[Dict[str, str]]) -> bool:
-    validate_inputs = {input_item['name']: input_item['type'] for input_item in validate_data}
-    
-    # Check for missing inputs
-    check_missing_inputs(request_data, validate_inputs)
-
-    # Validate each input in request data against validate definitions
-    for input_name, input_value in request_data.items():
-        if input_name not in validate_inputs:
-            continue  # Skip validation for extra inputs not defined in validate_inputs
-
-        expected_type = validate_inputs[input_name]
-        validate_input_type(input_name, input_value, expected_type)
-
+    InputValidator(validate_data).validate(request_data)
     return True
 
 def convert_files_to_tool_files(inputs: Dict[str, Any]) -> Dict[str, Any]:
     if 'files' in inputs:
-        inputs['files'] = [ToolFile(**file_object) for file_object in inputs['files']]
+        inputs['files'] = [file_object if isinstance(file_object, ToolFile) else ToolFile(**file_object) for file_object in inputs['files']]
     return inputs
 
 def finalize_inputs(input_data, validate_data: List[Dict[str, str]]) -> Dict[str, Any]:
-    inputs = prepare_input_data(input_data)
-    validate_inputs(inputs, validate_data)
+    inputs = InputValidator(validate_data).validate(prepare_input_data(input_data))
+    inputs = convert_files_to_tool_files(inputs)
+    return inputs
+
+def finalize_tool_inputs(tool_id, input_data) -> Dict[str, Any]:
+    """Like `finalize_inputs`, using the tool's cached validator so no metadata is read per request."""
+    inputs = get_input_validator(str(tool_id)).validate(prepare_input_data(input_data))
     inputs = convert_files_to_tool_files(inputs)
     return inputs
 
@@ -136,17 +190,59 @@ def execute_tool(tool_id, request_inputs_dict):
         return execute_function(**request_inputs_dict)
     
     except VideoTranscriptError as e:
+        count_tool_error(tool_id, e)
+        logger.error(f"Failed to execute tool due to video transcript error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except ToolExecutorError as e:
+        count_tool_error(tool_id, e)
+        logger.error(f"Failed to execute tool due to executor error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except ImportError as e:
+        count_tool_error(tool_id, e)
+        logger.error(f"Failed to execute tool due to import error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    except Exception as e:
+        count_tool_error(tool_id, e)
+        logger.error(f"Encountered error in executing tool: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def execute_tool_stream(tool_id, request_inputs_dict) -> Iterator[Any]:
+    try:
+        tool_config = tools_config.get(str(tool_id))
+        
+        if not tool_config:
+            raise HTTPException(status_code=404, detail="Tool executable not found")
+
+        stream_function = get_stream_executor_by_name(tool_config['path'])
+        request_inputs_dict['verbose'] = True
+
+        if stream_function is None:
+            yield get_executor_by_name(tool_config['path'])(**request_inputs_dict)
+        else:
+            yield from stream_function(**request_inputs_dict)
+    
+    except HTTPException:
+        raise
+    
+    except VideoTranscriptError as e:
+        count_tool_error(tool_id, e)
         logger.error(f"Failed to execute tool due to video transcript error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     
     except ToolExecutorError as e:
+        count_tool_error(tool_id, e)
         logger.error(f"Failed to execute tool due to executor error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     
     except ImportError as e:
+        count_tool_error(tool_id, e)
         logger.error(f"Failed to execute tool due to import error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
     except Exception as e:
+        count_tool_error(tool_id, e)
         logger.error(f"Encountered error in executing tool: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
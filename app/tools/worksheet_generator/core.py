@@ -1,33 +1,66 @@
 from typing import List
 from app.services.logger import setup_logger
 from app.tools.worksheet_generator.tools import (
-    generate_course_type, 
-    worksheet_generator, 
+    generate_course_type,
+    stream_worksheet_generator,
+    worksheet_generator,
     worksheet_question_type_generator
 )
 from app.utils.document_loaders import get_docs
+from app.services.request_context import report_progress
 
 logger = setup_logger()
 
-def executor(grade_level: str,
-             topic: str,
-             file_url: str,
-             file_type: str,
-             lang: str,
-             verbose=True):
+def prepare_worksheet(grade_level: str,
+                      topic: str,
+                      file_url: str,
+                      file_type: str,
+                      lang: str,
+                      verbose=True):
 
     course_type = generate_course_type(topic, verbose)['course_type']
+    report_progress(f"Identified course type: {course_type}")
 
     if verbose:
         logger.info(f"Course Type: {course_type} [{lang}]")
         logger.info(f"File URL loaded: {file_url}")
 
     docs = get_docs(file_url, file_type, verbose)
+    report_progress("Loaded source document")
 
     worksheet_list = worksheet_question_type_generator(course_type=course_type,
                                                        grade_level=grade_level,
                                                        documents=docs,
                                                        verbose=verbose)
+    report_progress("Selected worksheet question types")
+
+    return course_type, docs, worksheet_list
+
+def stream_executor(grade_level: str,
+                    topic: str,
+                    file_url: str,
+                    file_type: str,
+                    lang: str,
+                    verbose=True):
+    """Streaming variant of `executor` that yields each question type group as soon as it is generated."""
+    course_type, docs, worksheet_list = prepare_worksheet(grade_level, topic, file_url, file_type, lang, verbose)
+
+    for question_type, questions in stream_worksheet_generator(course_type=course_type,
+                                                               grade_level=grade_level,
+                                                               worksheet_list=worksheet_list,
+                                                               documents=docs,
+                                                               lang=lang,
+                                                               verbose=verbose):
+        yield {"question_type": question_type, "questions": questions}
+
+def executor(grade_level: str,
+             topic: str,
+             file_url: str,
+             file_type: str,
+             lang: str,
+             verbose=True):
+
+    course_type, docs, worksheet_list = prepare_worksheet(grade_level, topic, file_url, file_type, lang, verbose)
 
     worksheet = worksheet_generator(course_type=course_type, 
                                     grade_level=grade_level, 
@@ -37,4 +70,4 @@ def executor(grade_level: str,
                                     verbose=verbose)
 
     logger.info(f"Generated Worksheet: {worksheet}")
-    return worksheet
\ No newline at end of file
+    return worksheet
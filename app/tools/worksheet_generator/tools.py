@@ -1,5 +1,6 @@
 from app.services.logger import setup_logger
-from langchain_google_genai import GoogleGenerativeAI
+from app.services.resources import get_llm, get_embeddings, read_text_resource
+from app.services.ingestion import build_vectorstore
 from langchain_core.output_parsers import JsonOutputParser
 import os
 from langchain_core.prompts import PromptTemplate
@@ -9,9 +10,10 @@ from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 from app.services.schemas import WorksheetQuestionModel
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
+from app.services.request_context import ContextThreadPoolExecutor
 from fastapi import HTTPException
+from app.services.request_context import report_progress
 import threading
 
 logger = setup_logger()
@@ -22,9 +24,8 @@ def read_text_file(file_path):
 
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
-    
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+
+    return read_text_resource(absolute_file_path)
 
 class BaseGenerator:
     def __init__(self, prompt=None, model=None, parser=None, verbose: bool = False):
@@ -43,7 +44,7 @@ class BaseGenerator:
 class CourseTypeGenerator(BaseGenerator):
     def get_default_config(self):
         return {
-            "model": GoogleGenerativeAI(model="gemini-1.5-flash"),
+            "model": get_llm("gemini-1.5-flash"),
             "parser": JsonOutputParser(pydantic_object=CourseTypeSchema),
             "prompt": read_text_file("prompts/generate-topic-prompt.txt")
         }
@@ -75,11 +76,11 @@ class WorksheetQuestionTypeGenerator(BaseGenerator):
 
     def get_default_config(self):
         return {
-            "model": GoogleGenerativeAI(model="gemini-1.5-pro"),
+            "model": get_llm("gemini-1.5-pro"),
             "parser": JsonOutputParser(pydantic_object=WorksheetQuestionModel),
             "prompt": read_text_file("prompts/generate-worksheet-question-types-prompt.txt"),
             "vectorstore_class": Chroma,
-            "embedding_model": GoogleGenerativeAIEmbeddings(model='models/embedding-001')
+            "embedding_model": get_embeddings('models/embedding-001')
         }
 
     def compile(self, documents):
@@ -91,7 +92,7 @@ class WorksheetQuestionTypeGenerator(BaseGenerator):
         )
         if self.runner is None:
             logger.info(f"Creating vectorstore from {len(documents)} documents") if self.verbose else None
-            self.vectorstore = self.vectorstore_class.from_documents(documents, self.embedding_model)
+            self.vectorstore = build_vectorstore(self.vectorstore_class, documents, self.embedding_model)
             logger.info(f"Vectorstore created") if self.verbose else None
 
             self.retriever = self.vectorstore.as_retriever()
@@ -129,11 +130,11 @@ class WorksheetGenerator(BaseGenerator):
 
     def get_default_config(self):
         return {
-            "model": GoogleGenerativeAI(model="gemini-1.5-pro"),
+            "model": get_llm("gemini-1.5-pro"),
             "parser": self.get_parser_for_question_type(),
             "prompt": read_text_file("prompts/generate-worksheet-prompt.txt"),
             "vectorstore_class": Chroma,
-            "embedding_model": GoogleGenerativeAIEmbeddings(model='models/embedding-001')
+            "embedding_model": get_embeddings('models/embedding-001')
         }
 
     def get_parser_for_question_type(self):
@@ -165,7 +166,7 @@ class WorksheetGenerator(BaseGenerator):
         with self.vectorstore_lock:
             if self.runner is None:  
                 logger.info(f"Creating vectorstore from {len(documents)} documents") if self.verbose else None
-                self.vectorstore = self.vectorstore_class.from_documents(documents, self.embedding_model)
+                self.vectorstore = build_vectorstore(self.vectorstore_class, documents, self.embedding_model)
                 logger.info("Vectorstore created") if self.verbose else None
 
                 self.retriever = self.vectorstore.as_retriever()
@@ -205,14 +206,14 @@ def worksheet_question_type_generator(course_type, grade_level, documents, verbo
     worksheet_question_type_generator = WorksheetQuestionTypeGenerator(verbose=verbose)
     chain = worksheet_question_type_generator.compile(documents)
     result = chain.invoke(attribute_collection)
-    logger.info(f"The question types are successfully generated: {result}") if verbose else None
+    logger.debug("The question types are successfully generated: %s", result) if verbose else None
     if verbose: logger.info(f"Deleting vectorstore")
     worksheet_question_type_generator.vectorstore.delete_collection()
     return result
 
-def worksheet_generator(course_type, grade_level, worksheet_list, documents, lang, verbose):
+def stream_worksheet_generator(course_type, grade_level, worksheet_list, documents, lang, verbose):
+    """Yields `(question_type, questions)` for each question type as soon as its generation finishes."""
     print(worksheet_list)
-    results = {}
     worksheet_generator = WorksheetGenerator(question_type="default", lang=lang, verbose=verbose)
 
     def generate_questions(worksheet):
@@ -247,7 +248,8 @@ def worksheet_generator(course_type, grade_level, worksheet_list, documents, lan
 
         return question_type, generated_questions
 
-    with ThreadPoolExecutor() as executor:
+    with ContextThreadPoolExecutor() as executor:
+        # Each worker runs in a copy of the request context, so logs, spans and shared ingestion follow it
         future_to_question_type = {executor.submit(generate_questions, worksheet): worksheet['question_type']
                                    for worksheet in worksheet_list['worksheet_question_list']}
 
@@ -255,11 +257,15 @@ def worksheet_generator(course_type, grade_level, worksheet_list, documents, lan
             question_type = future_to_question_type[future]
             try:
                 _, generated_questions = future.result()
-                results[question_type] = generated_questions
             except Exception as exc:
                 logger.error(f"An error occurred while generating questions for {question_type}: {exc}")
+                continue
+
+            report_progress(f"Generated {len(generated_questions)} {question_type} questions")
+            yield question_type, generated_questions
 
-    return results
+def worksheet_generator(course_type, grade_level, worksheet_list, documents, lang, verbose):
+    return dict(stream_worksheet_generator(course_type, grade_level, worksheet_list, documents, lang, verbose))
  
 class CourseTypeSchema(BaseModel):
     course_type: str = Field(description=""" The course type of a specific topic. It must be exactly only one of the following:
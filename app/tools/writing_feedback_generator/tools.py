@@ -5,9 +5,9 @@ from langchain_chroma import Chroma
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableParallel
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from app.services.logger import setup_logger
+from app.services.resources import get_llm, get_embeddings
+from app.services.ingestion import build_vectorstore
 
 logger = setup_logger(__name__)
 
@@ -25,7 +25,7 @@ class WritingFeedbackGeneratorPipeline:
     def __init__(self, args=None, verbose=False):
         self.verbose = verbose
         self.args = args
-        self.model = GoogleGenerativeAI(model="gemini-1.5-pro")
+        self.model = get_llm("gemini-1.5-pro")
         self.vectorstore_class = Chroma
         self.parsers = {
             "areas_of_strength": JsonOutputParser(pydantic_object=FeedbackSection),
@@ -38,7 +38,7 @@ class WritingFeedbackGeneratorPipeline:
     def compile_vectorstore(self, documents: List[Document]):
         if self.verbose:
             logger.info("Creating vectorstore from documents...")
-        self.vectorstore = self.vectorstore_class.from_documents(documents, GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+        self.vectorstore = build_vectorstore(self.vectorstore_class, documents, get_embeddings("models/embedding-001"))
         self.retriever = self.vectorstore.as_retriever()
         if self.verbose:
             logger.info("Vectorstore and retriever created successfully.")
@@ -1,24 +1,169 @@
 from fastapi import HTTPException, Header
 from google.cloud import secretmanager
+from typing import Callable, FrozenSet, Iterable, Optional
+from app.services.logger import setup_logger
+import threading
+import hmac
+import time
 import os
 
+logger = setup_logger(__name__)
+
+DEFAULT_CREDENTIAL_TTL = 300
+# How long a failed first load is reported again before the source is asked anew
+DEFAULT_CREDENTIAL_RETRY_SECONDS = 10
+
+_secret_client = None
+_secret_client_lock = threading.Lock()
+
+def get_secret_client():
+    """Shared Secret Manager client; building one per call costs a channel setup each time."""
+    global _secret_client
+    with _secret_client_lock:
+        if _secret_client is None:
+            _secret_client = secretmanager.SecretManagerServiceClient()
+        return _secret_client
+
 def access_secret_file(secret_id, version_id="latest"):
     """
     Access a secret file in Google Cloud Secret Manager and parse it.
     """
     project_id = os.environ.get('PROJECT_ID')
-    client = secretmanager.SecretManagerServiceClient()
+    client = get_secret_client()
     name = f"projects/{project_id}/secrets/{secret_id}/versions/{version_id}"
     response = client.access_secret_version(name=name)
     return response.payload.data.decode("UTF-8")
 
+def parse_keys(value: str) -> FrozenSet[str]:
+    """Splits a secret holding one key per line (or comma separated) into the set of valid keys."""
+    return frozenset(key.strip() for key in value.replace(",", "\n").splitlines() if key.strip())
+
+class CredentialCache:
+    """
+    Keeps the currently valid API keys in memory.
+
+    Keys are fetched once and then refreshed in a background thread after `ttl` seconds,
+    so requests never wait on the credential source after the first load. Several keys can
+    be valid at the same time, which allows rotating a key without downtime. If a refresh
+    fails the previous keys stay in use. If the first load fails, requests fail straight
+    away for `retry_seconds` instead of each calling the credential source again.
+    """
+    def __init__(self, fetch: Callable[[], Iterable[str]], ttl: int = DEFAULT_CREDENTIAL_TTL,
+                 retry_seconds: float = DEFAULT_CREDENTIAL_RETRY_SECONDS):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        # Held during the first load, so concurrent requests wait for one fetch
+        self._first_load_lock = threading.Lock()
+        self._keys: Optional[FrozenSet[bytes]] = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._failed_at: Optional[float] = None
+        self._failure: Optional[str] = None
+
+    def _load(self) -> FrozenSet[bytes]:
+        keys = frozenset(key.encode("utf-8") for key in self.fetch())
+        if not keys:
+            raise ValueError("Credential source returned no keys")
+        with self._lock:
+            self._keys = keys
+            self._loaded_at = time.monotonic()
+        return keys
+
+    def _refresh(self):
+        try:
+            self._load()
+            logger.info("Refreshed API credentials")
+        except Exception as e:
+            logger.error(f"Failed to refresh API credentials, keeping the previous keys: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def keys(self) -> FrozenSet[bytes]:
+        with self._lock:
+            keys = self._keys
+            stale = keys is not None and time.monotonic() - self._loaded_at > self.ttl
+            start_refresh = stale and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+
+        if keys is None:
+            return self._first_load()
+
+        if start_refresh:
+            threading.Thread(target=self._refresh, name="credential-refresh", daemon=True).start()
+
+        return keys
+
+    def _first_load(self) -> FrozenSet[bytes]:
+        with self._first_load_lock:
+            with self._lock:
+                if self._keys is not None:
+                    return self._keys
+                if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+                    raise RuntimeError(f"Credential source unavailable, retrying within {self.retry_seconds:g}s: {self._failure}")
+
+            try:
+                return self._load()
+            except Exception as e:
+                with self._lock:
+                    self._failed_at = time.monotonic()
+                    self._failure = str(e)
+                raise
+
+    def verify(self, api_key: Optional[str]) -> bool:
+        keys = self.keys()
+        if api_key is None:
+            return False
+        candidate = api_key.encode("utf-8")
+        # Compare against every key so the time taken does not reveal which one matched
+        matched = False
+        for key in keys:
+            matched |= hmac.compare_digest(candidate, key)
+        return matched
+
+def create_credential_cache() -> CredentialCache:
+    """
+    Credentials come from API_KEYS (comma separated) or API_KEYS_FILE when set, from
+    Secret Manager in production, and are the fixed "dev" key otherwise.
+    """
+    ttl = int(os.environ.get('CREDENTIAL_TTL', DEFAULT_CREDENTIAL_TTL))
+    retry_seconds = float(os.environ.get('CREDENTIAL_RETRY_SECONDS', DEFAULT_CREDENTIAL_RETRY_SECONDS))
+
+    if os.environ.get('API_KEYS'):
+        return CredentialCache(lambda: parse_keys(os.environ['API_KEYS']), ttl, retry_seconds)
+
+    if os.environ.get('API_KEYS_FILE'):
+        def read_keys_file():
+            with open(os.environ['API_KEYS_FILE'], 'r') as file:
+                return parse_keys(file.read())
+        return CredentialCache(read_keys_file, ttl, retry_seconds)
+
+    if os.environ['ENV_TYPE'] == "production":
+        return CredentialCache(lambda: parse_keys(access_secret_file("backend-access")), ttl, retry_seconds)
+
+    return CredentialCache(lambda: ["dev"], ttl, retry_seconds)
+
+_credential_cache: Optional[CredentialCache] = None
+_credential_cache_lock = threading.Lock()
+
+def get_credential_cache() -> CredentialCache:
+    global _credential_cache
+    with _credential_cache_lock:
+        if _credential_cache is None:
+            _credential_cache = create_credential_cache()
+        return _credential_cache
+
 # Function to ensure incoming request is from controller with key
 def key_check(api_key: str = Header(None)):
-  
-  if os.environ['ENV_TYPE'] == "production":
-    set_key = access_secret_file("backend-access")
-  else:
-    set_key = "dev"
-  
-  if api_key is None or api_key != set_key:
-    raise HTTPException(status_code=401, detail="Invalid API Request Key")
\ No newline at end of file
+
+  try:
+    valid = get_credential_cache().verify(api_key)
+  except Exception as e:
+    logger.error(f"Failed to load API credentials: {e}")
+    raise HTTPException(status_code=503, detail="Unable to verify API Request Key")
+
+  if not valid:
+    raise HTTPException(status_code=401, detail="Invalid API Request Key")
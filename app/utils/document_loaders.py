@@ -1,32 +1,34 @@
-from langchain_community.document_loaders import YoutubeLoader, PyPDFLoader, TextLoader, UnstructuredURLLoader, UnstructuredPowerPointLoader, Docx2txtLoader, UnstructuredExcelLoader, UnstructuredXMLLoader
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain_google_genai import ChatGoogleGenerativeAI
 from app.utils.allowed_file_extensions import FileType
-from app.api.error_utilities import FileHandlerError, ImageHandlerError
+from app.api.error_utilities import DownloadError, FileHandlerError, HTMLContentError, ImageHandlerError
 from app.api.error_utilities import VideoTranscriptError
 from langchain_core.messages import HumanMessage
 from app.services.logger import setup_logger
+from app.services.resources import get_chat_model, read_text_resource
+from app.services.ingestion import load_shared
+from app.services.negative_cache import negative_cache
+from app.services.tracing import span, traced, split_documents
+from app.services.metrics import time_loader
+from app.services.downloads import download_to_file
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from pydub import AudioSegment
-from google.cloud import speech
-from google.cloud.speech import RecognitionAudio, RecognitionConfig
-from google.cloud import speech_v1p1beta1 as speech
 from dotenv import load_dotenv, find_dotenv
-import speech_recognition as sr
 import tempfile
 import uuid
 import requests
-import gdown
 import shutil
 import io
 import os
 import base64
+from typing import Optional
 
 load_dotenv(find_dotenv())
 
 STRUCTURED_TABULAR_FILE_EXTENSIONS = {"csv", "xls", "xlsx", "gsheet", "xml"}
+# File URLs of these types may turn out to be a web page, which is then loaded as a URL
 FILE_TYPES_TO_CHECK = {'pdf', 'csv', 'txt', 'pptx'}
+# Lower case, they are compared with the lowered first bytes of the body
+FILE_SIGNATURES = {"pdf": (b"%pdf-",), "pptx": (b"pk\x03\x04",)}
+HTML_SIGNATURES = (b"<!doctype html", b"<html", b"<head", b"<body")
 
 
 logger = setup_logger(__name__)
@@ -43,52 +45,60 @@ def read_text_file(file_path):
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
 
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+    return read_text_resource(absolute_file_path)
 
 def get_docs(file_url: str, file_type: str, lang: str = "en", verbose=True):
+    # Inside a batch the same document is loaded only once and shared between tools,
+    # and a document that failed to load fails straight away for a while
+    return negative_cache.call(
+        file_url, file_type, lambda: load_shared(("docs", file_url, file_type.lower()), lambda: load_docs(file_url, file_type, lang, verbose))
+    )
+
+@traced("load_documents")
+def load_docs(file_url: str, file_type: str, lang: str = "en", verbose=True):
     file_type = file_type.lower()
 
-    if file_type in FILE_TYPES_TO_CHECK:
-        try:
-            # Make a HEAD request to get content type
-            head_response = requests.head(file_url, allow_redirects=True)
-            content_type = head_response.headers.get('Content-Type') 
-            if content_type is None:
-                raise FileHandlerError(f"Failed to retrieve Content-Type from URL ", file_url)
-            # If the content type is HTML
-            if 'text/html' in content_type:
-                file_type = "url"
-                logger.info("text/html in content_type: change file_type to url")  
-        
-        except requests.exceptions.RequestException as e:
-            exception_map = {
-                requests.exceptions.MissingSchema: "Invalid URL format.",
-                requests.exceptions.ConnectionError: "Failed to connect to the server.",
-                requests.exceptions.Timeout: "Request timed out.",
-            }
-            # Check if the exception is in the map; if not, default to a generic message
-            error_message = exception_map.get(type(e), f"Request failed: {e}")
-            logger.error(error_message)
-            raise FileHandlerError(error_message, file_url)
-  
     try:
-        file_loader = file_loader_map[FileType(file_type)]
-        if "generate_docs_from_audio_gcloud" in file_loader.__name__:
-            docs = file_loader(file_url, lang, verbose)
-        else:
-            docs = file_loader(file_url, verbose)
-        return docs
+        try:
+            return run_file_loader(file_url, file_type, lang, verbose)
+        except HTMLContentError:
+            # The URL serves a web page (a sharing or sign-in page) rather than the file itself
+            logger.info("text/html content: change file_type to url")
+            return run_file_loader(file_url, "url", lang, verbose)
 
     except KeyError:
         logger.error(f"Unsupported file type: {file_type}")
         raise FileHandlerError(f"Unsupported file type", file_url)
     
     except Exception as e:
+        if isinstance(e, DownloadError):
+            # Download failures keep their message
+            raise
         logger.error(f"Failed to load the document: {e}")
         raise FileHandlerError(f"Document loading failed", file_url)
 
+def run_file_loader(file_url: str, file_type: str, lang: str, verbose):
+    file_loader = file_loader_map[FileType(file_type)]
+    with time_loader(file_type):
+        if "generate_docs_from_audio_gcloud" in file_loader.__name__:
+            return file_loader(file_url, lang, verbose)
+        return file_loader(file_url, verbose)
+
+def is_html_document(file_type: str, content_type: Optional[str], head: bytes) -> bool:
+    """
+    Whether a download of a `file_type` file is a web page instead, from the response's
+    Content-Type and its first bytes. The file's own signature wins over the header, some
+    storage hosts label every download text/html.
+    """
+    head = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if head.startswith(FILE_SIGNATURES.get(file_type, ())):
+        return False
+    if content_type and "text/html" in content_type.lower():
+        return True
+    return head.startswith(HTML_SIGNATURES)
+
 def load_url_documents(url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredURLLoader
     try:
         # Using the global session to load documents with custom headers
         url_loader = UnstructuredURLLoader(urls=[url])
@@ -102,7 +112,7 @@ def load_url_documents(url: str, verbose=False):
         raise FileHandlerError(f"Failed to load document from URL", url)
     
     if docs:
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found URL")
@@ -123,21 +133,23 @@ class FileHandler:
         unique_filename = f"{uuid.uuid4()}.{self.file_extension}"
 
         try:
-            # Download the file from the URL and save it to a temporary file
-            response = requests.get(url, timeout=10)  
-            response.raise_for_status()  # Raise an HTTPError for bad responses
-
-            with tempfile.NamedTemporaryFile(delete=False, prefix=unique_filename) as temp_file:
-                temp_file.write(response.content)
-                temp_file_path = temp_file.name
+            # Stream the file from the URL into a temporary file
+            download = download_to_file(url, prefix=unique_filename)
+            temp_file_path = download.path
 
+        except DownloadError:
+            raise
         except requests.exceptions.RequestException as req_err:
             logger.error(f"HTTP request error: {req_err}")
-            raise FileHandlerError(f"Failed to download file from URL", url) from req_err
+            raise DownloadError(f"Failed to download file from URL", url) from req_err
         except Exception as e:
             logger.error(f"An error occurred while downloading or saving the file: {e}")
             raise FileHandlerError(f"Failed to handle file download", url) from e
 
+        if self.file_extension in FILE_TYPES_TO_CHECK and is_html_document(self.file_extension, download.content_type, download.head):
+            download.remove()
+            raise HTMLContentError(f"The URL serves a web page, not a {self.file_extension} file", url)
+
         # Use the file_loader to load the documents
         try:
             loader = self.file_loader(file_path=temp_file_path)
@@ -146,7 +158,8 @@ class FileHandler:
             raise FileHandlerError(f"No file found", temp_file_path) from e
 
         try:
-            documents = loader.load()
+            with span("parse"):
+                documents = loader.load()
         except Exception as e:
             logger.error(f"File content might be private or unavailable or the URL is incorrect.")
             raise FileHandlerError(f"No file content available", temp_file_path) from e
@@ -157,11 +170,12 @@ class FileHandler:
         return documents
 
 def load_pdf_documents(pdf_url: str, verbose=False):
+    from langchain_community.document_loaders import PyPDFLoader
     pdf_loader = FileHandler(PyPDFLoader, "pdf")
     docs = pdf_loader.load(pdf_url)
 
     if docs:
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found PDF file")
@@ -171,6 +185,7 @@ def load_pdf_documents(pdf_url: str, verbose=False):
 
 
 def load_csv_documents(csv_url: str, verbose=False):
+    from langchain_community.document_loaders.csv_loader import CSVLoader
     csv_loader = FileHandler(CSVLoader, "csv")
     docs = csv_loader.load(csv_url)
 
@@ -182,12 +197,13 @@ def load_csv_documents(csv_url: str, verbose=False):
         return docs
 
 def load_txt_documents(notes_url: str, verbose=False):
+    from langchain_community.document_loaders import TextLoader
     notes_loader = FileHandler(TextLoader, "txt")
     docs = notes_loader.load(notes_url)
 
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found TXT file")
@@ -196,12 +212,13 @@ def load_txt_documents(notes_url: str, verbose=False):
         return split_docs
 
 def load_md_documents(notes_url: str, verbose=False):
+    from langchain_community.document_loaders import TextLoader
     notes_loader = FileHandler(TextLoader, "md")
     docs = notes_loader.load(notes_url)
 
     if docs:
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found MD file")
@@ -210,12 +227,13 @@ def load_md_documents(notes_url: str, verbose=False):
         return split_docs
 
 def load_pptx_documents(pptx_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredPowerPointLoader
     pptx_handler = FileHandler(UnstructuredPowerPointLoader, 'pptx')
 
     docs = pptx_handler.load(pptx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found PPTX file")
@@ -224,11 +242,12 @@ def load_pptx_documents(pptx_url: str, verbose=False):
         return split_docs
 
 def load_docx_documents(docx_url: str, verbose=False):
+    from langchain_community.document_loaders import Docx2txtLoader
     docx_handler = FileHandler(Docx2txtLoader, 'docx')
     docs = docx_handler.load(docx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found DOCX file")
@@ -237,11 +256,12 @@ def load_docx_documents(docx_url: str, verbose=False):
         return split_docs
 
 def load_xls_documents(xls_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     xls_handler = FileHandler(UnstructuredExcelLoader, 'xls')
     docs = xls_handler.load(xls_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found XLS file")
@@ -250,11 +270,12 @@ def load_xls_documents(xls_url: str, verbose=False):
         return split_docs
 
 def load_xlsx_documents(xlsx_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     xlsx_handler = FileHandler(UnstructuredExcelLoader, 'xlsx')
     docs = xlsx_handler.load(xlsx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found XLSX file")
@@ -263,11 +284,12 @@ def load_xlsx_documents(xlsx_url: str, verbose=False):
         return split_docs
 
 def load_xml_documents(xml_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredXMLLoader
     xml_handler = FileHandler(UnstructuredXMLLoader, 'xml')
     docs = xml_handler.load(xml_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found XML file")
@@ -282,6 +304,7 @@ class FileHandlerForGoogleDrive:
         self.file_extension = file_extension
 
     def load(self, url):
+        import gdown
         try:
             with tempfile.TemporaryDirectory() as temp_dir:
                 unique_filename = os.path.join(temp_dir, f"{uuid.uuid4()}.{self.file_extension}")
@@ -289,7 +312,8 @@ class FileHandlerForGoogleDrive:
                 logger.info(f"Downloading file from URL: {url}")
                 
                 try:
-                    gdown.download(url=url, output=unique_filename, fuzzy=True)
+                    with span("download"):
+                        gdown.download(url=url, output=unique_filename, fuzzy=True)
                     logger.info(f"File downloaded successfully to {unique_filename}")
                 except Exception as e:
                     logger.error(e)
@@ -303,7 +327,8 @@ class FileHandlerForGoogleDrive:
                     raise FileHandlerError("No file found", unique_filename) from e
 
                 try:
-                    documents = loader.load()
+                    with span("parse"):
+                        documents = loader.load()
                     logger.info("File loaded successfully.")
                 except Exception as e:
                     logger.error(e)
@@ -316,6 +341,7 @@ class FileHandlerForGoogleDrive:
             raise e
         
 def load_gdocs_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import Docx2txtLoader
 
     gdocs_loader = FileHandlerForGoogleDrive(Docx2txtLoader)
 
@@ -323,7 +349,7 @@ def load_gdocs_documents(drive_folder_url: str, verbose=False):
 
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Docs files")
@@ -332,11 +358,12 @@ def load_gdocs_documents(drive_folder_url: str, verbose=False):
         return split_docs
 
 def load_gsheets_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     gsheets_loader = FileHandlerForGoogleDrive(UnstructuredExcelLoader, 'xlsx')
     docs = gsheets_loader.load(drive_folder_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Sheets files")
@@ -345,11 +372,12 @@ def load_gsheets_documents(drive_folder_url: str, verbose=False):
         return split_docs
 
 def load_gslides_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredPowerPointLoader
     gslides_loader = FileHandlerForGoogleDrive(UnstructuredPowerPointLoader, 'pptx')
     docs = gslides_loader.load(drive_folder_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Slides files")
@@ -358,6 +386,7 @@ def load_gslides_documents(drive_folder_url: str, verbose=False):
         return split_docs
 
 def load_gpdf_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import PyPDFLoader
 
     gpdf_loader = FileHandlerForGoogleDrive(PyPDFLoader,'pdf')
 
@@ -371,6 +400,7 @@ def load_gpdf_documents(drive_folder_url: str, verbose=False):
         return docs
 
 def load_docs_youtube_url(youtube_url: str, verbose=True) -> str:
+    from langchain_community.document_loaders import YoutubeLoader
     try:
         loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=False)
     except Exception as e:
@@ -389,11 +419,13 @@ def load_docs_youtube_url(youtube_url: str, verbose=True) -> str:
         logger.info(f"Combined documents into a single string.")
         logger.info(f"Beginning to process transcript...")
 
-    split_docs = splitter.split_documents(docs)
+    split_docs = split_documents(splitter, docs)
 
     return split_docs
 
-llm_for_img = ChatGoogleGenerativeAI(model="gemini-1.5-flash")
+def get_image_model():
+    # Created on first use so modules that never see an image do not build the client
+    return get_chat_model("gemini-1.5-flash")
 
 def generate_docs_from_img(img_url, verbose: bool=False):
     message = HumanMessage(
@@ -407,10 +439,10 @@ def generate_docs_from_img(img_url, verbose: bool=False):
     )
 
     try:
-        response = llm_for_img.invoke([message]).content
-        logger.info(f"Generated summary: {response}")
+        response = get_image_model().invoke([message]).content
+        logger.debug("Generated summary: %s", response)
         docs = Document(page_content=response, metadata={"source": img_url})
-        split_docs = splitter.split_documents([docs])
+        split_docs = split_documents(splitter, [docs])
     except Exception as e:
         logger.error(f"Error processing the request due to Invalid Content or Invalid Image URL")
         raise ImageHandlerError(f"Error processing the request", img_url) from e
@@ -422,6 +454,8 @@ def generate_docs_from_img(img_url, verbose: bool=False):
 
 #USING GOOGLE WEB SPEECH API (FREE SERVICE USED FOR WEB TRANSCRIPT)
 def generate_docs_from_audio(audio_url: str, verbose=False):
+    from pydub import AudioSegment
+    import speech_recognition as sr
     
     logger.info("INSIDE generate_docs_from_audio")
     try:
@@ -443,19 +477,14 @@ def generate_docs_from_audio(audio_url: str, verbose=False):
     
     docs = []
 
-    # Download the file from the URL and save it to a temporary file
+    # Stream the file from the URL into a temporary file
     try:
-        response = requests.get(audio_url)
-        response.raise_for_status()  # Ensure the request was successful
+        mp3_file_path = download_to_file(audio_url, prefix=mp3_audio).path
+        logger.info(f"mp3_file_path: {mp3_file_path}")
     except (requests.exceptions.RequestException) as req_err:
         logger.error(f"Error occurred while downloading audio: {req_err}")
         raise Exception(f"Error occurred while downloading audio: {req_err}")
 
-    with tempfile.NamedTemporaryFile(delete=False, prefix=mp3_audio) as temp_file:
-        temp_file.write(response.content)
-        mp3_file_path = temp_file.name
-        logger.info(f"mp3_file_path: {mp3_file_path}")
-
     # Convert the MP3 file to WAV
     try:
         audio = AudioSegment.from_mp3(mp3_file_path)
@@ -528,7 +557,7 @@ def generate_docs_from_audio(audio_url: str, verbose=False):
             print(f"Error during cleanup: {e}")
 
     if docs:
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
         if verbose:
             logger.info("Found transcript")
             logger.info(f"Splitting documents into {len(split_docs)} chunks")
@@ -679,7 +708,7 @@ def generate_docs_from_audio_gcloud(audio_url: str, lang: str, verbose=False):
     return "Mocked Function"
 
 
-def split_audio_fixed_intervals(audio: AudioSegment, interval_ms: int):
+def split_audio_fixed_intervals(audio: "AudioSegment", interval_ms: int):
     """
     Split audio into chunks of fixed length.
 
@@ -1,28 +1,21 @@
-from langchain_community.document_loaders import YoutubeLoader
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain_community.document_loaders import TextLoader
-from langchain_community.document_loaders import UnstructuredURLLoader
-from langchain_community.document_loaders import UnstructuredPowerPointLoader
-from langchain_community.document_loaders import Docx2txtLoader
-from langchain_community.document_loaders import UnstructuredExcelLoader
-from langchain_community.document_loaders import UnstructuredXMLLoader
-from langchain_google_genai import ChatGoogleGenerativeAI
 from app.utils.allowed_file_extensions import FileType
 from app.api.error_utilities import FileHandlerError, ImageHandlerError
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import GoogleGenerativeAI
 from app.api.error_utilities import VideoTranscriptError
 from langchain_core.messages import HumanMessage
 from app.services.logger import setup_logger
+from app.services.resources import get_llm, get_chat_model, read_text_resource
+from app.services.ingestion import load_shared
+from app.services.negative_cache import negative_cache
+from app.services.tracing import span, split_documents
+from app.services.metrics import time_loader
+from app.services.downloads import download_to_file
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 import os
 import tempfile
 import uuid
-import requests
-import gdown
 
 STRUCTURED_TABULAR_FILE_EXTENSIONS = {"csv", "xls", "xlsx", "gsheet", "xml"}
 
@@ -40,14 +33,13 @@ def read_text_file(file_path):
     # Combine the script directory with the relative file path
     absolute_file_path = os.path.join(script_dir, file_path)
 
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
+    return read_text_resource(absolute_file_path)
 
 def build_chain(prompt: str):
     prompt_template = read_text_file(prompt)
     summarize_prompt = PromptTemplate.from_template(prompt_template)
 
-    summarize_model = GoogleGenerativeAI(model="gemini-1.5-flash")
+    summarize_model = get_llm("gemini-1.5-flash")
 
     chain = summarize_prompt | summarize_model 
     return chain
@@ -56,7 +48,10 @@ def get_summary(file_url: str, file_type: str, verbose=True):
     file_type = file_type.lower()
     try:
         file_loader = file_loader_map[FileType(file_type)]
-        full_content = file_loader(file_url, verbose)
+        with span("load_documents"), time_loader(file_type):
+            full_content = negative_cache.call(
+                file_url, file_type, lambda: load_shared(("summarization", file_url, file_type), lambda: file_loader(file_url, verbose))
+            )
         if file_type in STRUCTURED_TABULAR_FILE_EXTENSIONS:
             prompt = "prompts_for_summarization/summarize_structured_tabular_data_prompt.txt"
         else:
@@ -78,13 +73,8 @@ class FileHandler:
         # Generate a unique filename with a UUID prefix
         unique_filename = f"{uuid.uuid4()}.{self.file_extension}"
 
-        # Download the file from the URL and save it to a temporary file
-        response = requests.get(url)
-        response.raise_for_status()  # Ensure the request was successful
-
-        with tempfile.NamedTemporaryFile(delete=False, prefix=unique_filename) as temp_file:
-            temp_file.write(response.content)
-            temp_file_path = temp_file.name
+        # Stream the file from the URL into a temporary file
+        temp_file_path = download_to_file(url, prefix=unique_filename).path
 
         # Use the file_loader to load the documents
         try:
@@ -94,7 +84,8 @@ class FileHandler:
             raise FileHandlerError(f"No file found", temp_file_path) from e
 
         try:
-            documents = loader.load()
+            with span("parse"):
+                documents = loader.load()
         except Exception as e:
             logger.error(f"File content might be private or unavailable or the URL is incorrect.")
             raise FileHandlerError(f"No file content available", temp_file_path) from e
@@ -105,11 +96,12 @@ class FileHandler:
         return documents
 
 def load_pdf_documents(pdf_url: str, verbose=False):
+    from langchain_community.document_loaders import PyPDFLoader
     pdf_loader = FileHandler(PyPDFLoader, "pdf")
     docs = pdf_loader.load(pdf_url)
 
     if docs:
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found PDF file")
@@ -122,6 +114,7 @@ def load_pdf_documents(pdf_url: str, verbose=False):
 
 
 def load_csv_documents(csv_url: str, verbose=False):
+    from langchain_community.document_loaders.csv_loader import CSVLoader
     csv_loader = FileHandler(CSVLoader, "csv")
     docs = csv_loader.load(csv_url)
 
@@ -136,12 +129,13 @@ def load_csv_documents(csv_url: str, verbose=False):
         return full_content
 
 def load_txt_documents(notes_url: str, verbose=False):
+    from langchain_community.document_loaders import TextLoader
     notes_loader = FileHandler(TextLoader, "txt")
     docs = notes_loader.load(notes_url)
 
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found TXT file")
@@ -153,12 +147,13 @@ def load_txt_documents(notes_url: str, verbose=False):
         return full_content
 
 def load_md_documents(notes_url: str, verbose=False):
+    from langchain_community.document_loaders import TextLoader
     notes_loader = FileHandler(TextLoader, "md")
     docs = notes_loader.load(notes_url)
 
     if docs:
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found MD file")
@@ -170,11 +165,12 @@ def load_md_documents(notes_url: str, verbose=False):
         return full_content
 
 def load_url_documents(url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredURLLoader
     url_loader = UnstructuredURLLoader(urls=[url])
     docs = url_loader.load()
 
     if docs:
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found URL")
@@ -186,12 +182,13 @@ def load_url_documents(url: str, verbose=False):
         return full_content
 
 def load_pptx_documents(pptx_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredPowerPointLoader
     pptx_handler = FileHandler(UnstructuredPowerPointLoader, 'pptx')
 
     docs = pptx_handler.load(pptx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found PPTX file")
@@ -203,11 +200,12 @@ def load_pptx_documents(pptx_url: str, verbose=False):
         return full_content
 
 def load_docx_documents(docx_url: str, verbose=False):
+    from langchain_community.document_loaders import Docx2txtLoader
     docx_handler = FileHandler(Docx2txtLoader, 'docx')
     docs = docx_handler.load(docx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found DOCX file")
@@ -219,11 +217,12 @@ def load_docx_documents(docx_url: str, verbose=False):
         return full_content
 
 def load_xls_documents(xls_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     xls_handler = FileHandler(UnstructuredExcelLoader, 'xls')
     docs = xls_handler.load(xls_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found XLS file")
@@ -235,11 +234,12 @@ def load_xls_documents(xls_url: str, verbose=False):
         return full_content
 
 def load_xlsx_documents(xlsx_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     xlsx_handler = FileHandler(UnstructuredExcelLoader, 'xlsx')
     docs = xlsx_handler.load(xlsx_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found XLSX file")
@@ -251,11 +251,12 @@ def load_xlsx_documents(xlsx_url: str, verbose=False):
         return full_content
 
 def load_xml_documents(xml_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredXMLLoader
     xml_handler = FileHandler(UnstructuredXMLLoader, 'xml')
     docs = xml_handler.load(xml_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found XML file")
@@ -273,6 +274,7 @@ class FileHandlerForGoogleDrive:
         self.file_extension = file_extension
 
     def load(self, url):
+        import gdown
         try:
             with tempfile.TemporaryDirectory() as temp_dir:
                 unique_filename = os.path.join(temp_dir, f"{uuid.uuid4()}.{self.file_extension}")
@@ -280,7 +282,8 @@ class FileHandlerForGoogleDrive:
                 logger.info(f"Downloading file from URL: {url}")
 
                 try:
-                    gdown.download(url=url, output=unique_filename, fuzzy=True)
+                    with span("download"):
+                        gdown.download(url=url, output=unique_filename, fuzzy=True)
                     logger.info(f"File downloaded successfully to {unique_filename}")
                 except Exception as e:
                     logger.error(e)
@@ -294,7 +297,8 @@ class FileHandlerForGoogleDrive:
                     raise FileHandlerError("No file found", unique_filename) from e
 
                 try:
-                    documents = loader.load()
+                    with span("parse"):
+                        documents = loader.load()
                     logger.info("File loaded successfully.")
                 except Exception as e:
                     logger.error(e)
@@ -307,6 +311,7 @@ class FileHandlerForGoogleDrive:
             raise e
 
 def load_gdocs_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import Docx2txtLoader
 
     gdocs_loader = FileHandlerForGoogleDrive(Docx2txtLoader)
 
@@ -314,7 +319,7 @@ def load_gdocs_documents(drive_folder_url: str, verbose=False):
 
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Docs files")
@@ -325,11 +330,12 @@ def load_gdocs_documents(drive_folder_url: str, verbose=False):
         return full_content
 
 def load_gsheets_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredExcelLoader
     gsheets_loader = FileHandlerForGoogleDrive(UnstructuredExcelLoader, 'xlsx')
     docs = gsheets_loader.load(drive_folder_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Sheets files")
@@ -341,11 +347,12 @@ def load_gsheets_documents(drive_folder_url: str, verbose=False):
         return full_content
 
 def load_gslides_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import UnstructuredPowerPointLoader
     gslides_loader = FileHandlerForGoogleDrive(UnstructuredPowerPointLoader, 'pptx')
     docs = gslides_loader.load(drive_folder_url)
     if docs: 
 
-        split_docs = splitter.split_documents(docs)
+        split_docs = split_documents(splitter, docs)
 
         if verbose:
             logger.info(f"Found Google Slides files")
@@ -357,6 +364,7 @@ def load_gslides_documents(drive_folder_url: str, verbose=False):
         return full_content
 
 def load_gpdf_documents(drive_folder_url: str, verbose=False):
+    from langchain_community.document_loaders import PyPDFLoader
 
     gpdf_loader = FileHandlerForGoogleDrive(PyPDFLoader,'pdf')
 
@@ -373,19 +381,25 @@ def load_gpdf_documents(drive_folder_url: str, verbose=False):
         return full_content
 
 def summarize_transcript_youtube_url(youtube_url: str, max_video_length=600, verbose=False) -> str:
-    try:
-        loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=False)
-    except Exception as e:
-        logger.error(f"No such video found at {youtube_url}")
-        raise VideoTranscriptError(f"No video found", youtube_url) from e
+    from langchain_community.document_loaders import YoutubeLoader
 
-    try:
-        docs = loader.load()
-    except Exception as e:
-        logger.error(f"Video transcript might be private or unavailable in 'en' or the URL is incorrect.")
-        raise VideoTranscriptError(f"No video transcripts available", youtube_url) from e
+    def load_transcript():
+        try:
+            loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=False)
+        except Exception as e:
+            logger.error(f"No such video found at {youtube_url}")
+            raise VideoTranscriptError(f"No video found", youtube_url) from e
+
+        try:
+            docs = loader.load()
+        except Exception as e:
+            logger.error(f"Video transcript might be private or unavailable in 'en' or the URL is incorrect.")
+            raise VideoTranscriptError(f"No video transcripts available", youtube_url) from e
+        return docs
+
+    docs = negative_cache.call(youtube_url, "youtube_url", load_transcript)
 
-    split_docs = splitter.split_documents(docs)
+    split_docs = split_documents(splitter, docs)
 
     full_transcript = [doc.page_content for doc in split_docs]
     full_transcript = " ".join(full_transcript)
@@ -398,7 +412,7 @@ def summarize_transcript_youtube_url(youtube_url: str, max_video_length=600, ver
     prompt_template = read_text_file("prompts_for_summarization/summarize_youtube_video_prompt.txt")
     summarize_prompt = PromptTemplate.from_template(prompt_template)
 
-    summarize_model = GoogleGenerativeAI(model="gemini-1.5-flash")
+    summarize_model = get_llm("gemini-1.5-flash")
 
     chain = summarize_prompt | summarize_model 
 
@@ -421,7 +435,8 @@ file_loader_map = {
     FileType.GPDF: load_gpdf_documents
 }
 
-llm_for_img = ChatGoogleGenerativeAI(model="gemini-1.5-flash")
+def get_image_model():
+    return get_chat_model("gemini-1.5-flash")
 
 def generate_summary_from_img(img_url):
     message = HumanMessage(
@@ -435,8 +450,8 @@ def generate_summary_from_img(img_url):
     )
 
     try:
-        response = llm_for_img.invoke([message]).content
-        logger.info(f"Generated summary: {response}")
+        response = get_image_model().invoke([message]).content
+        logger.debug("Generated summary: %s", response)
     except Exception as e:
         logger.error(f"Error processing the request due to Invalid Content or Invalid Image URL")
         raise ImageHandlerError(f"Error processing the request", img_url) from e
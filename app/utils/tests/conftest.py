@@ -0,0 +1,9 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def empty_negative_cache():
+    # Tests load the same URLs with different fakes; a failure must not carry over to the next test
+    from app.services.negative_cache import negative_cache
+    negative_cache.clear()
+    yield
+    negative_cache.clear()
@@ -0,0 +1,104 @@
+import threading
+import pytest
+from fastapi import HTTPException
+from app.utils import auth
+from app.utils.auth import CredentialCache, create_credential_cache, key_check, parse_keys
+
+def test_parse_keys_accepts_lines_and_commas():
+    assert parse_keys("old-key\nnew-key, third-key\n\n") == {"old-key", "new-key", "third-key"}
+
+def test_cache_fetches_once_and_accepts_every_valid_key():
+    calls = []
+    cache = CredentialCache(lambda: calls.append(1) or ["old-key", "new-key"], ttl=60)
+
+    assert cache.verify("old-key")
+    assert cache.verify("new-key")
+    assert not cache.verify("other-key")
+    assert not cache.verify(None)
+    assert len(calls) == 1
+
+def test_stale_keys_are_refreshed_in_background():
+    keys = ["old-key"]
+    refreshed = threading.Event()
+
+    def fetch():
+        if len(keys) > 1:
+            refreshed.set()
+        return list(keys)
+
+    cache = CredentialCache(fetch, ttl=0)
+    assert cache.verify("old-key")
+
+    keys.append("new-key")
+    # The stale keys still answer while the refresh runs
+    assert cache.verify("old-key")
+    assert refreshed.wait(1)
+
+    for _ in range(100):
+        if cache.verify("new-key"):
+            break
+        threading.Event().wait(0.01)
+    assert cache.verify("new-key")
+
+def test_failed_refresh_keeps_previous_keys():
+    fail = threading.Event()
+    attempted = threading.Event()
+
+    def fetch():
+        if fail.is_set():
+            attempted.set()
+            raise RuntimeError("secret manager unavailable")
+        return ["key"]
+
+    cache = CredentialCache(fetch, ttl=0)
+    assert cache.verify("key")
+
+    fail.set()
+    cache.verify("key")
+    assert attempted.wait(1)
+    assert cache.verify("key")
+
+def test_failed_first_load_is_not_retried_straight_away(monkeypatch):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise RuntimeError("secret manager unavailable")
+
+    cache = CredentialCache(fetch, retry_seconds=10)
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="secret manager unavailable"):
+            cache.keys()
+    assert len(calls) == 1
+
+    now = auth.time.monotonic()
+    monkeypatch.setattr(auth.time, "monotonic", lambda: now + 11)
+    with pytest.raises(RuntimeError):
+        cache.keys()
+    assert len(calls) == 2
+
+def test_keys_file_stand_in(tmp_path, monkeypatch):
+    keys_file = tmp_path / "keys"
+    keys_file.write_text("file-key\n")
+    monkeypatch.delenv("API_KEYS", raising=False)
+    monkeypatch.setenv("API_KEYS_FILE", str(keys_file))
+
+    assert create_credential_cache().verify("file-key")
+
+def test_key_check(monkeypatch):
+    monkeypatch.setattr(auth, "_credential_cache", CredentialCache(lambda: ["env-key"]))
+
+    key_check("env-key")
+    with pytest.raises(HTTPException) as exc_info:
+        key_check("dev")
+    assert exc_info.value.status_code == 401
+
+def test_key_check_unavailable_credentials(monkeypatch):
+    def fetch():
+        raise RuntimeError("secret manager unavailable")
+
+    monkeypatch.setattr(auth, "_credential_cache", CredentialCache(fetch))
+
+    with pytest.raises(HTTPException) as exc_info:
+        key_check("key")
+    assert exc_info.value.status_code == 503
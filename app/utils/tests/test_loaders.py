@@ -1,6 +1,7 @@
 import pytest
 import requests
 from app.api.error_utilities import FileHandlerError
+from app.services import downloads
 from unittest.mock import patch
 from app.utils.document_loaders import *
 
@@ -339,4 +340,51 @@ def test_load_gpdf_documents_invalid_file_type():
     with pytest.raises(FileHandlerError) as exc_info:
         full_content = load_gpdf_documents(not_gpdf_url)
 
-    assert isinstance(exc_info.value, FileHandlerError)
\ No newline at end of file
+    assert isinstance(exc_info.value, FileHandlerError)
+
+def fake_download(monkeypatch, body: bytes, content_type, status: int = 200):
+    calls = []
+
+    class Session:
+        # No head(): the file type is detected from the download itself
+        def get(self, url, **kwargs):
+            calls.append(url)
+            response = requests.Response()
+            response.status_code = status
+            response._content = body
+            response._content_consumed = True
+            if content_type:
+                response.headers["Content-Type"] = content_type
+            return response
+
+    monkeypatch.setattr(downloads, "get_http_session", lambda: Session())
+    return calls
+
+def test_is_html_document():
+    assert is_html_document("pdf", "text/html; charset=utf-8", b"<!DOCTYPE html><html>")
+    assert is_html_document("txt", None, b"\n  <html lang='en'>")
+    # The file's signature wins over a wrong header
+    assert not is_html_document("pdf", "text/html", b"%PDF-1.7")
+    assert not is_html_document("csv", "text/csv", b"name,value\n")
+
+def test_web_page_behind_file_url_is_loaded_as_url(monkeypatch):
+    calls = fake_download(monkeypatch, b"<!doctype html><title>Sign in</title>", None)
+    monkeypatch.setitem(file_loader_map, FileType.URL, lambda url, verbose: ["page"])
+
+    assert load_docs("https://example.com/shared.pdf", "pdf") == ["page"]
+    assert calls == ["https://example.com/shared.pdf"]
+
+def test_file_url_is_downloaded_once(monkeypatch):
+    calls = fake_download(monkeypatch, b"name,value\nalpha,1\n", "text/csv")
+
+    docs = load_docs("https://example.com/data.csv", "csv")
+    assert "alpha" in docs[0].page_content
+    assert calls == ["https://example.com/data.csv"]
+
+def test_missing_file_fails_fast_on_the_next_request(monkeypatch):
+    calls = fake_download(monkeypatch, b"Not Found", "text/plain", status=404)
+
+    for _ in range(2):
+        with pytest.raises(FileHandlerError, match="Failed to download file from URL"):
+            get_docs("https://example.com/missing.pdf", "pdf")
+    assert calls == ["https://example.com/missing.pdf"]
@@ -0,0 +1,235 @@
+"""
+Deterministic stand-ins for the Gemini models, used by the offline benchmarks.
+
+The fake completion and chat models answer every prompt with a JSON instance of the schema
+in the prompt's format instructions (what `JsonOutputParser.get_format_instructions` puts
+there), so each tool's parsing and post-processing runs as it would on a real response.
+Prompts without a schema, such as the summarization steps, get plain text back.
+
+Every call sleeps for a latency drawn from a seeded distribution:
+
+    fixed:0.5             always 0.5s
+    uniform:0.2,1.5       uniformly between 0.2s and 1.5s
+    lognormal:0.8,0.4     median 0.8s, sigma 0.4 (long right tail, like real model calls)
+
+`install()` must run before the app is imported: the tools bind `get_llm` and friends by
+name when their modules load.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import SimpleChatModel
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import BaseMessage
+
+SCHEMA_BLOCK = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
+# Items generated for arrays without a minItems
+ARRAY_ITEMS = 3
+TEXT_RESPONSE = "A deterministic benchmark response standing in for the model's summary of the document."
+
+# What the schemas do not say. Free-text fields a tool dispatches on, cycled through by item:
+FIELD_VALUES = {
+    "question_type": ["multiple_choice_question", "fill_in_the_blank", "open_ended", "true_false", "relate_concepts", "math_exercises"],
+    "key": ["A", "B", "C", "D"],
+    "answer": ["A"],
+}
+# and prompts whose schema describes one item of the list the tool expects (syllabus generator)
+LIST_PROMPTS = ("course content structure", "list of recommended learning resources", "detailed course schedule")
+
+class Latency:
+    """Latency distribution parsed from a `kind:arg,arg` spec, sampled from a seeded generator."""
+    def __init__(self, spec: str, seed: int = 0):
+        self.spec = spec
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.args = [float(arg) for arg in args.split(",") if arg.strip()]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if self.kind not in expected or len(self.args) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec {spec!r}, expected fixed:S, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA")
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.args[0]
+            if self.kind == "uniform":
+                return self._random.uniform(*self.args)
+            median, sigma = self.args
+            return median * self._random.lognormvariate(0, sigma)
+
+    def wait(self):
+        seconds = self.sample()
+        if seconds > 0:
+            time.sleep(seconds)
+
+def extract_schema(prompt: str) -> Optional[Dict[str, Any]]:
+    for match in SCHEMA_BLOCK.finditer(prompt):
+        try:
+            schema = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            continue
+        if isinstance(schema, dict) and ("properties" in schema or "type" in schema):
+            return schema
+    return None
+
+def resolve(schema: Dict[str, Any], root: Dict[str, Any]) -> Dict[str, Any]:
+    reference = schema.get("$ref")
+    if not reference:
+        return schema
+    # "#/definitions/Name" (pydantic v1) or "#/$defs/Name" (v2)
+    node: Any = root
+    for part in reference.lstrip("#/").split("/"):
+        node = node.get(part, {})
+    return node
+
+def schema_instance(schema: Dict[str, Any], root: Optional[Dict[str, Any]] = None, name: str = "value", depth: int = 0, index: int = 0) -> Any:
+    """A small, valid instance of a JSON schema; the same schema always gives the same instance."""
+    root = root or schema
+    schema = resolve(schema, root)
+    if depth > 8:
+        return None
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if schema.get(combinator):
+            options = [option for option in schema[combinator] if option.get("type") != "null"] or schema[combinator]
+            return schema_instance(options[0], root, name, depth + 1, index)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((item for item in kind if item != "null"), "string")
+    if kind is None:
+        kind = "object" if "properties" in schema else "array" if "items" in schema else "string"
+
+    if kind == "object":
+        properties = schema.get("properties", {})
+        # "model_config" is a pydantic v1 artefact of the tools' schemas, not a real field
+        return {
+            key: schema_instance(value, root, key, depth + 1, index)
+            for key, value in properties.items() if key != "model_config"
+        }
+    if kind == "array":
+        count = max(int(schema.get("minItems", ARRAY_ITEMS)), 1)
+        items = schema.get("items", {"type": "string"})
+        return [schema_instance(items, root, name, depth + 1, item) for item in range(count)]
+    if kind == "integer":
+        return int(schema.get("minimum", 1))
+    if kind == "number":
+        return float(schema.get("minimum", 1))
+    if kind == "boolean":
+        return True
+    if name in FIELD_VALUES:
+        values = FIELD_VALUES[name]
+        return values[index % len(values)]
+    return f"Benchmark {name.replace('_', ' ')} {index + 1}"
+
+def respond(prompt: str) -> str:
+    schema = extract_schema(prompt)
+    if schema is None:
+        return TEXT_RESPONSE
+    instance = schema_instance(schema)
+    if any(marker in prompt for marker in LIST_PROMPTS):
+        instance = [instance] * ARRAY_ITEMS
+    return json.dumps(instance)
+
+def message_text(messages: List[BaseMessage]) -> str:
+    parts = []
+    for message in messages:
+        if isinstance(message.content, str):
+            parts.append(message.content)
+        else:
+            # Multimodal content: only the text parts carry the format instructions
+            parts.extend(part.get("text", "") for part in message.content if isinstance(part, dict))
+    return "\n".join(parts)
+
+class FakeSchemaLLM(LLM):
+    """Completion model answering with an instance of the prompt's JSON schema."""
+    model: str
+    latency: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake-llm"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def _call(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        self.latency.wait()
+        return respond(prompt)
+
+class FakeSchemaChatModel(SimpleChatModel):
+    """Chat model counterpart of FakeSchemaLLM, used for the image and summarization steps."""
+    model: str
+    latency: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake-chat"
+
+    def _call(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> str:
+        self.latency.wait()
+        return respond(message_text(messages))
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+    """Hash-seeded vectors, so equal texts embed equally, after the embedding latency."""
+    latency: Any
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # One round trip per batch, as the Gemini client sends the whole batch in one request
+        self.latency.wait()
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self.latency.wait()
+        return super().embed_query(text)
+
+class FakeGenerativeModel:
+    """Stands in for `genai.GenerativeModel` in the co-teacher assistant."""
+    def __init__(self, latency: Latency):
+        self.latency = latency
+
+    def start_chat(self):
+        return self
+
+    def send_message(self, message: str):
+        self.latency.wait()
+        digest = hashlib.sha256(message.encode()).hexdigest()[:12]
+        text = f"Benchmark co-teacher answer {digest}. " * 20
+        usage = SimpleNamespace(prompt_token_count=len(message) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+def install(llm_latency: Latency, embedding_latency: Latency):
+    """Replaces the shared model clients and the co-teacher model with the fakes."""
+    from functools import lru_cache
+    from app.services import resources
+
+    @lru_cache(maxsize=None)
+    def get_llm(model: str):
+        return FakeSchemaLLM(model=model, latency=llm_latency)
+
+    @lru_cache(maxsize=None)
+    def get_chat_model(model: str):
+        return FakeSchemaChatModel(model=model, latency=llm_latency)
+
+    @lru_cache(maxsize=None)
+    def get_embeddings(model: str):
+        return FakeEmbeddings(size=768, latency=embedding_latency)
+
+    resources.get_llm = get_llm
+    resources.get_chat_model = get_chat_model
+    resources.get_embeddings = get_embeddings
+
+    from app.assistants.classroom_support.co_teacher import assistant
+    assistant.model = FakeGenerativeModel(llm_latency)
@@ -0,0 +1,131 @@
+"""
+Local HTTP server for benchmark documents, so tool runs download files without the network.
+
+Documents are generated in memory at a chosen size and served with their content type, an
+ETag and Last-Modified, like a static file host. The query string is ignored, which lets a
+benchmark give every request its own URL for the same document.
+"""
+import hashlib
+import io
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+PARAGRAPH = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. Chlorophyll in the "
+    "chloroplasts absorbs mostly blue and red light, and the light-dependent reactions split water, "
+    "releasing oxygen. The Calvin cycle then fixes carbon dioxide into three-carbon sugars. "
+)
+
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "txt": "text/plain; charset=utf-8",
+    "md": "text/markdown; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def text_document(size: int) -> str:
+    return (PARAGRAPH * (size // len(PARAGRAPH) + 1))[:size]
+
+def csv_document(size: int) -> str:
+    rows = ["topic,term,definition"]
+    index = 0
+    while sum(len(row) + 1 for row in rows) < size:
+        rows.append(f"biology,term {index},\"{PARAGRAPH[:120]}\"")
+        index += 1
+    return "\n".join(rows) + "\n"
+
+def pdf_document(size: int, chars_per_page: int = 3000) -> bytes:
+    """A valid PDF with `size` characters of text, laid out as one text block per page."""
+    text = text_document(size)
+    pages = [text[start:start + chars_per_page] for start in range(0, len(text), chars_per_page)] or [""]
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in pages:
+        lines = [page[start:start + 90] for start in range(0, len(page), 90)]
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        stream = "BT /F1 9 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {content_id} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] /Count {len(page_ids)} >>"
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    output.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+    output.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return output.getvalue()
+
+def build_documents(size: int) -> Dict[str, Tuple[bytes, str]]:
+    """Path -> (body, content type) of one document of each supported type."""
+    return {
+        "/document.pdf": (pdf_document(size), CONTENT_TYPES["pdf"]),
+        "/document.txt": (text_document(size).encode(), CONTENT_TYPES["txt"]),
+        "/document.md": (("# Photosynthesis\n\n" + text_document(size)).encode(), CONTENT_TYPES["md"]),
+        "/document.csv": (csv_document(size).encode(), CONTENT_TYPES["csv"]),
+    }
+
+class FixtureServer:
+    """Serves `documents` on 127.0.0.1 from a background thread; use as a context manager."""
+    def __init__(self, documents: Dict[str, Tuple[bytes, str]], port: int = 0):
+        self.documents = documents
+        self.requests = 0
+        served = self
+        last_modified = formatdate(usegmt=True)
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_headers(self):
+                path = urlsplit(self.path).path
+                if path not in served.documents:
+                    self.send_error(404)
+                    return None
+                body, content_type = served.documents[path]
+                served.requests += 1
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", f"\"{hashlib.sha256(body).hexdigest()[:16]}\"")
+                self.send_header("Last-Modified", last_modified)
+                self.end_headers()
+                return body
+
+            def do_HEAD(self):
+                self._send_headers()
+
+            def do_GET(self):
+                body = self._send_headers()
+                if body is not None:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, file_type: str, tag: str = "") -> str:
+        return f"{self.base_url}/document.{file_type}" + (f"?r={tag}" if tag else "")
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
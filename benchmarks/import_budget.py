@@ -0,0 +1,69 @@
+"""
+Measures the import time and resident memory of the document loader modules.
+
+Each module is imported in a fresh interpreter so earlier imports do not hide its cost.
+The run fails when a module goes over its budget, which keeps heavy dependencies
+(audio, speech, Google Drive, Unstructured) from creeping back into module scope.
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --max-seconds 1.5 --max-rss-mb 120
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "app.utils.document_loaders",
+    "app.utils.document_loaders_summarization",
+    "app.tools.multiple_choice_quiz_generator.core",
+    "app.main",
+]
+
+# Modules only a few file types need; none of them should be loaded by an import
+LAZY_DEPENDENCIES = ["pydub", "speech_recognition", "google.cloud.speech", "gdown", "unstructured"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+loaded = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+print(json.dumps({"seconds": seconds, "rss_mb": rss_kb / 1024, "loaded": loaded}))
+"""
+
+def measure(module: str, repeat: int):
+    env = {**os.environ, "ENV_TYPE": os.environ.get("ENV_TYPE", "dev"), "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "benchmark")}
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, module, json.dumps(LAZY_DEPENDENCIES)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    # The fastest run is the least disturbed by the rest of the machine
+    return min(runs, key=lambda run: run["seconds"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="import time budget per module")
+    parser.add_argument("--max-rss-mb", type=float, default=150.0, help="peak resident memory budget per module")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':50} {'seconds':>8} {'rss MB':>8}  eager dependencies")
+    for module in MODULES:
+        result = measure(module, args.repeat)
+        over = result["seconds"] > args.max_seconds or result["rss_mb"] > args.max_rss_mb or result["loaded"]
+        failed |= bool(over)
+        print(f"{module:50} {result['seconds']:8.2f} {result['rss_mb']:8.1f}  {', '.join(result['loaded']) or '-'}{'  OVER BUDGET' if over else ''}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
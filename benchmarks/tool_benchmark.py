@@ -0,0 +1,297 @@
+"""
+Offline end-to-end benchmark of every tool in tools_config.json and the co-teacher assistant.
+
+Requests go over HTTP to the real FastAPI app served by uvicorn in this process, with the
+middleware, tool pools, loaders and parsers all in the path. Only the edges are replaced:
+documents come from a local fixture server and the Gemini models are deterministic fakes
+with a configurable latency (see benchmarks/fake_backends.py). For each tool and concurrency
+level it reports latency percentiles, throughput and the peak resident memory.
+
+    python benchmarks/tool_benchmark.py
+    python benchmarks/tool_benchmark.py --concurrency 1,4,8 --requests 24 --llm-latency lognormal:0.8,0.4
+    python benchmarks/tool_benchmark.py --tools flashcard-generator,co-teacher --file-type txt --json results.json
+
+Each request gets its own topic and document URL, so the result cache, request coalescing
+and shared ingestion do not fold concurrent requests into one.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_backends import ARRAY_ITEMS, Latency, install
+from fixture_server import FixtureServer, build_documents
+
+API_KEY = "benchmark"
+ASSISTANT_ID = "co-teacher"
+
+# Environment of the app under test: no credentials, no result cache, no ledger or slow request database
+BENCHMARK_ENV = {
+    "ENV_TYPE": "dev",
+    "GOOGLE_API_KEY": "benchmark",
+    "API_KEYS": API_KEY,
+    "LOG_LEVEL": "WARNING",
+    "RESULT_CACHE_TTL": "0",
+    "RESULT_CACHE_DIR": "",
+    "DOWNLOAD_CACHE_DIR": "",
+    "LLM_LEDGER_PATH": "",
+    "SLOW_REQUEST_SECONDS": "",
+}
+
+def tool_inputs(tool_id: str, url: Callable[[int], str], file_type: str, tag: str) -> Dict[str, Any]:
+    """Inputs of one request to `tool_id`, with its n-th document at `url(n)` and a topic unique to `tag`."""
+    topic = f"Photosynthesis {tag}"
+    inputs = {
+        "multiple-choice-quiz-generator": {"topic": topic, "n_questions": 5, "file_url": url(0), "file_type": file_type, "lang": "en"},
+        "flashcard-generator": {"file_url": url(0), "file_type": file_type, "lang": "en"},
+        "worksheet-generator": {"grade_level": "middle", "topic": topic, "file_url": url(0), "file_type": file_type, "lang": "en"},
+        "ai-resistant-assignments-generator": {
+            "grade_level": "university", "assignment_description": f"Lab report on {topic}",
+            "file_url": url(0), "file_type": file_type, "lang": "en"
+        },
+        "syllabus-generator": {
+            "grade_level": "high", "subject": topic, "course_description": "Plant biology",
+            "objectives": "Explain the light-dependent reactions", "required_materials": "Textbook",
+            "grading_policy": "Exams 60%, labs 40%", "policies_expectations": "Attendance is required",
+            "course_outline": "Cells, energy, photosynthesis", "additional_notes": "",
+            "file_url": url(0), "file_type": file_type, "lang": "en"
+        },
+        "lesson-generator": {
+            "grade_level": "middle", "topic": topic, "objectives": "Describe the Calvin cycle",
+            "additional_customization": "Include a hands-on activity",
+            "objectives_file_url": url(0), "objectives_file_type": file_type,
+            "additional_customization_file_url": url(1), "additional_customization_file_type": file_type, "lang": "en"
+        },
+        "presentation-generator": {
+            "grade_level": "middle", "n_slides": 6, "topic": topic, "objectives": "Describe the Calvin cycle",
+            "additional_comments": "Keep slides short",
+            "objectives_file_url": url(0), "objectives_file_type": file_type,
+            "additional_comments_file_url": url(1), "additional_comments_file_type": file_type, "lang": "en"
+        },
+        "connect-with-them": {
+            "grade_level": "elementary", "task_description": f"Poster about {topic}",
+            "students_description": "Students who enjoy gardening and video games",
+            "task_description_file_url": url(0), "task_description_file_type": file_type,
+            "student_description_file_url": url(1), "student_description_file_type": file_type, "lang": "en"
+        },
+        # The rubric wants one criterion description per point, the fakes write ARRAY_ITEMS
+        "rubric-generator": {
+            "grade_level": "high", "point_scale": ARRAY_ITEMS, "objectives": "Explain photosynthesis",
+            "assignment_description": f"Essay on {topic}",
+            "objectives_file_url": url(0), "objectives_file_type": file_type,
+            "assignment_description_file_url": url(1), "assignment_description_file_type": file_type, "lang": "en"
+        },
+        "writing-feedback-generator": {
+            "grade_level": "high", "assignment_description": f"Essay on {topic}",
+            "criteria": "Accuracy, structure, clarity", "writing_to_review": "Plants make food from sunlight. " * 20,
+            "criteria_file_url": url(0), "criteria_file_type": file_type,
+            "writing_to_review_file_url": url(1), "writing_to_review_file_type": file_type, "lang": "en"
+        },
+    }
+    if tool_id not in inputs:
+        raise KeyError(f"No benchmark inputs for {tool_id}, add them to tool_inputs()")
+    return inputs[tool_id]
+
+def tool_request(tool_id: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "user": {"id": "benchmark", "fullName": "Benchmark", "email": "benchmark@example.com"},
+        "type": "tool",
+        "tool_data": {"tool_id": tool_id, "inputs": [{"name": name, "value": value} for name, value in inputs.items()]},
+    }
+
+def assistant_request(tag: str) -> Dict[str, Any]:
+    return {
+        "assistant_inputs": {
+            "assistant_group": "classroom_support",
+            "assistant_name": "co_teacher",
+            "user_info": {"user_name": "Benchmark", "user_age": 30, "user_preference": "Visual examples"},
+            "messages": [{"role": "human", "type": "text", "payload": {"text": f"How do I teach photosynthesis? ({tag})"}}],
+        }
+    }
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)), 1) - 1]
+
+class RssSampler:
+    """Peak process RSS while a benchmark level runs."""
+    def __init__(self, interval: float = 0.05):
+        from app.services.memory import current_rss
+        self._current_rss = current_rss
+        self.interval = interval
+        self.start_rss = current_rss() or 0
+        self.peak_rss = self.start_rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, self._current_rss() or 0)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+async def run_level(client, name: str, build: Callable[[int], tuple], concurrency: int, total: int) -> Dict[str, Any]:
+    """Sends `total` requests from `concurrency` closed-loop workers and collects their timings."""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for index in counter:
+            path, body = build(index)
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if status == "200":
+                latencies.append(elapsed)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+
+    with RssSampler() as memory:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    return {
+        "tool": name,
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "peak_rss_mb": memory.peak_rss / 2**20,
+        "peak_growth_mb": (memory.peak_rss - memory.start_rss) / 2**20,
+    }
+
+def format_row(result: Dict[str, Any]) -> str:
+    def seconds(value):
+        return f"{value:8.2f}" if value is not None else f"{'-':>8}"
+    errors = ",".join(f"{status}x{count}" for status, count in sorted(result["errors"].items())) or "-"
+    return (
+        f"{result['tool']:36} {result['concurrency']:>4} {result['ok']:>4}/{result['requests']:<4} "
+        f"{seconds(result['p50'])} {seconds(result['p95'])} {seconds(result['p99'])} {result['throughput']:8.2f} "
+        f"{result['peak_rss_mb']:9.1f} {result['peak_growth_mb']:8.1f}  {errors}"
+    )
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int):
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("The app failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+async def benchmark(args, fixtures, output) -> List[Dict[str, Any]]:
+    import httpx
+    from app.tools.utils.tool_utilities import tools_config
+
+    names = list(tools_config) + [ASSISTANT_ID]
+    if args.tools:
+        names = [name for name in names if name in args.tools.split(",")]
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers={"api-key": API_KEY}, timeout=args.timeout) as client:
+        # The app warms up in the background; requests before that would measure the warm-up
+        while not (await client.get("/ready")).json().get("ready"):
+            await asyncio.sleep(0.2)
+
+        results = []
+        for name in names:
+            def build(index: int, name=name):
+                tag = f"{name}-{index}-{time.monotonic_ns()}"
+                if name == ASSISTANT_ID:
+                    return "/assistant-chat", assistant_request(tag)
+                # Every document of the request gets its own URL, as different uploads would
+                inputs = tool_inputs(name, lambda document: fixtures.url(args.file_type, f"{tag}-{document}"), args.file_type, tag)
+                return "/submit-tool", tool_request(name, inputs)
+
+            # One unmeasured request loads the tool's modules, prompts and parsers
+            await run_level(client, name, build, 1, 1)
+            for concurrency in levels:
+                result = await run_level(client, name, build, concurrency, max(args.requests, concurrency))
+                print(format_row(result), file=output, flush=True)
+                results.append(result)
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", help="comma-separated tool ids (and/or co-teacher), default all")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=16, help="requests per tool and level")
+    parser.add_argument("--file-type", default="pdf", choices=["pdf", "txt", "md", "csv"])
+    parser.add_argument("--document-chars", type=int, default=20000, help="text size of the fixture documents")
+    parser.add_argument("--llm-latency", default="lognormal:0.5,0.3", help="fixed:S, uniform:MIN,MAX or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--embedding-latency", default="lognormal:0.1,0.3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    for name, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(name, value)
+
+    # Before the app import, the tools bind the model factories when they load
+    install(Latency(args.llm_latency, args.seed), Latency(args.embedding_latency, args.seed + 1))
+
+    with FixtureServer(build_documents(args.document_chars)) as fixtures:
+        port = free_port()
+        args.base_url = f"http://127.0.0.1:{port}"
+        server, thread = start_server(port)
+        # After the app is loaded, its import-time logging is useful when it fails to start
+        logging.disable(logging.INFO)
+        try:
+            print(f"LLM latency {args.llm_latency}, embedding latency {args.embedding_latency}, {args.file_type} documents of {args.document_chars} chars")
+            print(f"{'tool':36} {'conc':>4} {'ok':>9} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'req/s':>8} {'peak MB':>9} {'grew MB':>8}  errors")
+            # The tools print progress to stdout, keep it out of the table
+            output = sys.stdout
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results = asyncio.run(benchmark(args, fixtures, output))
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"settings": {key: value for key, value in vars(args).items() if key != "base_url"}, "results": results}, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Microbenchmark for tool input validation.
+
+Compares the cached validator used by the API (`finalize_tool_inputs`) with compiling
+the plan on every request (`finalize_inputs`) and with re-reading the tool's metadata.json
+from disk first, which is what every request used to do.
+
+    python benchmarks/validation_benchmark.py --files 1000 --iterations 200
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tool_registry import ToolInput
+from app.tools.utils.tool_utilities import InputValidator, convert_files_to_tool_files, finalize_inputs, load_tool_metadata, prepare_input_data
+
+TOOL_ID = "multiple-choice-quiz-generator"
+
+def build_inputs(n_files: int):
+    return [
+        ToolInput(name="topic", value="Linear Algebra"),
+        ToolInput(name="n_questions", value="5"),
+        ToolInput(name="file_url", value="https://example.com/sample.pdf"),
+        ToolInput(name="file_type", value="pdf"),
+        ToolInput(name="lang", value="en"),
+        ToolInput(name="files", value=[{"url": f"https://example.com/{index}.pdf", "filename": f"{index}.pdf"} for index in range(n_files)]),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000, help="size of the `files` list")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    # Metadata loading logs at debug level on every call
+    logging.disable(logging.INFO)
+
+    inputs = build_inputs(args.files)
+    # The quiz metadata has no file input, declare `files` so the list is validated
+    validate_data = load_tool_metadata(TOOL_ID)['inputs'] + [{"name": "files", "type": "file"}]
+    validator = InputValidator(validate_data)
+
+    def metadata_per_request():
+        load_tool_metadata.cache_clear()
+        finalize_inputs(inputs, load_tool_metadata(TOOL_ID)['inputs'] + [{"name": "files", "type": "file"}])
+
+    def cached_validator():
+        # Same steps as finalize_tool_inputs with the validator built once
+        convert_files_to_tool_files(validator.validate(prepare_input_data(inputs)))
+
+    cases = {
+        "metadata read + compile per request": metadata_per_request,
+        "compile per request": lambda: finalize_inputs(inputs, validate_data),
+        "cached validator": cached_validator,
+    }
+
+    print(f"{args.files} files, {args.iterations} iterations")
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=args.iterations, repeat=3)) / args.iterations
+        print(f"{name:40} {seconds * 1e6:10.1f} us/request")
+
+if __name__ == "__main__":
+    main()